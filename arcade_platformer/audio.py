@@ -0,0 +1,263 @@
+"""
+Arcade Platformer audio
+
+The game used to start a sound the moment anything happened, from
+inside the frame: one play per coin, even when a cluster of coins was
+picked up in a single step. The AudioManager takes requests instead,
+keeps one of each sound per frame, and starts the frame's batch once,
+at the end of the update, unless a sound already has as many voices
+going as it is allowed.
+
+pyglet players must be started from the thread running the event loop,
+so playback stays on the main thread. What is slow is decoding a sound
+file, and that happens on a worker thread: a sound requested before it
+is loaded plays at the first flush after the worker has decoded it.
+
+Playback goes through a backend. ArcadeBackend plays through arcade;
+NullBackend only counts what would have played, for headless runs and
+benchmarks.
+
+Sounds are only decoded the first time they are played, or earlier if
+the game warms them up in the background, and each file is decoded
+once per process however many managers ask for it.
+"""
+# audio.py
+
+import collections
+import pathlib
+import queue
+import threading
+
+import arcade
+
+# Most copies of one sound that may play at the same time
+MAX_VOICES_PER_SOUND = 3
+
+
+class SoundRegistry:
+    """ One shared Sound per sound file. """
+    def __init__(self) -> None:
+        self.sounds = {}
+
+        # Sounds are loaded by the audio loader and the warm-up thread
+        self.lock = threading.Lock()
+
+    def get(self, path: pathlib.Path) -> arcade.Sound:
+        """
+        Get the sound for a file, loading it on first use
+
+        Args:
+           path (pathlib.Path): The sound file
+
+        Returns:
+           arcade.Sound: The shared sound
+        """
+        key = pathlib.Path(path).resolve()
+
+        with self.lock:
+            sound = self.sounds.get(key)
+            if sound is None:
+                sound = arcade.load_sound(str(key))
+                self.sounds[key] = sound
+
+        return sound
+
+    def clear(self) -> None:
+        """ Forget every loaded sound. """
+        with self.lock:
+            self.sounds.clear()
+
+
+# One registry shared by the whole game
+SOUNDS = SoundRegistry()
+
+
+class ArcadeBackend:
+    """ Loads and plays sounds with arcade. """
+    def load(self, path):
+        """
+        Load a sound file, or get it if it was loaded already
+
+        Args:
+           path (pathlib.Path): The sound file
+
+        Returns:
+           arcade.Sound: The loaded sound
+        """
+        return SOUNDS.get(path)
+
+    def play(self, sound):
+        """
+        Start playing a sound
+
+        Args:
+           sound (arcade.Sound): The sound to play
+
+        Returns:
+           The player for this voice
+        """
+        return sound.play()
+
+    def is_playing(self, voice) -> bool:
+        """
+        Check whether a voice is still going
+
+        Args:
+           voice: A player returned by play()
+
+        Returns:
+           bool: True until the voice has finished
+        """
+        return voice.playing
+
+
+class NullBackend:
+    """ Plays nothing, but counts what would have played. """
+    def __init__(self) -> None:
+        self.played = collections.Counter()
+
+    def load(self, path):
+        """ Nothing to load; the path stands in for the sound. """
+        return path
+
+    def play(self, sound):
+        """ Count the play; there is no voice to track. """
+        self.played[sound] += 1
+        return None
+
+    def is_playing(self, voice) -> bool:
+        """ Nothing is ever playing. """
+        return False
+
+
+class AudioManager:
+    """ Gathers sound requests and plays them once per frame. """
+    def __init__(
+        self,
+        backend=None,
+        max_voices: int = MAX_VOICES_PER_SOUND,
+        threaded: bool = True,
+    ) -> None:
+        """
+        Create the manager
+
+        Args:
+           backend: Loads and plays sounds; an ArcadeBackend if None
+           max_voices (int): Most copies of one sound playing at once
+           threaded (bool): Load sounds on a worker thread; if False,
+              flush() loads them itself
+        """
+        self.backend = backend if backend is not None else ArcadeBackend()
+        self.max_voices = max_voices
+        self.threaded = threaded
+
+        # Sound files by name, and the sounds loaded from them so far;
+        # sounds are loaded on first play
+        self.paths = {}
+        self.sounds = {}
+
+        # Names requested this frame, in order, each only once
+        self.requests = {}
+
+        # Names requested in earlier frames, still waiting to be loaded
+        self.waiting = {}
+
+        # Voices still playing, by sound name
+        self.voices = collections.defaultdict(list)
+
+        # How many requests were merged or dropped for hitting the cap
+        self.coalesced = 0
+        self.capped = 0
+
+        # Names sent to the loader thread, which is only started when
+        # first needed
+        self.loading = set()
+        self.loads = queue.Queue()
+        self.worker = None
+
+    def add(self, name: str, path) -> None:
+        """
+        Name a sound so it can be requested; it is loaded when first played
+
+        Args:
+           name (str): The name to request it by
+           path (pathlib.Path): The sound file
+        """
+        self.paths[name] = path
+
+    def request(self, name: str) -> None:
+        """
+        Ask for a sound to play at the end of this frame
+
+        Asking again in the same frame does nothing more.
+
+        Args:
+           name (str): Which added sound to play
+        """
+        if name in self.requests:
+            self.coalesced += 1
+        else:
+            self.requests[name] = None
+
+    def flush(self) -> None:
+        """ Play this frame's requests; call once a frame, from on_update. """
+        if not self.requests and not self.waiting:
+            return
+
+        batch = dict(self.waiting)
+        batch.update(self.requests)
+        self.requests.clear()
+        self.waiting.clear()
+
+        ready = []
+        for name in batch:
+            if name in self.sounds:
+                ready.append(name)
+            elif not self.threaded:
+                self.sounds[name] = self.backend.load(self.paths[name])
+                ready.append(name)
+            else:
+                self._load_later(name)
+                self.waiting[name] = None
+        self._play_batch(ready)
+
+    def close(self) -> None:
+        """ Stop the loader thread once it has loaded what it was sent. """
+        if self.worker is not None:
+            self.loads.put(None)
+            self.worker.join()
+            self.worker = None
+
+    def _load_later(self, name: str) -> None:
+        """ Have the loader thread decode a sound, once. """
+        if self.worker is None:
+            self.worker = threading.Thread(
+                target=self._run, name="audio", daemon=True
+            )
+            self.worker.start()
+        if name not in self.loading:
+            self.loading.add(name)
+            self.loads.put(name)
+
+    def _run(self) -> None:
+        """ Loader thread body: decode each sound as it is asked for. """
+        while True:
+            name = self.loads.get()
+            if name is None:
+                return
+            self.sounds[name] = self.backend.load(self.paths[name])
+
+    def _play_batch(self, batch: list) -> None:
+        """ Start each loaded sound in a batch that has a voice free. """
+        for name in batch:
+            voices = [
+                voice for voice in self.voices[name]
+                if self.backend.is_playing(voice)
+            ]
+            if len(voices) >= self.max_voices:
+                self.capped += 1
+            else:
+                voice = self.backend.play(self.sounds[name])
+                if voice is not None:
+                    voices.append(voice)
+            self.voices[name] = voices
@@ -0,0 +1,246 @@
+"""
+Arcade Platformer baked layers
+
+The Background and Ground layers never change once a level is set up,
+yet drawing them sprite by sprite sends every tile to the GPU's vertex
+stage each frame. A BakedLayer paints those sprites into large images
+covering BAKE_TILE_PIXELS square pieces of the map, and then draws only
+the pieces on screen: a handful of textured quads a frame however many
+tiles the layers hold.
+
+Pieces are painted the first time they come on screen, not all when
+the level loads, and only the BAKE_TILE_LIMIT most recently drawn are
+kept. A 1024 pixel piece is 4 MiB of pixels, so baking all of a
+1000x200 tile map up front would take gigabytes; this way the memory
+used stays the same on any size of map. Each piece is drawn from a
+sprite list of its own, unlinked when the piece is dropped, so its GPU
+texture goes at once instead of when the garbage collector next runs.
+
+The images are painted with PIL from the textures' decoded pixels, not
+rendered by OpenGL, so baking works the same under a software or
+headless GL context, or with none at all. The GPU only ever sees the
+finished images.
+"""
+# baking.py
+
+import collections
+
+import arcade
+from PIL import Image
+
+# Width and height of each baked image, in map pixels
+BAKE_TILE_PIXELS = 1024
+
+# How many baked images to keep; a screen shows at most four at once
+BAKE_TILE_LIMIT = 16
+
+
+class BakedLayer:
+    """ Static layers painted into a grid of large textures. """
+    # Tells apart the textures of layers baked one after another
+    generation = 0
+
+    def __init__(
+        self,
+        layers: list,
+        tile_pixels: int = BAKE_TILE_PIXELS,
+        tile_limit: int = BAKE_TILE_LIMIT,
+    ) -> None:
+        """
+        Note which of the layers' sprites each texture tile will hold
+
+        Args:
+           layers (list): Sprite lists to bake, bottom layer first
+           tile_pixels (int): Width and height of each texture tile
+           tile_limit (int): How many painted tiles to keep at once
+        """
+        self.tile_pixels = tile_pixels
+        self.tile_limit = tile_limit
+        BakedLayer.generation += 1
+        self.generation = BakedLayer.generation
+
+        # Each texture's image as drawn, by texture, scale and angle
+        self.images = {}
+
+        # The sprites reaching each tile, in drawing order
+        self.tile_sprites = collections.defaultdict(list)
+        for sprites in layers:
+            for sprite in sprites:
+                for key in self._tiles_reached(sprite):
+                    self.tile_sprites[key].append(sprite)
+
+        # Painted tiles as one-sprite lists, least recently drawn first;
+        # tiles left empty, such as open sky, are kept as None
+        self.tiles = collections.OrderedDict()
+        self.baked = 0
+
+    def _drawn_image(self, sprite) -> Image.Image:
+        """ A texture's image scaled and turned the way a sprite shows it. """
+        texture = sprite.texture
+        key = (id(texture), sprite.scale, sprite.angle)
+        image = self.images.get(key)
+        if image is not None:
+            return image
+
+        image = texture.image.convert("RGBA")
+        if sprite.scale != 1:
+            image = image.resize(
+                (
+                    max(1, round(image.width * sprite.scale)),
+                    max(1, round(image.height * sprite.scale)),
+                )
+            )
+        if sprite.angle:
+            # Both arcade and PIL turn counterclockwise
+            image = image.rotate(sprite.angle, expand=True)
+        self.images[key] = image
+        return image
+
+    def _bounds(self, sprite) -> tuple:
+        """ Left, bottom, right and top of a sprite's image, in pixels. """
+        image = self._drawn_image(sprite)
+        left = round(sprite.center_x - image.width / 2)
+        top = round(sprite.center_y + image.height / 2)
+        return left, top - image.height, left + image.width, top
+
+    def _tiles_reached(self, sprite) -> list:
+        """ The (column, row) of every tile a sprite's image reaches. """
+        size = self.tile_pixels
+        left, bottom, right, top = self._bounds(sprite)
+        return [
+            (column, row)
+            for column in range(left // size, (right - 1) // size + 1)
+            for row in range(bottom // size, (top - 1) // size + 1)
+        ]
+
+    def _bake(self, column: int, row: int):
+        """
+        Paint one tile from the sprites that reach it
+
+        Args:
+           column (int): Which column of tiles
+           row (int): Which row of tiles
+
+        Returns:
+           arcade.SpriteList: The tile's sprite, or None if nothing
+              shows in it
+        """
+        size = self.tile_pixels
+        canvas = Image.new("RGBA", (size, size))
+        for sprite in self.tile_sprites[(column, row)]:
+            image = self._drawn_image(sprite)
+            left, _, _, top = self._bounds(sprite)
+
+            # Where the image sits in the tile; images run top down
+            x = left - column * size
+            y = (row + 1) * size - top
+
+            # Only the part of the image inside the tile
+            source = (
+                max(0, -x),
+                max(0, -y),
+                min(image.width, size - x),
+                min(image.height, size - y),
+            )
+            if source[2] <= source[0] or source[3] <= source[1]:
+                continue
+            canvas.alpha_composite(
+                image, dest=(max(0, x), max(0, y)), source=source
+            )
+
+        self.baked += 1
+        if canvas.getbbox() is None:
+            return None
+
+        # A piece painted again gets the same name, as it has the same
+        # pixels
+        sprite = arcade.Sprite(
+            center_x=(column + 0.5) * size, center_y=(row + 0.5) * size
+        )
+        sprite.texture = arcade.Texture(
+            name=f"baked:{self.generation}:{column}:{row}",
+            image=canvas,
+            hit_box_algorithm="None",
+        )
+        tile = arcade.SpriteList(is_static=True)
+        tile.append(sprite)
+        return tile
+
+    def tile(self, column: int, row: int):
+        """
+        Get a tile, painting it if it isn't kept
+
+        Args:
+           column (int): Which column of tiles
+           row (int): Which row of tiles
+
+        Returns:
+           arcade.SpriteList: The tile's sprite, or None if nothing
+              shows in it
+        """
+        key = (column, row)
+        if key not in self.tile_sprites:
+            return None
+        if key in self.tiles:
+            self.tiles.move_to_end(key)
+            return self.tiles[key]
+
+        tile = self._bake(column, row)
+        self.tiles[key] = tile
+        while len(self.tiles) > self.tile_limit:
+            _, dropped = self.tiles.popitem(last=False)
+            if dropped is not None:
+                # Sprite and list point at each other; unlink them
+                for sprite in list(dropped):
+                    sprite.remove_from_sprite_lists()
+        return tile
+
+    def visible_tiles(
+        self, left: float, bottom: float, width: float, height: float
+    ) -> list:
+        """
+        Find the tiles that overlap an area of the map, painting any
+        that are not kept
+
+        Args:
+           left (float): Left edge of the area
+           bottom (float): Bottom edge of the area
+           width (float): Width of the area
+           height (float): Height of the area
+
+        Returns:
+           list: (column, row, sprite list) of each tile in the area
+        """
+        size = self.tile_pixels
+        visible = []
+        first_column = int(left // size)
+        last_column = int((left + width) // size)
+        first_row = int(bottom // size)
+        last_row = int((bottom + height) // size)
+
+        for column in range(first_column, last_column + 1):
+            for row in range(first_row, last_row + 1):
+                tile = self.tile(column, row)
+                if tile is not None:
+                    visible.append((column, row, tile))
+        return visible
+
+    def draw(
+        self, left: float, bottom: float, width: float, height: float
+    ) -> int:
+        """
+        Draw the tiles that overlap an area of the map
+
+        Args:
+           left (float): Left edge of the area
+           bottom (float): Bottom edge of the area
+           width (float): Width of the area
+           height (float): Height of the area
+
+        Returns:
+           int: How many tiles were drawn
+        """
+        visible = self.visible_tiles(left, bottom, width, height)
+        for _, _, tile in visible:
+            tile.draw()
+        return len(visible)
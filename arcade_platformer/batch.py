@@ -0,0 +1,263 @@
+"""
+Arcade Platformer batch runner
+
+Plays many headless games at once across a pool of worker processes,
+each with its own seed and input policy, and collects the score,
+completion time and death position of every run into one table:
+
+    python batch.py --levels 1 2 --runs 500 --policy random --csv runs.csv
+
+The maps are parsed once in the parent process before the pool starts.
+On Linux the workers are forked and inherit that cache; elsewhere each
+worker parses every map once when it starts, never once per game.
+
+A map that fails to load only ends the games that need it: each is
+reported as an "error" row with the reason, and the rest of the batch
+carries on.
+"""
+# batch.py
+
+import argparse
+import csv
+import multiprocessing
+import random
+import statistics
+import sys
+
+from constants import UPDATE_RATE
+from levels import LEVEL_CACHE
+from simulation import (
+    EVENT_DEATH,
+    EVENT_LEVEL_COMPLETE,
+    PlatformerSimulation,
+    level_map_path,
+)
+
+# Give up on a run after this many steps, two minutes of game time
+DEFAULT_MAX_TICKS = 7200
+
+# Columns of the result table
+RESULT_COLUMNS = (
+    "level",
+    "seed",
+    "policy",
+    "outcome",
+    "score",
+    "ticks",
+    "seconds",
+    "death_x",
+    "death_y",
+    "error",
+)
+
+
+def policy_right(simulation: PlatformerSimulation, rng: random.Random) -> tuple:
+    """ Hold right and jump every so often. """
+    return 1.0, 0.0, rng.random() < 0.05
+
+
+def policy_random(simulation: PlatformerSimulation, rng: random.Random) -> tuple:
+    """ Mostly head right, sometimes turn back, climb or jump. """
+    move_x = 1.0 if rng.random() < 0.8 else -1.0
+    move_y = rng.choice((-1.0, 0.0, 1.0))
+    return move_x, move_y, rng.random() < 0.1
+
+
+# Input policies by name, so runs can be described with plain strings
+POLICIES = {
+    "right": policy_right,
+    "random": policy_random,
+}
+
+
+def play(level: int, seed: int, policy: str, max_ticks: int) -> dict:
+    """
+    Play one headless game until the level is finished, the player
+    dies or time runs out
+
+    Args:
+       level (int): Which level to play
+       seed (int): Seed for the input policy
+       policy (str): Name of the input policy in POLICIES
+       max_ticks (int): Most steps to run
+
+    Returns:
+       dict: One row of the result table
+    """
+    rng = random.Random(seed)
+    choose_input = POLICIES[policy]
+
+    simulation = PlatformerSimulation(level)
+
+    outcome = "timeout"
+    error = None
+    ticks = 0
+    try:
+        simulation.setup()
+        while ticks < max_ticks:
+            simulation.set_input(*choose_input(simulation, rng))
+            ticks += 1
+            events = simulation.step()
+
+            if EVENT_DEATH in events:
+                outcome = "death"
+                break
+            if EVENT_LEVEL_COMPLETE in events:
+                outcome = "complete"
+                break
+    except Exception as exc:
+        # Finishing the level loads the next map; if that one is
+        # broken, this level was still completed
+        error = f"{type(exc).__name__}: {exc}"
+        outcome = "complete" if simulation.level != level else "error"
+
+    death_x, death_y = simulation.death_position or (None, None)
+    return {
+        "level": level,
+        "seed": seed,
+        "policy": policy,
+        "outcome": outcome,
+        "score": simulation.score,
+        "ticks": ticks,
+        "seconds": ticks * UPDATE_RATE,
+        "death_x": death_x,
+        "death_y": death_y,
+        "error": error,
+    }
+
+
+def _play_job(job: tuple) -> dict:
+    """ Pool entry point, taking play()'s arguments as one tuple. """
+    return play(*job)
+
+
+def warm_cache(levels: list) -> None:
+    """
+    Parse each level's map into this process's cache
+
+    The following level is loaded too, since setup() prefetches it and
+    every worker would otherwise parse it in the background. Maps that
+    fail to load are skipped; the games on them report the error.
+
+    Args:
+       levels (list): The levels that will be played
+    """
+    for level in levels:
+        for map_path in (level_map_path(level), level_map_path(level + 1)):
+            if not map_path.exists():
+                continue
+            try:
+                LEVEL_CACHE.load(map_path)
+            except Exception:
+                continue
+
+
+def run_batch(
+    levels: list,
+    runs: int,
+    policy: str,
+    processes: int = None,
+    max_ticks: int = DEFAULT_MAX_TICKS,
+    first_seed: int = 0,
+) -> list:
+    """
+    Play many games across a process pool
+
+    Args:
+       levels (list): Levels to play; each gets the same seeds
+       runs (int): How many games per level
+       policy (str): Name of the input policy
+       processes (int): Worker count, one per CPU core if None
+       max_ticks (int): Most steps per game
+       first_seed (int): Seed of the first game on each level
+
+    Returns:
+       list: One result row per game, in job order
+    """
+    jobs = [
+        (level, seed, policy, max_ticks)
+        for level in levels
+        for seed in range(first_seed, first_seed + runs)
+    ]
+
+    # Forked workers inherit this; spawned ones redo it once each
+    warm_cache(levels)
+
+    processes = processes or multiprocessing.cpu_count()
+
+    # Several jobs per task keeps the inter-process traffic low
+    chunk_size = max(1, len(jobs) // (4 * processes))
+
+    with multiprocessing.Pool(
+        processes, initializer=warm_cache, initargs=(levels,)
+    ) as pool:
+        return pool.map(_play_job, jobs, chunksize=chunk_size)
+
+
+def summarize(results: list) -> str:
+    """
+    Describe the results level by level
+
+    Args:
+       results (list): Rows from run_batch()
+
+    Returns:
+       str: One line per level
+    """
+    lines = []
+    for level in sorted({row["level"] for row in results}):
+        played = [row for row in results if row["level"] == level]
+        rows = [row for row in played if row["outcome"] != "error"]
+        if not rows:
+            lines.append(
+                f"level {level:02}: {len(played)} runs, all failed: "
+                f"{played[0]['error']}"
+            )
+            continue
+        completed = [row for row in rows if row["outcome"] == "complete"]
+        deaths = [row for row in rows if row["outcome"] == "death"]
+        completion = (
+            f"{statistics.mean(row['seconds'] for row in completed):.1f}s"
+            if completed else "n/a"
+        )
+        lines.append(
+            f"level {level:02}: {len(rows)} runs, "
+            f"{len(completed)} completed (mean {completion}), "
+            f"{len(deaths)} deaths, "
+            f"{len(played) - len(rows)} errors, "
+            f"mean score {statistics.mean(row['score'] for row in rows):.1f}"
+        )
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 2])
+    parser.add_argument("--runs", type=int, default=100)
+    parser.add_argument("--policy", choices=sorted(POLICIES), default="random")
+    parser.add_argument("--processes", type=int)
+    parser.add_argument("--max-ticks", type=int, default=DEFAULT_MAX_TICKS)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--csv", help="Write every run to this CSV file")
+    args = parser.parse_args()
+
+    results = run_batch(
+        args.levels,
+        args.runs,
+        args.policy,
+        processes=args.processes,
+        max_ticks=args.max_ticks,
+        first_seed=args.seed,
+    )
+
+    if args.csv:
+        with open(args.csv, "w", newline="") as csv_file:
+            writer = csv.DictWriter(csv_file, fieldnames=RESULT_COLUMNS)
+            writer.writeheader()
+            writer.writerows(results)
+    else:
+        writer = csv.DictWriter(sys.stdout, fieldnames=RESULT_COLUMNS)
+        writer.writeheader()
+        writer.writerows(results)
+
+    print(summarize(results), file=sys.stderr)
@@ -0,0 +1,289 @@
+"""
+Arcade Platformer benchmarks
+
+Times level loading, sprite construction, simulation steps on maps of
+several sizes, and drawing into a hidden window. Results are written as
+JSON and can be compared with a stored baseline:
+
+    python benchmark.py --output bench.json
+    python benchmark.py --baseline bench.json --threshold 0.2
+
+The second run exits with status 1 if any benchmark got more than 20%
+slower than the baseline.
+
+A case that can't run, such as a level whose map fails to load, is
+written with the error in place of its times and is left out of the
+comparison, so one broken map doesn't stop the rest of the suite.
+"""
+# benchmark.py
+
+import argparse
+import json
+import pathlib
+import statistics
+import sys
+import time
+
+import arcade
+
+from audio import AudioManager, NullBackend
+from constants import SCREEN_HEIGHT, SCREEN_WIDTH
+from enemies import Enemy
+from levels import LEVEL_CACHE
+from simulation import (
+    PHYSICS_GRID,
+    PlatformerSimulation,
+    create_player_sprite,
+    level_map_path,
+)
+from stress_map import generate_stress_map
+
+# Synthetic map sizes: name, width and height in tiles, enemy count
+SYNTHETIC_SIZES = (
+    ("small", 50, 20, 10),
+    ("medium", 200, 50, 100),
+    ("large", 1000, 200, 1000),
+)
+
+# The shipped levels
+LEVELS = (1, 2)
+
+# Default allowed slowdown before a benchmark counts as a regression
+DEFAULT_THRESHOLD = 0.2
+
+
+def measure(func, repeat: int) -> dict:
+    """
+    Time a function several times
+
+    Args:
+       func: Called with no arguments
+       repeat (int): How many times to call it
+
+    Returns:
+       dict: Median, minimum and maximum time in milliseconds
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append((time.perf_counter() - start) * 1000)
+    return {
+        "median_ms": statistics.median(times),
+        "min_ms": min(times),
+        "max_ms": max(times),
+        "runs": repeat,
+    }
+
+
+def failed(error: Exception) -> dict:
+    """
+    Describe a benchmark case that couldn't run
+
+    Args:
+       error (Exception): What stopped it
+
+    Returns:
+       dict: The error, in place of the times
+    """
+    return {"error": f"{type(error).__name__}: {error}"}
+
+
+def bench_level_setup(results: dict, repeat: int) -> None:
+    """ Setting up each shipped level, with and without the cache. """
+    for level in LEVELS:
+        simulation = PlatformerSimulation(level)
+
+        def cold_setup():
+            LEVEL_CACHE.discard(level_map_path(level))
+            simulation.setup()
+
+        try:
+            results[f"setup_level_{level:02}_cold"] = measure(
+                cold_setup, repeat
+            )
+            results[f"setup_level_{level:02}_cached"] = measure(
+                simulation.setup, repeat
+            )
+        except Exception as error:
+            results[f"setup_level_{level:02}_cold"] = failed(error)
+            results[f"setup_level_{level:02}_cached"] = failed(error)
+
+
+def bench_sprites(results: dict, repeat: int) -> None:
+    """ Building the player and enemy sprites. """
+    results["create_player_sprite"] = measure(create_player_sprite, repeat)
+    results["create_enemy"] = measure(lambda: Enemy(0, 0), repeat)
+
+
+def bench_steps(results: dict, maps: dict, repeat: int) -> None:
+    """ One simulation step on each synthetic map, holding right. """
+    for name, map_path in maps.items():
+        try:
+            _bench_map_steps(results, name, map_path, repeat)
+        except Exception as error:
+            # Cases measured before the failure keep their times
+            for case in (f"step_{name}", f"enemies_{name}",
+                         f"step_{name}_grid"):
+                results.setdefault(case, failed(error))
+
+
+def _bench_map_steps(
+    results: dict, name: str, map_path: pathlib.Path, repeat: int
+) -> None:
+    """ The step benchmarks for one synthetic map. """
+    simulation = PlatformerSimulation(map_path=map_path)
+    simulation.setup()
+
+    def step():
+        simulation.set_input(move_x=1.0)
+        simulation.step()
+
+    results[f"step_{name}"] = measure(step, repeat)
+    results[f"step_{name}"]["enemies"] = len(simulation.enemy_system)
+    results[f"step_{name}"]["walls"] = len(simulation.walls)
+    results[f"step_{name}"]["coins"] = len(simulation.coins)
+
+    # The enemy update on its own, the figure that grows fastest
+    results[f"enemies_{name}"] = measure(
+        lambda: simulation.enemy_system.update(
+            simulation.platform_system.boxes
+        ),
+        repeat,
+    )
+
+    # The same step with tile grid physics
+    grid_simulation = PlatformerSimulation(
+        map_path=map_path, physics=PHYSICS_GRID
+    )
+    grid_simulation.setup()
+
+    def grid_step():
+        grid_simulation.set_input(move_x=1.0)
+        grid_simulation.step()
+
+    results[f"step_{name}_grid"] = measure(grid_step, repeat)
+
+
+def bench_draw(results: dict, maps: dict, repeat: int) -> None:
+    """ Drawing a frame of the game view into a hidden window. """
+    from pyglet import gl
+
+    # Imported here since it needs arcade's windowing to be usable
+    from platformer import PlatformerView
+
+    window = arcade.Window(SCREEN_WIDTH, SCREEN_HEIGHT, visible=False)
+
+    def draw():
+        view.on_draw()
+        gl.glFinish()
+
+    for name, map_path in (("level_01", None),) + tuple(maps.items()):
+        for bake_static, suffix in ((False, ""), (True, "_baked")):
+            view = PlatformerView(
+                audio=AudioManager(NullBackend(), threaded=False)
+            )
+            view.bake_static = bake_static
+            view.simulation.map_path = map_path
+            window.show_view(view)
+            try:
+                view.setup()
+
+                # The first draw uploads everything to the GPU
+                draw()
+                results[f"draw_{name}{suffix}"] = measure(draw, repeat)
+            except Exception as error:
+                results[f"draw_{name}{suffix}"] = failed(error)
+
+    window.close()
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """
+    Find benchmarks that got slower than the baseline allows
+
+    Args:
+       results (dict): This run's results
+       baseline (dict): Earlier results to compare with
+       threshold (float): Allowed slowdown, 0.2 meaning 20%
+
+    Returns:
+       list: A description of each regression
+    """
+    regressions = []
+    for name, result in results.items():
+        # Cases that failed either time can't be compared
+        if name not in baseline:
+            continue
+        if "error" in result or "error" in baseline[name]:
+            continue
+        before = baseline[name]["median_ms"]
+        after = result["median_ms"]
+        if before > 0 and after > before * (1 + threshold):
+            regressions.append(
+                f"{name}: {before:.3f} ms -> {after:.3f} ms "
+                f"(+{(after / before - 1) * 100:.0f}%)"
+            )
+    return regressions
+
+
+def run(repeat: int, draw: bool) -> dict:
+    """
+    Run every benchmark
+
+    Args:
+       repeat (int): How many times to time each one
+       draw (bool): Whether to run the drawing benchmarks
+
+    Returns:
+       dict: Results keyed by benchmark name
+    """
+    results = {}
+
+    # Generated maps refer to the game's tileset by a relative path,
+    # so they are written to the assets folder and removed afterwards
+    maps = {
+        name: generate_stress_map(width, height, enemies=enemies)
+        for name, width, height, enemies in SYNTHETIC_SIZES
+    }
+    try:
+        bench_level_setup(results, repeat)
+        bench_sprites(results, repeat)
+        bench_steps(results, maps, repeat)
+        if draw:
+            bench_draw(results, maps, repeat)
+    finally:
+        for map_path in maps.values():
+            map_path.unlink()
+
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--output", type=pathlib.Path)
+    parser.add_argument("--baseline", type=pathlib.Path)
+    parser.add_argument(
+        "--threshold", type=float, default=DEFAULT_THRESHOLD
+    )
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--no-draw", action="store_true")
+    args = parser.parse_args()
+
+    results = run(args.repeat, draw=not args.no_draw)
+
+    for name, result in results.items():
+        if "error" in result:
+            print(f"{name:32}     FAILED {result['error']}")
+        else:
+            print(f"{name:32} {result['median_ms']:10.3f} ms")
+
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=1))
+
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text())
+        regressions = compare(results, baseline, args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        sys.exit(1 if regressions else 0)
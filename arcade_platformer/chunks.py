@@ -0,0 +1,102 @@
+"""
+Arcade Platformer chunked rendering
+
+Big maps hold far more tiles than ever fit on screen. A ChunkedLayer
+splits a layer into square chunks of tiles, each with its own
+SpriteList, and only draws the chunks near the viewport. Drawing cost
+then depends on the size of the window instead of the size of the map.
+"""
+# chunks.py
+
+import arcade
+
+# Width and height of a chunk, in tiles
+CHUNK_TILES = 16
+
+# Extra distance around the viewport to draw, in pixels, so sprites
+# that stick out of their chunk are never clipped at the screen edge
+CHUNK_MARGIN = 128
+
+
+class ChunkedLayer:
+    """ One map layer split into chunks that can be drawn separately. """
+    def __init__(
+        self, sprites, tile_size: float, is_static: bool = True
+    ) -> None:
+        """
+        Split a layer's sprites into chunks
+
+        Args:
+           sprites: The sprites of the layer
+           tile_size (float): Size of one tile in pixels
+           is_static (bool): Whether the sprites never change once
+              drawn; a static chunk never sends changes to the GPU, so
+              layers whose sprites are hidden, such as coins, pass False
+        """
+        self.chunk_size = CHUNK_TILES * tile_size
+        self.chunks = {}
+
+        for sprite in sprites:
+            key = (
+                int(sprite.center_x // self.chunk_size),
+                int(sprite.center_y // self.chunk_size),
+            )
+            chunk = self.chunks.get(key)
+            if chunk is None:
+                chunk = arcade.SpriteList(is_static=is_static)
+                self.chunks[key] = chunk
+            chunk.append(sprite)
+
+    def visible_chunks(
+        self,
+        left: float,
+        bottom: float,
+        width: float,
+        height: float,
+        margin: float = CHUNK_MARGIN,
+    ) -> list:
+        """
+        Find the chunks that overlap an area of the map
+
+        Args:
+           left (float): Left edge of the area
+           bottom (float): Bottom edge of the area
+           width (float): Width of the area
+           height (float): Height of the area
+           margin (float): How far past the area to look
+
+        Returns:
+           list: SpriteLists of the chunks in or near the area
+        """
+        first_column = int((left - margin) // self.chunk_size)
+        last_column = int((left + width + margin) // self.chunk_size)
+        first_row = int((bottom - margin) // self.chunk_size)
+        last_row = int((bottom + height + margin) // self.chunk_size)
+
+        visible = []
+        for column in range(first_column, last_column + 1):
+            for row in range(first_row, last_row + 1):
+                chunk = self.chunks.get((column, row))
+                if chunk:
+                    visible.append(chunk)
+        return visible
+
+    def draw(
+        self, left: float, bottom: float, width: float, height: float
+    ) -> int:
+        """
+        Draw the chunks that overlap an area of the map
+
+        Args:
+           left (float): Left edge of the area
+           bottom (float): Bottom edge of the area
+           width (float): Width of the area
+           height (float): Height of the area
+
+        Returns:
+           int: How many chunks were drawn
+        """
+        visible = self.visible_chunks(left, bottom, width, height)
+        for chunk in visible:
+            chunk.draw()
+        return len(visible)
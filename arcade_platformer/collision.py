@@ -0,0 +1,145 @@
+"""
+Arcade Platformer collision grid
+
+Tiles never move once a level is loaded, so instead of testing a sprite
+against every tile in a layer we file each tile under the grid cells it
+covers. A query only looks at the cells the sprite itself covers, which
+keeps collision cost tied to the sprite's size rather than the map's.
+"""
+# collision.py
+
+import arcade
+
+
+class SpatialGrid:
+    """ A uniform grid of cells, each holding the sprites that overlap it. """
+    def __init__(self, cell_size: float) -> None:
+        """
+        Create an empty grid
+
+        Args:
+           cell_size (float): Width and height of a cell, usually one tile
+        """
+        self.cell_size = cell_size
+        self.cells = {}
+
+    @classmethod
+    def from_sprites(cls, sprites, cell_size: float) -> "SpatialGrid":
+        """
+        Build a grid holding every sprite in a list
+
+        Args:
+           sprites: The sprites to index
+           cell_size (float): Width and height of a cell
+
+        Returns:
+           SpatialGrid: The filled grid
+        """
+        grid = cls(cell_size)
+        for sprite in sprites:
+            grid.add(sprite)
+        return grid
+
+    def cell_range(
+        self, left: float, right: float, bottom: float, top: float
+    ) -> tuple:
+        """
+        Find the cells a rectangle covers
+
+        Args:
+           left (float): Left edge of the rectangle
+           right (float): Right edge of the rectangle
+           bottom (float): Bottom edge of the rectangle
+           top (float): Top edge of the rectangle
+
+        Returns:
+           tuple: First and last column, first and last row
+        """
+        return (
+            int(left // self.cell_size),
+            int(right // self.cell_size),
+            int(bottom // self.cell_size),
+            int(top // self.cell_size),
+        )
+
+    def _keys_for(self, sprite: arcade.Sprite) -> list:
+        """ Every cell key the sprite's bounding box touches. """
+        col_min, col_max, row_min, row_max = self.cell_range(
+            sprite.left, sprite.right, sprite.bottom, sprite.top
+        )
+        return [
+            (col, row)
+            for col in range(col_min, col_max + 1)
+            for row in range(row_min, row_max + 1)
+        ]
+
+    def add(self, sprite: arcade.Sprite) -> None:
+        """
+        File a sprite under every cell it covers
+
+        Args:
+           sprite (arcade.Sprite): The sprite to add
+        """
+        for key in self._keys_for(sprite):
+            self.cells.setdefault(key, []).append(sprite)
+
+    def remove(self, sprite: arcade.Sprite) -> None:
+        """
+        Take a sprite out of the grid
+
+        Args:
+           sprite (arcade.Sprite): The sprite to remove
+        """
+        for key in self._keys_for(sprite):
+            cell = self.cells.get(key)
+            if cell and sprite in cell:
+                cell.remove(sprite)
+                if not cell:
+                    del self.cells[key]
+
+    def query(
+        self, left: float, right: float, bottom: float, top: float
+    ) -> list:
+        """
+        Find the sprites filed near a rectangle
+
+        Args:
+           left (float): Left edge of the rectangle
+           right (float): Right edge of the rectangle
+           bottom (float): Bottom edge of the rectangle
+           top (float): Top edge of the rectangle
+
+        Returns:
+           list: Each nearby sprite once, which may or may not overlap
+        """
+        col_min, col_max, row_min, row_max = self.cell_range(
+            left, right, bottom, top
+        )
+
+        found = []
+        seen = set()
+        for col in range(col_min, col_max + 1):
+            for row in range(row_min, row_max + 1):
+                for sprite in self.cells.get((col, row), ()):
+                    if id(sprite) not in seen:
+                        seen.add(id(sprite))
+                        found.append(sprite)
+        return found
+
+    def collisions(self, sprite: arcade.Sprite) -> list:
+        """
+        Find the sprites in the grid that touch a sprite
+
+        Args:
+           sprite (arcade.Sprite): The sprite to check
+
+        Returns:
+           list: The sprites it collides with
+        """
+        return [
+            other
+            for other in self.query(
+                sprite.left, sprite.right, sprite.bottom, sprite.top
+            )
+            if arcade.check_for_collision(sprite, other)
+        ]
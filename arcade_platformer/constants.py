@@ -0,0 +1,49 @@
+"""
+Arcade Platformer constants
+
+Shared by the game views and the headless simulation so neither has to
+import the other.
+"""
+# constants.py
+
+import pathlib
+
+# Game constants
+# Window dimensions
+SCREEN_WIDTH = 1000
+SCREEN_HEIGHT = 650
+SCREEN_TITLE = "Arcade Platformer"
+
+# Scaling constants
+MAP_SCALING = 1.0
+
+# Player constants
+GRAVITY = 1.0
+PLAYER_START_X = 65
+PLAYER_START_Y = 256
+PLAYER_MOVE_SPEED = 10
+PLAYER_JUMP_SPEED = 20
+
+# Viewport margins
+# Defines how close the player has to be to scroll the viewport
+LEFT_VIEWPORT_MARGIN = 50
+RIGHT_VIEWPORT_MARGIN = 300
+TOP_VIEWPORT_MARGIN = 150
+BOTTOM_VIEWPORT_MARGIN = 150
+
+# Joystick control
+DEAD_ZONE = 0.1
+
+# Simulation timing
+# The game logic always advances in steps of this many seconds
+UPDATE_RATE = 1 / 60
+# Never run more than this many steps in one frame, so a long stall
+# doesn't turn into a long burst of catch-up steps
+MAX_STEPS_PER_UPDATE = 5
+
+# Startup
+# Most seconds from creating the window to drawing the first frame
+STARTUP_BUDGET = 0.5
+
+# Assets path
+ASSETS_PATH = pathlib.Path(__file__).resolve().parent.parent / "assets"
@@ -0,0 +1,252 @@
+"""
+Arcade Platformer controls
+
+Keys and joystick buttons are looked up once in a table that maps each
+to an action bit, and the bits held down are kept in one mask that is
+only recomputed when a key or button changes. Each frame the mask, plus
+any joystick stick movement, is turned into the simulation's input in
+one place.
+
+Holding both directions goes the way of the one pressed last, so
+letting go of one while the other is still held keeps the player
+moving. Jumps are taken on the press, from the keyboard and joystick
+alike, and the time from each input event to the first simulation step
+that sees it is kept for the profiler overlay.
+
+Looking for a joystick means asking the operating system about input
+devices, so it waits until the game first reads its input rather than
+holding up the window.
+"""
+# controls.py
+
+import collections
+import time
+
+import arcade
+
+from constants import DEAD_ZONE
+
+# Action bits
+ACTION_LEFT = 1
+ACTION_RIGHT = 2
+ACTION_UP = 4
+ACTION_DOWN = 8
+ACTION_JUMP = 16
+
+# Which action each key stands for
+KEY_ACTIONS = {
+    arcade.key.LEFT: ACTION_LEFT,
+    arcade.key.J: ACTION_LEFT,
+    arcade.key.RIGHT: ACTION_RIGHT,
+    arcade.key.L: ACTION_RIGHT,
+    arcade.key.UP: ACTION_UP,
+    arcade.key.I: ACTION_UP,
+    arcade.key.DOWN: ACTION_DOWN,
+    arcade.key.K: ACTION_DOWN,
+    arcade.key.SPACE: ACTION_JUMP,
+}
+
+# Which action each joystick button stands for
+BUTTON_ACTIONS = {
+    0: ACTION_JUMP,
+}
+
+# Actions on the same axis, pressed last wins when both are held
+OPPOSITES = {
+    ACTION_LEFT: ACTION_RIGHT,
+    ACTION_RIGHT: ACTION_LEFT,
+    ACTION_UP: ACTION_DOWN,
+    ACTION_DOWN: ACTION_UP,
+}
+
+# How many recent input latencies to keep
+LATENCY_HISTORY = 300
+
+
+def open_joystick():
+    """
+    Open the first connected joystick
+
+    Returns:
+       The opened pyglet joystick, or None if none is connected
+    """
+    joysticks = arcade.get_joysticks()
+    if not joysticks:
+        return None
+    joystick = joysticks[0]
+    joystick.open()
+    return joystick
+
+
+class Controls:
+    """ Tracks which actions are held and feeds them to the simulation. """
+    def __init__(self, joystick=None, find_joystick: bool = False) -> None:
+        """
+        Start with nothing held
+
+        Args:
+           joystick: A pyglet joystick to read each frame, if any
+           find_joystick (bool): Open the first connected joystick the
+              first time input is read, if joystick is None
+        """
+        self.joystick = joystick
+        self.find_joystick = find_joystick and joystick is None
+
+        # Keys and joystick buttons held down, and the actions they hold
+        self.held_keys = set()
+        self.held_buttons = set()
+        self.actions = 0
+
+        # Of two opposite actions held together, which one to obey
+        self.preferred = 0
+
+        # A jump pressed but not yet handed to the simulation
+        self.jump_pending = False
+
+        # When the oldest input not yet seen by a step arrived
+        self.event_time = None
+
+        # Seconds from input event to the step that used it
+        self.latencies = collections.deque(maxlen=LATENCY_HISTORY)
+
+    def key_press(self, key: int) -> bool:
+        """
+        Note a key going down
+
+        Args:
+           key (int): Which key was pressed
+
+        Returns:
+           bool: True if the key is a game control
+        """
+        action = KEY_ACTIONS.get(key)
+        if action is None:
+            return False
+        self.held_keys.add(key)
+        self._press(action)
+        return True
+
+    def key_release(self, key: int) -> bool:
+        """
+        Note a key coming up
+
+        Args:
+           key (int): Which key was released
+
+        Returns:
+           bool: True if the key is a game control
+        """
+        if key not in KEY_ACTIONS:
+            return False
+        self.held_keys.discard(key)
+        self._update_actions()
+        return True
+
+    def _press(self, action: int) -> None:
+        """ Update the held actions for a newly pressed control. """
+        if action == ACTION_JUMP:
+            self.jump_pending = True
+        elif action in OPPOSITES:
+            self.preferred = (self.preferred & ~OPPOSITES[action]) | action
+        self._update_actions()
+
+    def _update_actions(self) -> None:
+        """ Rebuild the held action mask after a control changed. """
+        actions = 0
+        for key in self.held_keys:
+            actions |= KEY_ACTIONS[key]
+        for button in self.held_buttons:
+            actions |= BUTTON_ACTIONS[button]
+        self.actions = actions
+
+        if self.event_time is None:
+            self.event_time = time.perf_counter()
+
+    def poll_joystick(self) -> None:
+        """ Treat joystick buttons that changed like key presses. """
+        buttons = self.joystick.buttons
+        for button in BUTTON_ACTIONS:
+            down = button < len(buttons) and buttons[button]
+            if down and button not in self.held_buttons:
+                self.held_buttons.add(button)
+                self._press(BUTTON_ACTIONS[button])
+            elif not down and button in self.held_buttons:
+                self.held_buttons.discard(button)
+                self._update_actions()
+
+    def axis(self, negative: int, positive: int) -> float:
+        """
+        Turn two opposite held actions into movement along one axis
+
+        Args:
+           negative (int): The action moving toward -1.0
+           positive (int): The action moving toward 1.0
+
+        Returns:
+           float: -1.0, 0.0 or 1.0
+        """
+        held = self.actions & (negative | positive)
+        if held == negative | positive:
+            held &= self.preferred
+        if held == positive:
+            return 1.0
+        if held == negative:
+            return -1.0
+        return 0.0
+
+    def apply(self, simulation) -> None:
+        """
+        Set the simulation's input from the held actions and joystick
+
+        A stick pushed past the dead zone wins over the keys.
+
+        Args:
+           simulation (PlatformerSimulation): The simulation to feed
+        """
+        move_x = self.axis(ACTION_LEFT, ACTION_RIGHT)
+        move_y = self.axis(ACTION_DOWN, ACTION_UP)
+
+        # Only look for a joystick once the game is being played
+        if self.find_joystick:
+            self.find_joystick = False
+            self.joystick = open_joystick()
+
+        if self.joystick:
+            self.poll_joystick()
+            if abs(self.joystick.x) > DEAD_ZONE:
+                move_x = self.joystick.x
+            if abs(self.joystick.y) > DEAD_ZONE:
+                move_y = self.joystick.y
+
+        # A jump waits in the simulation until a step uses it
+        jump = simulation.jump_requested or self.jump_pending
+        self.jump_pending = False
+
+        simulation.set_input(move_x, move_y, jump)
+
+    def stepped(self) -> None:
+        """ Note that a simulation step has seen the latest input. """
+        if self.event_time is not None:
+            self.latencies.append(time.perf_counter() - self.event_time)
+            self.event_time = None
+
+    def release_all(self) -> None:
+        """ Forget every held key, such as when the game is paused. """
+        # Joystick buttons are polled, so they stay up to date anyway
+        self.held_keys.clear()
+        self.actions = 0
+        self.jump_pending = False
+
+    def latency_summary(self) -> str:
+        """
+        Describe recent input latency for the overlay
+
+        Returns:
+           str: The median and worst latency in milliseconds
+        """
+        if not self.latencies:
+            return "input n/a"
+        ordered = sorted(self.latencies)
+        median = ordered[len(ordered) // 2] * 1000
+        worst = ordered[-1] * 1000
+        return f"input {median:.1f}/{worst:.1f}ms"
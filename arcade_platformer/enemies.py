@@ -0,0 +1,229 @@
+"""
+Arcade Platformer enemies
+
+Enemy positions and speeds live in NumPy arrays and are moved all at
+once, checking walls against a grid of solid tiles instead of sprite
+lists. The Enemy sprites are only brought up to date when they are
+about to be drawn, so a headless simulation never touches them.
+"""
+# enemies.py
+
+import arcade
+import numpy as np
+
+from constants import ASSETS_PATH, PLAYER_MOVE_SPEED
+from textures import TEXTURES
+
+# Default enemy walking speed, in pixels per step
+ENEMY_SPEED = PLAYER_MOVE_SPEED // 2
+
+
+class Enemy(arcade.AnimatedWalkingSprite):
+    """ Enemy sprites with basic walking movement. """
+    def __init__(self, pos_x: int, pos_y: int) -> None:
+        super().__init__(center_x=pos_x, center_y=pos_y)
+
+        # Path to sprite images
+        texture_path = ASSETS_PATH / "images" / "enemies"
+
+        # Set up the appropriate textures
+        walking_texture_path = [
+            texture_path / "slimePurple.png",
+            texture_path / "slimePurple_move.png"
+        ]
+        standing_texture_path = texture_path / "slimePurple.png"
+
+        # Get the textures, shared by every enemy
+        self.walk_left_textures = TEXTURES.get_all(walking_texture_path)
+        self.walk_right_textures = TEXTURES.get_all(
+            walking_texture_path, mirrored=True
+        )
+        self.stand_left_textures = [
+            TEXTURES.get(standing_texture_path, mirrored=True)
+        ]
+        self.stand_right_textures = [TEXTURES.get(standing_texture_path)]
+
+        self.respawn(pos_x, pos_y)
+
+    def respawn(self, pos_x: float, pos_y: float) -> None:
+        """
+        Put the enemy at a spawn point in its starting state
+
+        Args:
+           pos_x (float): Spawn x position
+           pos_y (float): Spawn y position
+        """
+        self.center_x = pos_x
+        self.center_y = pos_y
+
+        # Set the enemy defaults
+        self.state = arcade.FACE_LEFT
+        self.change_x = -ENEMY_SPEED
+
+        # Set the initial texture
+        self.cur_texture_index = 0
+        self.texture = self.stand_left_textures[0]
+
+
+class EnemySystem:
+    """ Every enemy on a level, moved together in array operations. """
+    def __init__(
+        self,
+        spawns: list,
+        solid: np.ndarray,
+        tile_size: float,
+        pool=None,
+    ) -> None:
+        """
+        Create the enemies
+
+        Args:
+           spawns (list): (x, y, properties) for each enemy; a
+              "change_x" property overrides the walking speed
+           solid (np.ndarray): Bool grid of solid tiles, [row, column]
+           tile_size (float): Size of one grid cell in pixels
+           pool (SpritePool): Where to get spare Enemy sprites, if set
+        """
+        self.solid = solid
+        self.tile_size = tile_size
+
+        # Sprites are only used for drawing and exact player collisions
+        self.sprites = arcade.SpriteList()
+        for x, y, _ in spawns:
+            enemy = Enemy(x, y) if pool is None else pool.take_enemy(x, y)
+            self.sprites.append(enemy)
+
+        count = len(spawns)
+        self.x = np.array([spawn[0] for spawn in spawns], dtype=float)
+        self.y = np.array([spawn[1] for spawn in spawns], dtype=float)
+        self.change_x = np.array(
+            [
+                float(properties.get("change_x", -ENEMY_SPEED))
+                for _, _, properties in spawns
+            ],
+            dtype=float,
+        )
+
+        # Hit box extents around the center, measured once per enemy
+        self.left_extent = np.empty(count)
+        self.right_extent = np.empty(count)
+        self.bottom_extent = np.empty(count)
+        self.top_extent = np.empty(count)
+        for index, sprite in enumerate(self.sprites):
+            self.left_extent[index] = sprite.center_x - sprite.left
+            self.right_extent[index] = sprite.right - sprite.center_x
+            self.bottom_extent[index] = sprite.center_y - sprite.bottom
+            self.top_extent[index] = sprite.top - sprite.center_y
+
+        # Where each enemy started, so the level can be reset
+        self.start_x = self.x.copy()
+        self.start_change_x = self.change_x.copy()
+
+    def __len__(self) -> int:
+        return len(self.x)
+
+    def update(self, platform_boxes: np.ndarray = None) -> None:
+        """
+        Move every enemy one step, turning around at walls
+
+        Args:
+           platform_boxes (np.ndarray): Left, right, bottom and top of
+              each moving platform, which also turn enemies around
+        """
+        if not len(self.x):
+            return
+
+        self.x += self.change_x
+
+        hit = self._hits_solid()
+        if platform_boxes is not None and len(platform_boxes):
+            hit |= self._hits_boxes(platform_boxes)
+
+        # Reverse enemy motion if wall is hit
+        self.change_x[hit] *= -1
+
+    def _hits_solid(self) -> np.ndarray:
+        """ Which enemies overlap a solid tile or the map's side edges. """
+        rows, columns = self.solid.shape
+
+        # Cells covered by each hit box; touching an edge isn't overlap
+        left = np.floor((self.x - self.left_extent) / self.tile_size)
+        right = np.ceil((self.x + self.right_extent) / self.tile_size) - 1
+        bottom = np.floor((self.y - self.bottom_extent) / self.tile_size)
+        top = np.ceil((self.y + self.top_extent) / self.tile_size) - 1
+
+        # Walking off either side of the map counts as hitting a wall
+        hit = (left < 0) | (right >= columns)
+
+        left = np.clip(left, 0, columns - 1).astype(int)
+        right = np.clip(right, 0, columns - 1).astype(int)
+
+        # Hit boxes are no bigger than a tile, so the four corner cells
+        # cover everything they touch. Rows off the map are never solid.
+        for row in (bottom, top):
+            on_map = (row >= 0) & (row < rows)
+            row = np.clip(row, 0, rows - 1).astype(int)
+            hit |= on_map & (self.solid[row, left] | self.solid[row, right])
+
+        return hit
+
+    def _hits_boxes(self, boxes: np.ndarray) -> np.ndarray:
+        """ Which enemies overlap any of the boxes, one per row. """
+        # Compare every enemy (rows) with every box (columns)
+        overlap = (
+            ((self.x - self.left_extent)[:, None] < boxes[:, 1])
+            & ((self.x + self.right_extent)[:, None] > boxes[:, 0])
+            & ((self.y - self.bottom_extent)[:, None] < boxes[:, 3])
+            & ((self.y + self.top_extent)[:, None] > boxes[:, 2])
+        )
+        return overlap.any(axis=1)
+
+    def collisions(self, sprite: arcade.Sprite) -> list:
+        """
+        Find the enemies touching a sprite
+
+        Bounding boxes narrow the search down, then arcade checks the
+        hit boxes of the few enemies left.
+
+        Args:
+           sprite (arcade.Sprite): The sprite to check, usually the player
+
+        Returns:
+           list: The Enemy sprites it collides with
+        """
+        if not len(self.x):
+            return []
+
+        near = np.flatnonzero(
+            (self.x - self.left_extent < sprite.right)
+            & (self.x + self.right_extent > sprite.left)
+            & (self.y - self.bottom_extent < sprite.top)
+            & (self.y + self.top_extent > sprite.bottom)
+        )
+
+        hits = []
+        for index in near:
+            enemy = self.sprites[index]
+            enemy.center_x = self.x[index]
+            enemy.center_y = self.y[index]
+            if arcade.check_for_collision(sprite, enemy):
+                hits.append(enemy)
+        return hits
+
+    def reset(self) -> None:
+        """ Put every enemy back where it started. """
+        self.x[:] = self.start_x
+        self.change_x[:] = self.start_change_x
+
+    def sync_sprites(self, delta_time: float) -> None:
+        """
+        Copy positions to the sprites and animate them, before drawing
+
+        Args:
+           delta_time (float): How much time since the last sync
+        """
+        for index, enemy in enumerate(self.sprites):
+            enemy.center_x = self.x[index]
+            enemy.center_y = self.y[index]
+            enemy.change_x = self.change_x[index]
+        self.sprites.update_animation(delta_time)
@@ -0,0 +1,107 @@
+"""
+Arcade Platformer HUD
+
+Text drawn on top of the game. Each piece of text is rendered into a
+sprite when first drawn and only rendered again when it changes,
+instead of being rasterized from scratch every frame. Text is
+positioned in screen coordinates, so it stays put however far the
+viewport has scrolled.
+"""
+# hud.py
+
+import arcade
+
+from constants import SCREEN_HEIGHT, SCREEN_WIDTH
+
+# How far the shadow sits below and to the left of the text
+SHADOW_OFFSET = 5
+
+
+class HudText:
+    """ A piece of screen-space text, with an optional drop shadow. """
+    def __init__(
+        self,
+        text: str,
+        x: float,
+        y: float,
+        color: tuple,
+        font_size: float,
+        shadow_color: tuple = None,
+    ) -> None:
+        """
+        Set up the text; it is rendered when first drawn
+
+        Args:
+           text (str): What to show
+           x (float): Left edge, in screen coordinates
+           y (float): Baseline, in screen coordinates
+           color (tuple): RGB or RGBA color of the text
+           font_size (float): Size of the text in points
+           shadow_color (tuple): Color of the drop shadow, or None
+        """
+        self.text = None
+        self.font_size = font_size
+
+        # Drawn in order, so the shadow goes first
+        self.layers = []
+        if shadow_color is not None:
+            self.layers.append((x, y, shadow_color))
+            x += SHADOW_OFFSET
+            y += SHADOW_OFFSET
+        self.layers.append((x, y, color))
+
+        # One sprite per layer, all in one list so they draw together;
+        # None until the current text has been rendered
+        self.sprites = None
+        self.set_text(text)
+
+    def _make_sprite(self, text: str, color: tuple) -> arcade.Sprite:
+        """ Rasterize the text once into a sprite of its own. """
+        image = arcade.get_text_image(
+            text=text, text_color=color, font_size=self.font_size
+        )
+        sprite = arcade.Sprite()
+        sprite.texture = arcade.Texture(
+            f"hud:{id(self)}:{color}:{text}",
+            image=image,
+            hit_box_algorithm="None",
+        )
+        return sprite
+
+    def set_text(self, text: str) -> None:
+        """
+        Change the text, to be rendered again only if it is different
+
+        Args:
+           text (str): What to show
+        """
+        if text != self.text:
+            self.text = text
+            self.sprites = None
+
+    def draw(self) -> None:
+        """ Draw the text; call inside draw_in_screen_space(). """
+        # A fresh list, so the old textures go with the old sprites
+        if self.sprites is None:
+            self.sprites = arcade.SpriteList()
+            for x, y, color in self.layers:
+                sprite = self._make_sprite(self.text, color)
+                sprite.center_x = x + sprite.width / 2
+                sprite.center_y = y + sprite.height / 2
+                self.sprites.append(sprite)
+        self.sprites.draw()
+
+
+def draw_in_screen_space(*items) -> None:
+    """
+    Draw HUD items with the viewport reset to the screen, then put the
+    viewport back where it was
+
+    Args:
+       items: Anything with a draw() method, such as HudText
+    """
+    viewport = arcade.get_viewport()
+    arcade.set_viewport(0, SCREEN_WIDTH, 0, SCREEN_HEIGHT)
+    for item in items:
+        item.draw()
+    arcade.set_viewport(*viewport)
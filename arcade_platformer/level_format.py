@@ -0,0 +1,402 @@
+"""
+Arcade Platformer compiled level format
+
+TMX stays the authoring format, but reading it means parsing XML,
+inflating layers and decoding PNGs. This module compiles a level into
+one binary file holding everything the game needs: the decoded texture
+pixels, hit boxes, tile layers as packed integer grids and everything
+else as fixed-size records. Loading it is a handful of struct reads
+from a memory-mapped file.
+
+Compile every shipped level, writing a .lvl next to each .tmx:
+
+    python level_format.py ../assets/platform_level_*.tmx
+
+File layout, all little-endian, sections in this order:
+    header       magic b"APLV", version (H), columns (I), rows (I),
+                 tile size (f), map width (f), background color length
+                 (B) and RGBA (4B), then the number of textures (I),
+                 hit boxes (I), layers (H) and spawn points (I), and the
+                 byte length of the properties table (I)
+    textures     name length (H), name, width (H), height (H), RGBA pixels
+    hit boxes    point count (H), then x, y (d) per point
+    properties   one JSON list of property dicts
+    layers       name length (H), name, kind (B), then either
+                 grid:    tile kind count (H), kinds as texture (I),
+                          hit box (I), scale (f), then a rows x columns
+                          array (H) of kind + 1, 0 for an empty cell,
+                          bottom row first
+                 records: count (I), then one RECORD_FORMAT per sprite
+    spawns       one SPAWN_FORMAT per spawn point
+
+Positions and hit boxes are stored as doubles so a compiled level plays
+exactly like its TMX source, and recorded replays work on either.
+"""
+# level_format.py
+
+import json
+import math
+import mmap
+import pathlib
+import struct
+import sys
+
+import arcade
+import numpy as np
+from PIL import Image
+
+COMPILED_SUFFIX = ".lvl"
+LEVEL_MAGIC = b"APLV"
+LEVEL_VERSION = 1
+
+HEADER_FORMAT = struct.Struct("<4sHIIffB4BIIHII")
+TEXTURE_FORMAT = struct.Struct("<HH")
+KIND_FORMAT = struct.Struct("<IIf")
+# texture, hit box, properties, scale, center x/y, angle, change x/y,
+# boundary left/right/top/bottom (NaN when unset)
+RECORD_FORMAT = struct.Struct("<III10d")
+SPAWN_FORMAT = struct.Struct("<ddI")
+POINT_FORMAT = struct.Struct("<dd")
+SHORT_FORMAT = struct.Struct("<H")
+COUNT_FORMAT = struct.Struct("<I")
+
+# Layer kinds
+LAYER_GRID = 0
+LAYER_RECORDS = 1
+
+
+class LevelFormatError(Exception):
+    """ A compiled level file is missing, damaged or out of date. """
+
+
+def _boundary(value) -> float:
+    """ Store an unset boundary as NaN. """
+    return math.nan if value is None else float(value)
+
+
+def _unboundary(value: float):
+    """ Turn a stored NaN back into an unset boundary. """
+    return None if math.isnan(value) else value
+
+
+def _is_plain_tile(record, tile_size: float) -> bool:
+    """ Whether a record is a still, property-free tile on the grid. """
+    if (
+        record.angle
+        or record.change_x
+        or record.change_y
+        or record.properties
+        or record.boundary_left is not None
+        or record.boundary_right is not None
+        or record.boundary_top is not None
+        or record.boundary_bottom is not None
+    ):
+        return False
+    column = int(record.center_x // tile_size)
+    row = int(record.center_y // tile_size)
+    return (
+        record.center_x == (column + 0.5) * tile_size
+        and record.center_y == (row + 0.5) * tile_size
+    )
+
+
+def compile_level(level_data, path: pathlib.Path) -> pathlib.Path:
+    """
+    Write a parsed level out in the compiled format
+
+    Args:
+       level_data (LevelData): The level, as read from its TMX file
+       path (pathlib.Path): Where to write the compiled level
+
+    Returns:
+       pathlib.Path: The file written
+    """
+    path = pathlib.Path(path)
+    tile_size = level_data.tile_size
+    columns, rows = level_data.map_columns, level_data.map_rows
+
+    # Tables shared by every layer, filled in as they are first used
+    textures, texture_index = [], {}
+    hit_boxes, hit_box_index = [], {}
+    properties, properties_index = [], {}
+
+    def texture_id(texture) -> int:
+        if id(texture) not in texture_index:
+            texture_index[id(texture)] = len(textures)
+            textures.append(texture)
+        return texture_index[id(texture)]
+
+    def hit_box_id(hit_box) -> int:
+        key = tuple(tuple(point) for point in hit_box)
+        if key not in hit_box_index:
+            hit_box_index[key] = len(hit_boxes)
+            hit_boxes.append(key)
+        return hit_box_index[key]
+
+    def properties_id(values: dict) -> int:
+        key = json.dumps(values, sort_keys=True)
+        if key not in properties_index:
+            properties_index[key] = len(properties)
+            properties.append(values)
+        return properties_index[key]
+
+    layer_parts = []
+    for name, records in level_data.layers.items():
+        encoded_name = name.encode()
+        part = [SHORT_FORMAT.pack(len(encoded_name)), encoded_name]
+
+        packable = all(_is_plain_tile(record, tile_size) for record in records)
+        cells = {
+            (record.center_x // tile_size, record.center_y // tile_size)
+            for record in records
+        }
+        if packable and len(cells) == len(records):
+            # One small integer per cell, pointing at a tile kind
+            kinds, kind_index = [], {}
+            grid = np.zeros((rows, columns), dtype="<u2")
+            for record in records:
+                kind = (
+                    texture_id(record.texture),
+                    hit_box_id(record.hit_box),
+                    record.scale,
+                )
+                if kind not in kind_index:
+                    kind_index[kind] = len(kinds)
+                    kinds.append(kind)
+                row = int(record.center_y // tile_size)
+                column = int(record.center_x // tile_size)
+                grid[row, column] = kind_index[kind] + 1
+
+            part.append(bytes([LAYER_GRID]))
+            part.append(SHORT_FORMAT.pack(len(kinds)))
+            part.extend(KIND_FORMAT.pack(*kind) for kind in kinds)
+            part.append(grid.tobytes())
+        else:
+            part.append(bytes([LAYER_RECORDS]))
+            part.append(COUNT_FORMAT.pack(len(records)))
+            for record in records:
+                part.append(
+                    RECORD_FORMAT.pack(
+                        texture_id(record.texture),
+                        hit_box_id(record.hit_box),
+                        properties_id(record.properties),
+                        record.scale,
+                        record.center_x,
+                        record.center_y,
+                        record.angle,
+                        record.change_x,
+                        record.change_y,
+                        _boundary(record.boundary_left),
+                        _boundary(record.boundary_right),
+                        _boundary(record.boundary_top),
+                        _boundary(record.boundary_bottom),
+                    )
+                )
+        layer_parts.append(b"".join(part))
+
+    spawn_parts = [
+        SPAWN_FORMAT.pack(x, y, properties_id(values))
+        for x, y, values in level_data.enemy_spawns
+    ]
+
+    texture_parts = []
+    for index, texture in enumerate(textures):
+        image = texture.image.convert("RGBA")
+        encoded_name = f"{path.name}:{index}".encode()
+        texture_parts.append(SHORT_FORMAT.pack(len(encoded_name)))
+        texture_parts.append(encoded_name)
+        texture_parts.append(TEXTURE_FORMAT.pack(*image.size))
+        texture_parts.append(image.tobytes())
+
+    hit_box_parts = []
+    for hit_box in hit_boxes:
+        hit_box_parts.append(SHORT_FORMAT.pack(len(hit_box)))
+        for x, y in hit_box:
+            hit_box_parts.append(POINT_FORMAT.pack(x, y))
+
+    properties_json = json.dumps(properties).encode()
+
+    color = tuple(level_data.background_color)
+    header = HEADER_FORMAT.pack(
+        LEVEL_MAGIC,
+        LEVEL_VERSION,
+        columns,
+        rows,
+        tile_size,
+        level_data.map_width,
+        len(color),
+        *(color + (255,) * (4 - len(color))),
+        len(textures),
+        len(hit_boxes),
+        len(layer_parts),
+        len(spawn_parts),
+        len(properties_json),
+    )
+
+    path.write_bytes(
+        b"".join(
+            [header]
+            + texture_parts
+            + hit_box_parts
+            + [properties_json]
+            + layer_parts
+            + spawn_parts
+        )
+    )
+    return path
+
+
+def read_compiled(path: pathlib.Path) -> dict:
+    """
+    Read a compiled level from a memory-mapped file
+
+    Args:
+       path (pathlib.Path): The compiled level
+
+    Returns:
+       dict: The level's size, background color and spawn points, plus
+          "layers", mapping each layer name to a list of keyword
+          argument dicts for SpriteRecord
+    """
+    with open(path, "rb") as level_file, mmap.mmap(
+        level_file.fileno(), 0, access=mmap.ACCESS_READ
+    ) as data:
+        (
+            magic, version, columns, rows, tile_size, map_width,
+            color_length, red, green, blue, alpha,
+            texture_count, hit_box_count, layer_count, spawn_count,
+            properties_length,
+        ) = HEADER_FORMAT.unpack_from(data, 0)
+        if magic != LEVEL_MAGIC or version != LEVEL_VERSION:
+            raise LevelFormatError(
+                f"{path} is not a version {LEVEL_VERSION} compiled level"
+            )
+        offset = HEADER_FORMAT.size
+
+        def read_name() -> str:
+            nonlocal offset
+            (length,) = SHORT_FORMAT.unpack_from(data, offset)
+            offset += SHORT_FORMAT.size
+            name = data[offset:offset + length].decode()
+            offset += length
+            return name
+
+        # Textures come straight from the stored pixels, no PNG decoding
+        textures = []
+        for _ in range(texture_count):
+            name = read_name()
+            width, height = TEXTURE_FORMAT.unpack_from(data, offset)
+            offset += TEXTURE_FORMAT.size
+            size = width * height * 4
+            image = Image.frombytes(
+                "RGBA", (width, height), data[offset:offset + size]
+            )
+            offset += size
+            textures.append(arcade.Texture(name=name, image=image))
+
+        hit_boxes = []
+        for _ in range(hit_box_count):
+            (count,) = SHORT_FORMAT.unpack_from(data, offset)
+            offset += SHORT_FORMAT.size
+            points = struct.unpack_from(f"<{count * 2}d", data, offset)
+            offset += count * POINT_FORMAT.size
+            hit_boxes.append(list(zip(points[0::2], points[1::2])))
+
+        properties = json.loads(data[offset:offset + properties_length])
+        offset += properties_length
+
+        layers = {}
+        for _ in range(layer_count):
+            name = read_name()
+            kind = data[offset]
+            offset += 1
+
+            records = []
+            if kind == LAYER_GRID:
+                (kind_count,) = SHORT_FORMAT.unpack_from(data, offset)
+                offset += SHORT_FORMAT.size
+                kinds = []
+                for _ in range(kind_count):
+                    kinds.append(KIND_FORMAT.unpack_from(data, offset))
+                    offset += KIND_FORMAT.size
+
+                # Copied, so no view into the map outlives the file
+                grid = np.frombuffer(
+                    data, dtype="<u2", count=rows * columns, offset=offset
+                ).reshape(rows, columns).copy()
+                offset += rows * columns * 2
+
+                for row, column in zip(*np.nonzero(grid)):
+                    texture, hit_box, scale = kinds[grid[row, column] - 1]
+                    records.append({
+                        "texture": textures[texture],
+                        "hit_box": hit_boxes[hit_box],
+                        "scale": scale,
+                        "center_x": (column + 0.5) * tile_size,
+                        "center_y": (row + 0.5) * tile_size,
+                    })
+            else:
+                (count,) = COUNT_FORMAT.unpack_from(data, offset)
+                offset += COUNT_FORMAT.size
+                for values in RECORD_FORMAT.iter_unpack(
+                    data[offset:offset + count * RECORD_FORMAT.size]
+                ):
+                    records.append({
+                        "texture": textures[values[0]],
+                        "hit_box": hit_boxes[values[1]],
+                        "properties": dict(properties[values[2]]),
+                        "scale": values[3],
+                        "center_x": values[4],
+                        "center_y": values[5],
+                        "angle": values[6],
+                        "change_x": values[7],
+                        "change_y": values[8],
+                        "boundary_left": _unboundary(values[9]),
+                        "boundary_right": _unboundary(values[10]),
+                        "boundary_top": _unboundary(values[11]),
+                        "boundary_bottom": _unboundary(values[12]),
+                    })
+                offset += count * RECORD_FORMAT.size
+            layers[name] = records
+
+        spawns = []
+        for _ in range(spawn_count):
+            x, y, values = SPAWN_FORMAT.unpack_from(data, offset)
+            offset += SPAWN_FORMAT.size
+            spawns.append((x, y, dict(properties[values])))
+
+    return {
+        "columns": columns,
+        "rows": rows,
+        "tile_size": tile_size,
+        "map_width": map_width,
+        "background_color": (red, green, blue, alpha)[:color_length],
+        "layers": layers,
+        "enemy_spawns": spawns,
+    }
+
+
+def compiled_path(map_path: pathlib.Path) -> pathlib.Path:
+    """
+    Where the compiled form of a TMX map lives
+
+    Args:
+       map_path (pathlib.Path): The TMX map
+
+    Returns:
+       pathlib.Path: The .lvl file next to it
+    """
+    return pathlib.Path(map_path).with_suffix(COMPILED_SUFFIX)
+
+
+if __name__ == "__main__":
+    # Imported here, since levels imports this module
+    from levels import LevelData
+
+    for name in sys.argv[1:]:
+        tmx_path = pathlib.Path(name)
+        out_path = compile_level(LevelData(tmx_path), compiled_path(tmx_path))
+        print(
+            f"{tmx_path} -> {out_path} "
+            f"({out_path.stat().st_size / 1024:.0f} KiB)"
+        )
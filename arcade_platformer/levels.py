@@ -0,0 +1,460 @@
+"""
+Arcade Platformer level cache
+
+Reading a TMX map means parsing XML, inflating compressed layers and
+building every sprite. The cache does that once per map file and keeps
+what it learned about each sprite, so restarting or replaying a level
+only has to copy that data into new sprites.
+
+The cache can also read a map on a worker thread ahead of time, so the
+next level is ready by the time the player reaches the goal. Textures
+are only decoded there; arcade uploads them to the GPU on first draw,
+which always happens on the main thread.
+"""
+# levels.py
+
+import concurrent.futures
+import pathlib
+import threading
+import xml.etree.ElementTree as ElementTree
+
+import arcade
+import numpy as np
+
+from constants import MAP_SCALING
+from level_format import COMPILED_SUFFIX, read_compiled
+
+# Match layers to names in arcade
+BACKGROUND_LAYER = "Background"
+WALL_LAYER = "Ground"
+GOAL_LAYER = "Goal"
+LADDERS_LAYER = "Ladders"
+COIN_LAYER = "Collectibles"
+MOVING_PLATFORMS_LAYER = "Moving_Platforms"
+
+# Object layer holding enemy spawn points
+ENEMY_LAYER = "Enemies"
+
+# Every layer the game reads from a map
+LAYER_NAMES = (
+    BACKGROUND_LAYER,
+    WALL_LAYER,
+    GOAL_LAYER,
+    LADDERS_LAYER,
+    COIN_LAYER,
+    MOVING_PLATFORMS_LAYER,
+)
+
+
+class SpriteRecord:
+    """ Everything needed to rebuild one sprite from a map layer. """
+    __slots__ = (
+        "texture",
+        "scale",
+        "center_x",
+        "center_y",
+        "angle",
+        "change_x",
+        "change_y",
+        "boundary_left",
+        "boundary_right",
+        "boundary_top",
+        "boundary_bottom",
+        "hit_box",
+        "properties",
+    )
+
+    def __init__(
+        self,
+        texture: arcade.Texture,
+        center_x: float,
+        center_y: float,
+        scale: float = 1.0,
+        angle: float = 0.0,
+        change_x: float = 0.0,
+        change_y: float = 0.0,
+        boundary_left: float = None,
+        boundary_right: float = None,
+        boundary_top: float = None,
+        boundary_bottom: float = None,
+        hit_box: list = None,
+        properties: dict = None,
+    ) -> None:
+        """
+        Record the state of one sprite
+
+        Args:
+           texture (arcade.Texture): Texture shared by every copy
+           center_x (float): Starting x position
+           center_y (float): Starting y position
+           scale (float): Sprite scaling
+           angle (float): Starting rotation in degrees
+           change_x (float): Starting horizontal speed
+           change_y (float): Starting vertical speed
+           boundary_left (float): Where a moving sprite turns, if set
+           boundary_right (float): Where a moving sprite turns, if set
+           boundary_top (float): Where a moving sprite turns, if set
+           boundary_bottom (float): Where a moving sprite turns, if set
+           hit_box (list): Hit box points, or None for the texture's
+           properties (dict): Custom properties from the map
+        """
+        self.texture = texture
+        self.scale = scale
+        self.center_x = center_x
+        self.center_y = center_y
+        self.angle = angle
+        self.change_x = change_x
+        self.change_y = change_y
+        self.boundary_left = boundary_left
+        self.boundary_right = boundary_right
+        self.boundary_top = boundary_top
+        self.boundary_bottom = boundary_bottom
+        self.hit_box = hit_box
+        self.properties = dict(properties or {})
+
+    @classmethod
+    def from_sprite(cls, sprite: arcade.Sprite) -> "SpriteRecord":
+        """
+        Capture the state of a freshly loaded sprite
+
+        Args:
+           sprite (arcade.Sprite): The sprite as built by process_layer
+
+        Returns:
+           SpriteRecord: The recorded state
+        """
+        return cls(
+            texture=sprite.texture,
+            center_x=sprite.center_x,
+            center_y=sprite.center_y,
+            scale=sprite.scale,
+            angle=sprite.angle,
+            change_x=sprite.change_x,
+            change_y=sprite.change_y,
+            boundary_left=sprite.boundary_left,
+            boundary_right=sprite.boundary_right,
+            boundary_top=sprite.boundary_top,
+            boundary_bottom=sprite.boundary_bottom,
+            hit_box=sprite.get_hit_box(),
+            properties=sprite.properties,
+        )
+
+    def create_sprite(self) -> arcade.Sprite:
+        """
+        Build a new sprite in the state the map describes
+
+        Returns:
+           arcade.Sprite: A sprite sharing the recorded texture
+        """
+        sprite = arcade.Sprite(scale=self.scale)
+        sprite.texture = self.texture
+        self.reset_sprite(sprite)
+        return sprite
+
+    def reset_sprite(self, sprite: arcade.Sprite) -> None:
+        """
+        Put an existing sprite back into the state the map describes
+
+        Args:
+           sprite (arcade.Sprite): The sprite to reset
+        """
+        if self.hit_box is not None:
+            sprite.set_hit_box(self.hit_box)
+        sprite.center_x = self.center_x
+        sprite.center_y = self.center_y
+        sprite.angle = self.angle
+        sprite.change_x = self.change_x
+        sprite.change_y = self.change_y
+        sprite.boundary_left = self.boundary_left
+        sprite.boundary_right = self.boundary_right
+        sprite.boundary_top = self.boundary_top
+        sprite.boundary_bottom = self.boundary_bottom
+        # A pooled sprite may have been a collected, see-through coin
+        sprite.alpha = 255
+        # Give each sprite its own properties so changes don't leak
+        sprite.properties = dict(self.properties)
+
+
+class LevelData:
+    """ The parsed contents of one map file. """
+    def __init__(self, map_path: pathlib.Path) -> None:
+        """
+        Read the map and record every sprite in the layers we use
+
+        Args:
+           map_path (pathlib.Path): A TMX file, or a level compiled from
+              one by level_format
+        """
+        self.map_path = pathlib.Path(map_path)
+
+        if self.map_path.suffix == COMPILED_SUFFIX:
+            self._read_compiled()
+        else:
+            self._read_tmx()
+
+    def _read_tmx(self) -> None:
+        """ Fill in the level from a Tiled map. """
+        # Load the map
+        game_map = arcade.tilemap.read_tmx(str(self.map_path))
+
+        # Record each layer as built by arcade
+        self.layers = {}
+        for layer_name in LAYER_NAMES:
+            sprites = arcade.tilemap.process_layer(
+                game_map, layer_name=layer_name, scaling=MAP_SCALING
+            )
+            self.layers[layer_name] = [
+                SpriteRecord.from_sprite(sprite) for sprite in sprites
+            ]
+
+        # Remember the background color
+        self.background_color = arcade.color.FRESH_AIR
+        if game_map.background_color:
+            self.background_color = game_map.background_color
+
+        # Tile size, used to size collision grid cells
+        self.tile_size = game_map.tile_size.width * MAP_SCALING
+
+        # Map size in tiles
+        self.map_columns = game_map.map_size.width
+        self.map_rows = game_map.map_size.height
+
+        # Where enemies start
+        self.enemy_spawns = read_spawn_points(
+            self.map_path,
+            ENEMY_LAYER,
+            self.map_rows * game_map.tile_size.height,
+        )
+
+        # Find the map size to control viewport scrolling
+        self.map_width = (
+            (game_map.map_size.width - 1) * game_map.tile_size.width
+        )
+
+    def _read_compiled(self) -> None:
+        """ Fill in the level from a compiled level file. """
+        compiled = read_compiled(self.map_path)
+
+        self.layers = {
+            layer_name: [SpriteRecord(**values) for values in records]
+            for layer_name, records in compiled["layers"].items()
+        }
+        self.background_color = compiled["background_color"]
+        self.tile_size = compiled["tile_size"]
+        self.map_columns = compiled["columns"]
+        self.map_rows = compiled["rows"]
+        self.enemy_spawns = compiled["enemy_spawns"]
+        self.map_width = compiled["map_width"]
+
+    def create_layer(
+        self,
+        layer_name: str,
+        use_spatial_hash: bool = False,
+        pool=None,
+    ) -> arcade.SpriteList:
+        """
+        Build a fresh sprite list for one layer
+
+        Args:
+           layer_name (str): Which layer to build
+           use_spatial_hash (bool): Let arcade hash the list, for lists
+              the physics engine checks every frame
+           pool (SpritePool): Where to get spare sprites, if set
+
+        Returns:
+           arcade.SpriteList: Sprites as the map describes them
+        """
+        sprites = arcade.SpriteList(
+            use_spatial_hash=use_spatial_hash,
+            spatial_hash_cell_size=int(self.tile_size),
+        )
+        for record in self.layers[layer_name]:
+            if pool is None:
+                sprites.append(record.create_sprite())
+            else:
+                sprites.append(pool.take(record))
+        return sprites
+
+    def tile_grid(self, layer_name: str) -> np.ndarray:
+        """
+        Mark which map cells hold a tile from a layer
+
+        Args:
+           layer_name (str): Which layer to look at
+
+        Returns:
+           np.ndarray: A bool array indexed [row, column], with row 0 at
+              the bottom of the map to match arcade's coordinates
+        """
+        grid = np.zeros((self.map_rows, self.map_columns), dtype=bool)
+        for record in self.layers[layer_name]:
+            column = int(record.center_x // self.tile_size)
+            row = int(record.center_y // self.tile_size)
+            if 0 <= row < self.map_rows and 0 <= column < self.map_columns:
+                grid[row, column] = True
+        return grid
+
+
+def read_spawn_points(
+    map_path: pathlib.Path, layer_name: str, map_height: float
+) -> list:
+    """
+    Read the objects of a TMX object layer as spawn points
+
+    arcade only turns tile objects into sprites, so plain point and
+    rectangle objects are read straight from the XML.
+
+    Args:
+       map_path (pathlib.Path): Which TMX file to read
+       layer_name (str): Name of the object layer
+       map_height (float): Unscaled height of the map in pixels, to flip y
+
+    Returns:
+       list: (x, y, properties) for each object, in arcade coordinates
+    """
+    spawns = []
+    root = ElementTree.parse(str(map_path)).getroot()
+    for group in root.iter("objectgroup"):
+        if group.get("name") != layer_name:
+            continue
+        for tiled_object in group.iter("object"):
+            properties = {
+                prop.get("name"): prop.get("value")
+                for prop in tiled_object.iter("property")
+            }
+            x = float(tiled_object.get("x", 0)) * MAP_SCALING
+            y = (map_height - float(tiled_object.get("y", 0))) * MAP_SCALING
+            spawns.append((x, y, properties))
+    return spawns
+
+
+class LevelCache:
+    """ Keeps parsed maps around, keyed by path and modification time. """
+    def __init__(self) -> None:
+        self.levels = {}
+
+        # Maps being read in the background, keyed like self.levels
+        self.pending = {}
+
+        # The worker thread is only started when first needed
+        self.executor = None
+        self.lock = threading.Lock()
+
+    def load(self, map_path: pathlib.Path) -> LevelData:
+        """
+        Get the parsed map, reading it only if it is new or has changed
+
+        If the map is being prefetched, wait for that instead of reading
+        it a second time; if the prefetch failed, read it here, so the
+        error raised is this thread's own.
+
+        Args:
+           map_path (pathlib.Path): Which TMX file to load
+
+        Returns:
+           LevelData: The parsed map
+        """
+        key = self._key(map_path)
+
+        with self.lock:
+            level_data = self.levels.get(key)
+            future = self.pending.get(key)
+
+        if level_data is not None:
+            return level_data
+
+        if future is not None:
+            # Usually already finished, so this doesn't block
+            try:
+                return future.result()
+            except Exception:
+                pass
+
+        level_data = LevelData(key[0])
+        self._store(key, level_data)
+        return level_data
+
+    def prefetch(self, map_path: pathlib.Path) -> None:
+        """
+        Start reading a map on the worker thread, if it isn't cached
+
+        Missing files are ignored, so callers can prefetch a level that
+        may not exist.
+
+        Args:
+           map_path (pathlib.Path): Which TMX file to read
+        """
+        if not pathlib.Path(map_path).exists():
+            return
+
+        key = self._key(map_path)
+
+        with self.lock:
+            if key in self.levels or key in self.pending:
+                return
+            if self.executor is None:
+                self.executor = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=1, thread_name_prefix="level-prefetch"
+                )
+            self.pending[key] = self.executor.submit(self._read, key)
+
+    def is_ready(self, map_path: pathlib.Path) -> bool:
+        """
+        Check whether loading a map will be instant
+
+        Args:
+           map_path (pathlib.Path): Which TMX file to check
+
+        Returns:
+           bool: True if the map is parsed and cached
+        """
+        key = self._key(map_path)
+        with self.lock:
+            return key in self.levels
+
+    def discard(self, map_path: pathlib.Path) -> None:
+        """
+        Forget every cached copy of a map
+
+        Args:
+           map_path (pathlib.Path): Which TMX file to forget
+        """
+        map_path = pathlib.Path(map_path).resolve()
+        with self.lock:
+            for key in [key for key in self.levels if key[0] == map_path]:
+                del self.levels[key]
+
+    def clear(self) -> None:
+        """ Forget every cached map. """
+        with self.lock:
+            self.levels.clear()
+
+    def _key(self, map_path: pathlib.Path) -> tuple:
+        """ Cache key for a map: its full path and modification time. """
+        map_path = pathlib.Path(map_path).resolve()
+        return (map_path, map_path.stat().st_mtime_ns)
+
+    def _read(self, key: tuple) -> LevelData:
+        """ Worker thread body: parse one map and store it. """
+        try:
+            level_data = LevelData(key[0])
+        except Exception:
+            # Let load() read it again itself, whether it is already
+            # waiting on this read or comes later
+            with self.lock:
+                self.pending.pop(key, None)
+            raise
+        self._store(key, level_data)
+        return level_data
+
+    def _store(self, key: tuple, level_data: LevelData) -> None:
+        """ Cache a parsed map, replacing any stale copy of the file. """
+        with self.lock:
+            for old_key in [k for k in self.levels if k[0] == key[0]]:
+                del self.levels[old_key]
+            self.levels[key] = level_data
+            self.pending.pop(key, None)
+
+
+# One cache shared by every simulation in the process
+LEVEL_CACHE = LevelCache()
@@ -0,0 +1,878 @@
+"""
+Arcade Platformer navigation graph
+
+Where can the player get to on a map? A NavGraph answers that from the
+Ground and Ladders layers and the player's own size and physics. Each
+node is a grid cell the player can stand in: on top of a solid tile, or
+on a ladder. Nodes are joined by walking to a neighbor, climbing a
+ladder, and by jumps and falls, which are found by flying the player's
+hit box along the arc PLAYER_JUMP_SPEED, PLAYER_MOVE_SPEED and GRAVITY
+give it, one simulation step at a time, and seeing where it lands.
+Moving platforms and enemies are not part of the graph.
+
+Building the graph takes a while on a big map, so it is saved next to
+the map as a .nav file and only rebuilt when the map or the physics
+change. Path queries run off distance fields: the first query toward a
+goal spreads out from it once, and from then on any number of agents
+heading there look up their next node in one array operation.
+
+The same graph checks levels, reporting coins and goals the player can
+never reach:
+
+    python navigation.py ../assets/platform_level_*.tmx
+
+File layout, all little-endian:
+    header   magic b"APNV", version (H), map modification time (Q),
+             jump speed, move speed, gravity, tile size, player width
+             and player height (6d), then columns, rows, nodes, edges
+             and touched cells (5I)
+    nodes    column, row (2i) per node
+    edges    offsets (i, nodes + 1), targets (i), costs in steps (f),
+             kinds (B)
+    touched  offsets (i, nodes + 1), then column, row (2i) per cell
+"""
+# navigation.py
+
+import argparse
+import collections
+import heapq
+import math
+import pathlib
+import struct
+import sys
+import time
+
+import numpy as np
+
+from constants import (
+    GRAVITY,
+    PLAYER_JUMP_SPEED,
+    PLAYER_MOVE_SPEED,
+    PLAYER_START_X,
+    PLAYER_START_Y,
+)
+from levels import (
+    COIN_LAYER,
+    GOAL_LAYER,
+    LADDERS_LAYER,
+    LEVEL_CACHE,
+    WALL_LAYER,
+)
+
+NAV_SUFFIX = ".nav"
+NAV_MAGIC = b"APNV"
+NAV_VERSION = 1
+
+HEADER_FORMAT = struct.Struct("<4sHQ6d5I")
+
+# How edges get from one node to the next
+EDGE_WALK = 0
+EDGE_CLIMB = 1
+EDGE_JUMP = 2
+EDGE_FALL = 3
+
+# Longest flight followed, in steps, before giving up on a landing
+MAX_AIR_STEPS = 600
+
+# How many goals keep their distance field around
+FIELD_CACHE_SIZE = 64
+
+
+class NavGraph:
+    """ Standing places on a map, and the moves between them. """
+    def __init__(
+        self,
+        columns: int,
+        rows: int,
+        tile_size: float,
+        node_cells: np.ndarray,
+        offsets: np.ndarray,
+        targets: np.ndarray,
+        costs: np.ndarray,
+        kinds: np.ndarray,
+        touch_offsets: np.ndarray,
+        touch_cells: np.ndarray,
+    ) -> None:
+        """
+        Wrap the arrays of a built or loaded graph
+
+        Args:
+           columns (int): Map width in tiles
+           rows (int): Map height in tiles
+           tile_size (float): Size of one tile in pixels
+           node_cells (np.ndarray): Column and row of each node, (n, 2)
+           offsets (np.ndarray): Where each node's edges start, n + 1
+           targets (np.ndarray): The node each edge leads to
+           costs (np.ndarray): Steps each edge takes
+           kinds (np.ndarray): EDGE_* of each edge
+           touch_offsets (np.ndarray): Where each node's touched cells
+              start, n + 1
+           touch_cells (np.ndarray): Cells the player's hit box passes
+              through on the moves out of each node, (t, 2)
+        """
+        self.columns = columns
+        self.rows = rows
+        self.tile_size = tile_size
+        self.node_cells = node_cells
+        self.offsets = offsets
+        self.targets = targets
+        self.costs = costs
+        self.kinds = kinds
+        self.touch_offsets = touch_offsets
+        self.touch_cells = touch_cells
+
+        # The node standing in each cell, or -1, indexed [row, column]
+        self.cell_nodes = np.full((rows, columns), -1, dtype=np.int32)
+        self.cell_nodes[node_cells[:, 1], node_cells[:, 0]] = np.arange(
+            len(node_cells), dtype=np.int32
+        )
+
+        # Edges again, grouped by the node they lead to, for spreading
+        # distance fields back out from a goal
+        sources = np.repeat(
+            np.arange(len(node_cells), dtype=np.int32), np.diff(offsets)
+        )
+        order = np.argsort(targets, kind="stable")
+        self.reverse_sources = sources[order]
+        self.reverse_costs = costs[order]
+        self.reverse_offsets = np.zeros(len(node_cells) + 1, dtype=np.int32)
+        np.cumsum(
+            np.bincount(targets, minlength=len(node_cells)),
+            out=self.reverse_offsets[1:],
+        )
+
+        # Distance fields by goal node, least recently used first
+        self.fields = collections.OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self.node_cells)
+
+    def node_at(self, x: float, y: float) -> int:
+        """
+        Find the node the player is standing in
+
+        Args:
+           x (float): Center x of the player
+           y (float): Bottom of the player
+
+        Returns:
+           int: The node, or -1 if the player isn't standing anywhere
+        """
+        column = int(x // self.tile_size)
+        row = int(y // self.tile_size)
+        if 0 <= column < self.columns and 0 <= row < self.rows:
+            return int(self.cell_nodes[row, column])
+        return -1
+
+    def nodes_at(self, positions: np.ndarray) -> np.ndarray:
+        """
+        Find the nodes many agents are standing in
+
+        Args:
+           positions (np.ndarray): Center x and bottom y of each agent,
+              shape (agents, 2)
+
+        Returns:
+           np.ndarray: Each agent's node, or -1
+        """
+        cells = np.floor_divide(positions, self.tile_size).astype(np.int64)
+        columns, rows = cells[:, 0], cells[:, 1]
+        inside = (
+            (columns >= 0)
+            & (columns < self.columns)
+            & (rows >= 0)
+            & (rows < self.rows)
+        )
+        nodes = np.full(len(positions), -1, dtype=np.int32)
+        nodes[inside] = self.cell_nodes[rows[inside], columns[inside]]
+        return nodes
+
+    def node_position(self, node: int) -> tuple:
+        """
+        Where the player stands in a node
+
+        Args:
+           node (int): The node
+
+        Returns:
+           tuple: Center x and bottom y of the node's cell
+        """
+        column, row = self.node_cells[node]
+        return (column + 0.5) * self.tile_size, row * self.tile_size
+
+    def field(self, goal: int) -> tuple:
+        """
+        Get the distance field toward a goal, building it on first use
+
+        Args:
+           goal (int): The node to head for
+
+        Returns:
+           tuple: Steps from each node to the goal (inf if it can't get
+              there), and the node to move to next (-1 if none)
+        """
+        field = self.fields.get(goal)
+        if field is not None:
+            self.fields.move_to_end(goal)
+            return field
+
+        count = len(self.node_cells)
+        distance = np.full(count, np.inf)
+        next_node = np.full(count, -1, dtype=np.int32)
+        distance[goal] = 0.0
+        next_node[goal] = goal
+
+        # Dijkstra over the edges backwards, out from the goal
+        queue = [(0.0, goal)]
+        while queue:
+            steps, node = heapq.heappop(queue)
+            if steps > distance[node]:
+                continue
+            start = self.reverse_offsets[node]
+            end = self.reverse_offsets[node + 1]
+            for source, cost in zip(
+                self.reverse_sources[start:end], self.reverse_costs[start:end]
+            ):
+                total = steps + cost
+                if total < distance[source]:
+                    distance[source] = total
+                    next_node[source] = node
+                    heapq.heappush(queue, (total, int(source)))
+
+        field = (distance, next_node)
+        self.fields[goal] = field
+        if len(self.fields) > FIELD_CACHE_SIZE:
+            self.fields.popitem(last=False)
+        return field
+
+    def next_nodes(self, nodes: np.ndarray, goal: int) -> np.ndarray:
+        """
+        Find where many agents should head next to reach a goal
+
+        Args:
+           nodes (np.ndarray): The node each agent is in, or -1
+           goal (int): The node they are all heading for
+
+        Returns:
+           np.ndarray: The next node for each agent, or -1 if it is not
+              on the graph or can't reach the goal
+        """
+        _, next_node = self.field(goal)
+        nodes = np.asarray(nodes)
+        result = np.full(len(nodes), -1, dtype=np.int32)
+        on_graph = nodes >= 0
+        result[on_graph] = next_node[nodes[on_graph]]
+        return result
+
+    def path(self, start: int, goal: int) -> list:
+        """
+        Find the quickest way from one node to another
+
+        Args:
+           start (int): Where to set off from
+           goal (int): Where to get to
+
+        Returns:
+           list: The nodes along the way, start and goal included, or
+              an empty list if the goal can't be reached
+        """
+        distance, next_node = self.field(goal)
+        if math.isinf(distance[start]):
+            return []
+        path = [start]
+        while path[-1] != goal:
+            path.append(int(next_node[path[-1]]))
+        return path
+
+    def reachable(self, start: int) -> np.ndarray:
+        """
+        Find every node that can be reached from a node
+
+        Args:
+           start (int): Where to set off from
+
+        Returns:
+           np.ndarray: A bool per node
+        """
+        seen = np.zeros(len(self.node_cells), dtype=bool)
+        seen[start] = True
+        stack = [start]
+        while stack:
+            node = stack.pop()
+            for target in self.targets[
+                self.offsets[node]:self.offsets[node + 1]
+            ]:
+                if not seen[target]:
+                    seen[target] = True
+                    stack.append(int(target))
+        return seen
+
+    def touched_cells(self, nodes: np.ndarray) -> set:
+        """
+        Gather the cells the player can touch from some nodes
+
+        Args:
+           nodes (np.ndarray): A bool per node, such as from reachable()
+
+        Returns:
+           set: (column, row) of every cell touched
+        """
+        touched = set()
+        for node in np.flatnonzero(nodes):
+            start = self.touch_offsets[node]
+            end = self.touch_offsets[node + 1]
+            touched.update(map(tuple, self.touch_cells[start:end].tolist()))
+        return touched
+
+    def save(
+        self, path: pathlib.Path, source_mtime: int, physics: tuple
+    ) -> pathlib.Path:
+        """
+        Write the graph to a .nav file
+
+        Args:
+           path (pathlib.Path): Where to write
+           source_mtime (int): Modification time of the map, in ns
+           physics (tuple): Jump speed, move speed, gravity, player
+              width and player height the graph was built with
+
+        Returns:
+           pathlib.Path: The file written
+        """
+        path = pathlib.Path(path)
+        jump, move, gravity, width, height = physics
+        with open(path, "wb") as nav_file:
+            nav_file.write(
+                HEADER_FORMAT.pack(
+                    NAV_MAGIC,
+                    NAV_VERSION,
+                    source_mtime,
+                    jump,
+                    move,
+                    gravity,
+                    self.tile_size,
+                    width,
+                    height,
+                    self.columns,
+                    self.rows,
+                    len(self.node_cells),
+                    len(self.targets),
+                    len(self.touch_cells),
+                )
+            )
+            for array, dtype in (
+                (self.node_cells, "<i4"),
+                (self.offsets, "<i4"),
+                (self.targets, "<i4"),
+                (self.costs, "<f4"),
+                (self.kinds, "u1"),
+                (self.touch_offsets, "<i4"),
+                (self.touch_cells, "<i4"),
+            ):
+                nav_file.write(np.ascontiguousarray(array, dtype).tobytes())
+        return path
+
+    @classmethod
+    def read(
+        cls, path: pathlib.Path, source_mtime: int, physics: tuple
+    ) -> "NavGraph":
+        """
+        Read a .nav file, if it matches the map and physics
+
+        Args:
+           path (pathlib.Path): The file to read
+           source_mtime (int): Modification time of the map, in ns
+           physics (tuple): As passed to save()
+
+        Returns:
+           NavGraph: The graph, or None if the file is missing or was
+              built from another version of the map or physics
+        """
+        try:
+            data = pathlib.Path(path).read_bytes()
+        except FileNotFoundError:
+            return None
+        if len(data) < HEADER_FORMAT.size:
+            return None
+
+        header = HEADER_FORMAT.unpack_from(data)
+        (magic, version, mtime, jump, move, gravity, tile_size, width,
+         height, columns, rows, nodes, edges, touches) = header
+        if (
+            magic != NAV_MAGIC
+            or version != NAV_VERSION
+            or mtime != source_mtime
+            or (jump, move, gravity, width, height) != tuple(physics)
+        ):
+            return None
+
+        offset = HEADER_FORMAT.size
+
+        def take(dtype: str, count: int) -> np.ndarray:
+            """ The next array in the file, copied out of it. """
+            nonlocal offset
+            array = np.frombuffer(data, dtype, count, offset)
+            offset += array.nbytes
+            return array.copy()
+
+        node_cells = take("<i4", nodes * 2).reshape(nodes, 2)
+        offsets = take("<i4", nodes + 1)
+        targets = take("<i4", edges)
+        costs = take("<f4", edges)
+        kinds = take("u1", edges)
+        touch_offsets = take("<i4", nodes + 1)
+        touch_cells = take("<i4", touches * 2).reshape(touches, 2)
+        return cls(
+            columns, rows, tile_size, node_cells, offsets, targets, costs,
+            kinds, touch_offsets, touch_cells,
+        )
+
+
+class _GraphBuilder:
+    """ Finds the nodes and moves of a map by flying the player around. """
+    def __init__(
+        self,
+        solid: np.ndarray,
+        ladders: np.ndarray,
+        tile_size: float,
+        player_width: float,
+        player_height: float,
+    ) -> None:
+        self.solid = solid
+        self.ladders = ladders
+        self.rows, self.columns = solid.shape
+        self.tile_size = tile_size
+        self.half_width = player_width / 2
+        self.height = player_height
+
+        # Rows the player's hit box covers when standing in a cell
+        self.body_rows = max(1, math.ceil(player_height / tile_size))
+
+    def is_solid(self, column: int, row: int) -> bool:
+        """ Solid tiles, with the map's sides as walls. """
+        if column < 0 or column >= self.columns:
+            return True
+        if row < 0 or row >= self.rows:
+            return False
+        return bool(self.solid[row, column])
+
+    def is_ladder(self, column: int, row: int) -> bool:
+        """ Ladder tiles; there are none off the map. """
+        return (
+            0 <= column < self.columns
+            and 0 <= row < self.rows
+            and bool(self.ladders[row, column])
+        )
+
+    def body_cells(self, x: float, y: float) -> list:
+        """ The cells a hit box with its bottom center at x, y overlaps. """
+        size = self.tile_size
+        first_column = int((x - self.half_width) // size)
+        last_column = int(math.ceil((x + self.half_width) / size)) - 1
+        first_row = int(y // size)
+        last_row = int(math.ceil((y + self.height) / size)) - 1
+        return [
+            (column, row)
+            for column in range(first_column, last_column + 1)
+            for row in range(first_row, last_row + 1)
+        ]
+
+    def blocked(self, x: float, y: float) -> bool:
+        """ Whether a hit box with its bottom center at x, y hits a wall. """
+        return any(
+            self.is_solid(column, row)
+            for column, row in self.body_cells(x, y)
+        )
+
+    def fits(self, column: int, row: int) -> bool:
+        """ Whether the player fits standing in a cell. """
+        return not any(
+            self.is_solid(column, row + offset)
+            for offset in range(self.body_rows)
+        )
+
+    def on_ladder(self, column: int, row: int) -> bool:
+        """ Whether standing in a cell touches a ladder. """
+        return any(
+            self.is_ladder(column, row + offset)
+            for offset in range(-1, self.body_rows)
+        )
+
+    def supported(self, column: int, row: int) -> bool:
+        """ Whether there is ground under a cell. """
+        return row > 0 and self.is_solid(column, row - 1)
+
+    def fly(
+        self,
+        x: float,
+        y: float,
+        change_y: float,
+        direction: int,
+        target_x: float,
+        from_apex: bool,
+        touched: set,
+    ) -> tuple:
+        """
+        Follow the player through the air as the physics engine would
+
+        Args:
+           x (float): Starting center x
+           y (float): Starting bottom y
+           change_y (float): Starting vertical speed
+           direction (int): -1, 0 or 1, which way to steer
+           target_x (float): Stop steering once here; None to keep on
+           from_apex (bool): Only start steering once falling
+           touched (set): Gets every cell the hit box passes through
+
+        Returns:
+           tuple: The cell landed in and the steps taken, or None if the
+              player falls off the map
+        """
+        size = self.tile_size
+        steering = direction != 0 and not from_apex
+
+        for step in range(1, MAX_AIR_STEPS + 1):
+            # Gravity, then vertical movement first
+            change_y -= GRAVITY
+            y += change_y
+            if self.blocked(x, y):
+                if change_y > 0:
+                    # Bumped a ceiling: back out below it and fall
+                    y = math.floor((y + self.height) / size) * size
+                    y -= self.height + 1
+                    change_y = 0.0
+                else:
+                    # Landed on top of the tile underneath
+                    row = int(y // size) + 1
+                    return (int(x // size), row), step
+
+            if from_apex and direction and change_y <= 0:
+                steering = True
+
+            # Then horizontal movement
+            if steering:
+                new_x = x + direction * PLAYER_MOVE_SPEED
+                past = target_x is not None and (
+                    (new_x - target_x) * direction >= 0
+                )
+                if past:
+                    new_x = target_x
+                    steering = False
+                if self.blocked(new_x, y):
+                    steering = False
+                else:
+                    x = new_x
+
+            touched.update(self.body_cells(x, y))
+            if y + self.height < 0:
+                return None
+        return None
+
+    def build(self) -> NavGraph:
+        """ Find every node and move. """
+        size = self.tile_size
+        walk_cost = size / PLAYER_MOVE_SPEED
+
+        # Nodes: cells the player fits in, on the ground or a ladder
+        cells = [
+            (column, row)
+            for row in range(self.rows)
+            for column in range(self.columns)
+            if self.fits(column, row)
+            and (self.supported(column, row) or self.on_ladder(column, row))
+        ]
+        index = {cell: node for node, cell in enumerate(cells)}
+
+        # Farthest a jump can carry the player sideways, in tiles
+        airtime = 2 * PLAYER_JUMP_SPEED / GRAVITY
+        jump_columns = math.ceil(airtime * PLAYER_MOVE_SPEED / size) + 1
+
+        edges = []
+        touches = []
+        for node, (column, row) in enumerate(cells):
+            moves = {}
+            touched = set(self.body_cells((column + 0.5) * size, row * size))
+
+            def add(target: tuple, cost: float, kind: int) -> None:
+                target_node = index.get(target)
+                if target_node is None or target_node == node:
+                    return
+                old = moves.get(target_node)
+                if old is None or cost < old[0]:
+                    moves[target_node] = (cost, kind)
+
+            # Walking to either side, and climbing up and down ladders
+            for step in (-1, 1):
+                add((column + step, row), walk_cost, EDGE_WALK)
+                if self.on_ladder(column, row) or self.on_ladder(
+                    column, row + step
+                ):
+                    add((column, row + step), walk_cost, EDGE_CLIMB)
+
+            x = (column + 0.5) * size
+            y = row * size
+
+            # Jumps, steering early or late toward each column in reach
+            if self.supported(column, row):
+                flights = [(0, None, False)]
+                for direction in (-1, 1):
+                    for reach in range(1, jump_columns + 1):
+                        target_x = x + direction * reach * size
+                        flights.append((direction, target_x, False))
+                        flights.append((direction, target_x, True))
+                    flights.append((direction, None, False))
+                for direction, target_x, from_apex in flights:
+                    landing = self.fly(
+                        x, y, PLAYER_JUMP_SPEED, direction, target_x,
+                        from_apex, touched,
+                    )
+                    if landing is not None:
+                        add(landing[0], landing[1], EDGE_JUMP)
+
+            # Walking off an edge, then steering while falling
+            for direction in (-1, 1):
+                side = column + direction
+                if not self.fits(side, row) or (side, row) in index:
+                    continue
+                side_x = (side + 0.5) * size
+                for reach in list(range(0, jump_columns + 1)) + [None]:
+                    target_x = (
+                        None if reach is None
+                        else side_x + direction * reach * size
+                    )
+                    landing = self.fly(
+                        side_x, y, 0.0, direction if reach != 0 else 0,
+                        target_x, False, touched,
+                    )
+                    if landing is not None:
+                        add(
+                            landing[0], walk_cost + landing[1], EDGE_FALL
+                        )
+
+            edges.append(sorted(moves.items()))
+            touches.append(sorted(touched))
+
+        offsets = np.zeros(len(cells) + 1, dtype=np.int32)
+        np.cumsum([len(moves) for moves in edges], out=offsets[1:])
+        touch_offsets = np.zeros(len(cells) + 1, dtype=np.int32)
+        np.cumsum([len(cells) for cells in touches], out=touch_offsets[1:])
+
+        return NavGraph(
+            columns=self.columns,
+            rows=self.rows,
+            tile_size=size,
+            node_cells=np.array(cells, dtype=np.int32).reshape(-1, 2),
+            offsets=offsets,
+            targets=np.array(
+                [target for moves in edges for target, _ in moves],
+                dtype=np.int32,
+            ),
+            costs=np.array(
+                [cost for moves in edges for _, (cost, _) in moves],
+                dtype=np.float32,
+            ),
+            kinds=np.array(
+                [kind for moves in edges for _, (_, kind) in moves],
+                dtype=np.uint8,
+            ),
+            touch_offsets=touch_offsets,
+            touch_cells=np.array(
+                [cell for cells in touches for cell in cells],
+                dtype=np.int32,
+            ).reshape(-1, 2),
+        )
+
+
+def player_size() -> tuple:
+    """
+    Measure the player's hit box
+
+    Returns:
+       tuple: Width and height in pixels
+    """
+    # Imported here, since the simulation needs a whole level to import
+    from simulation import create_player_sprite
+
+    player = create_player_sprite()
+    return player.right - player.left, player.top - player.bottom
+
+
+def nav_path(map_path: pathlib.Path) -> pathlib.Path:
+    """
+    Where the navigation graph of a map is cached
+
+    Args:
+       map_path (pathlib.Path): The map
+
+    Returns:
+       pathlib.Path: The .nav file next to it
+    """
+    return pathlib.Path(map_path).with_suffix(NAV_SUFFIX)
+
+
+def load_graph(map_path: pathlib.Path) -> NavGraph:
+    """
+    Get a map's navigation graph, building and caching it if needed
+
+    Args:
+       map_path (pathlib.Path): A TMX file or a compiled level
+
+    Returns:
+       NavGraph: The graph
+    """
+    map_path = pathlib.Path(map_path)
+    mtime = map_path.stat().st_mtime_ns
+    width, height = player_size()
+    physics = (
+        float(PLAYER_JUMP_SPEED),
+        float(PLAYER_MOVE_SPEED),
+        float(GRAVITY),
+        float(width),
+        float(height),
+    )
+
+    graph = NavGraph.read(nav_path(map_path), mtime, physics)
+    if graph is None:
+        level_data = LEVEL_CACHE.load(map_path)
+        graph = _GraphBuilder(
+            level_data.tile_grid(WALL_LAYER),
+            level_data.tile_grid(LADDERS_LAYER),
+            level_data.tile_size,
+            width,
+            height,
+        ).build()
+        graph.save(nav_path(map_path), mtime, physics)
+    return graph
+
+
+def validate(map_path: pathlib.Path) -> dict:
+    """
+    Check that every coin and the goal of a map can be reached
+
+    Args:
+       map_path (pathlib.Path): A TMX file or a compiled level
+
+    Returns:
+       dict: Graph size, how long it took to get, whether the start is
+          on the graph, and the coins and goals that can't be reached
+    """
+    start_time = time.perf_counter()
+    graph = load_graph(map_path)
+    load_time = time.perf_counter() - start_time
+
+    level_data = LEVEL_CACHE.load(map_path)
+    size = level_data.tile_size
+
+    # A start inside the ground is pushed up out of it, as arcade's
+    # overlap check does, and one in the air drops onto what is below
+    _, height = player_size()
+    walls = level_data.tile_grid(WALL_LAYER)
+    column = int(PLAYER_START_X // size)
+    row = min(int((PLAYER_START_Y - height / 2) // size), graph.rows - 1)
+    while 0 <= row < graph.rows - 1 and walls[row, column]:
+        row += 1
+    while row >= 0 and graph.cell_nodes[row, column] < 0:
+        row -= 1
+    start = int(graph.cell_nodes[row, column]) if row >= 0 else -1
+
+    touched = set()
+    if start >= 0:
+        touched = graph.touched_cells(graph.reachable(start))
+
+    def unreachable(layer_name: str) -> list:
+        return [
+            (record.center_x, record.center_y)
+            for record in level_data.layers[layer_name]
+            if (
+                int(record.center_x // size),
+                int(record.center_y // size),
+            ) not in touched
+        ]
+
+    return {
+        "nodes": len(graph),
+        "edges": len(graph.targets),
+        "load_ms": load_time * 1000,
+        "start_on_graph": start >= 0,
+        "unreachable_coins": unreachable(COIN_LAYER),
+        "unreachable_goals": unreachable(GOAL_LAYER),
+    }
+
+
+def bench_agents(map_path: pathlib.Path, agents: int, seed: int = 0) -> dict:
+    """
+    Time next-node queries for many agents heading for one goal
+
+    Args:
+       map_path (pathlib.Path): The map
+       agents (int): How many agents to query for at once
+       seed (int): Seed for where the agents and the goal are
+
+    Returns:
+       dict: Time to build the goal's field and per batch query
+    """
+    graph = load_graph(map_path)
+    rng = np.random.default_rng(seed)
+    goal = int(rng.integers(len(graph)))
+    nodes = rng.integers(len(graph), size=agents)
+    positions = np.array([graph.node_position(node) for node in nodes])
+
+    start = time.perf_counter()
+    graph.field(goal)
+    field_time = time.perf_counter() - start
+
+    repeat = 100
+    start = time.perf_counter()
+    for _ in range(repeat):
+        graph.next_nodes(graph.nodes_at(positions), goal)
+    query_time = (time.perf_counter() - start) / repeat
+
+    return {"field_ms": field_time * 1000, "query_ms": query_time * 1000}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("maps", nargs="+", type=pathlib.Path)
+    parser.add_argument(
+        "--agents",
+        type=int,
+        default=0,
+        help="also time path queries for this many agents",
+    )
+    args = parser.parse_args()
+
+    failures = 0
+    for map_path in args.maps:
+        # A map that won't load fails, but the rest are still checked
+        try:
+            report = validate(map_path)
+        except Exception as exc:
+            failures += 1
+            print(f"{map_path}: FAIL ({type(exc).__name__}: {exc})")
+            continue
+        problems = (
+            not report["start_on_graph"]
+            or report["unreachable_coins"]
+            or report["unreachable_goals"]
+        )
+        failures += bool(problems)
+        print(
+            f"{map_path}: {'FAIL' if problems else 'ok'} "
+            f"({report['nodes']} nodes, {report['edges']} edges, "
+            f"{report['load_ms']:.0f} ms)"
+        )
+        if not report["start_on_graph"]:
+            print("  the start is not on the graph")
+        for x, y in report["unreachable_coins"]:
+            print(f"  unreachable coin at ({x:.0f}, {y:.0f})")
+        for x, y in report["unreachable_goals"]:
+            print(f"  unreachable goal at ({x:.0f}, {y:.0f})")
+        if args.agents:
+            timing = bench_agents(map_path, args.agents)
+            print(
+                f"  {args.agents} agents: "
+                f"field {timing['field_ms']:.2f} ms, "
+                f"query {timing['query_ms']:.3f} ms"
+            )
+
+    sys.exit(1 if failures else 0)
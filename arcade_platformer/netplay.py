@@ -0,0 +1,854 @@
+"""
+Arcade Platformer network play
+
+An authoritative, headless server for several players on one level. The
+server owns the only simulation: clients send it their input, and it
+sends each of them snapshots of the game at SNAPSHOT_RATE. A snapshot
+only holds what changed since the last one that client was sent: the
+players that moved, the coins that came or went, the enemies and
+platforms that moved. Messages are packed binary over TCP, which
+delivers every snapshot in order, so each client's last snapshot is a
+safe baseline for the next.
+
+Players share the coins, enemies and moving platforms. Coins are scored
+by whoever touches them first, an enemy only sends the player it hits
+back to the start, and reaching the goal takes everyone to the next
+level.
+
+Run a server and some simulated clients over localhost and report the
+bandwidth per client and the time per server tick:
+
+    python netplay.py --clients 8 --seconds 10
+
+or serve real clients:
+
+    python netplay.py --serve --port 5000
+
+Messages are framed by a length (I) and start with a type (B). All are
+little-endian:
+    welcome   client id (H), snapshot rate (H)
+    input     move x and move y as -127 to 127 (2b), jump (B)
+    snapshot  tick (I), level (H), flags (B); for a full snapshot, the
+              coin, enemy and platform counts (3H); then
+              players:   count (B), then per player an id (H), a mask
+                         (B) of the fields that follow: x, y, change x
+                         and change y (f each), score (I); then a
+                         count (B) and ids (H) of players who left
+              coins:     count (H), indices (H) of coins that came or
+                         went
+              enemies:   count (H), indices (H), x positions (f)
+              platforms: count (H), indices (H), x and y positions (2f)
+"""
+# netplay.py
+
+import argparse
+import asyncio
+import random
+import struct
+import time
+
+import numpy as np
+
+from batch import policy_random
+from constants import (
+    GRAVITY,
+    PLAYER_JUMP_SPEED,
+    PLAYER_MOVE_SPEED,
+    PLAYER_START_X,
+    PLAYER_START_Y,
+    UPDATE_RATE,
+)
+from levels import LADDERS_LAYER, WALL_LAYER, LevelData
+from physics import GridPhysicsEngine, TileBoxes
+from simulation import (
+    EVENT_COIN,
+    EVENT_DEATH,
+    EVENT_JUMP,
+    EVENT_LEVEL_COMPLETE,
+    PHYSICS_GRID,
+    PlatformerSimulation,
+    create_player_sprite,
+    level_map_path,
+)
+
+# Snapshots sent per second; the simulation still steps at UPDATE_RATE
+SNAPSHOT_RATE = 20
+
+# Drop a client that has this many bytes waiting to be sent to it
+MAX_BUFFERED = 1024 * 1024
+
+# Message types
+MESSAGE_WELCOME = 1
+MESSAGE_INPUT = 2
+MESSAGE_SNAPSHOT = 3
+
+# Snapshot flags
+FLAG_FULL = 1
+
+# Player field mask bits, in the order the fields are sent
+FIELD_X = 1
+FIELD_Y = 2
+FIELD_CHANGE_X = 4
+FIELD_CHANGE_Y = 8
+FIELD_SCORE = 16
+FIELD_ALL = 31
+
+LENGTH_FORMAT = struct.Struct("<I")
+TYPE_FORMAT = struct.Struct("<B")
+WELCOME_FORMAT = struct.Struct("<BHH")
+INPUT_FORMAT = struct.Struct("<BbbB")
+SNAPSHOT_FORMAT = struct.Struct("<BIHB")
+COUNTS_FORMAT = struct.Struct("<HHH")
+PLAYER_FORMAT = struct.Struct("<HB")
+BYTE_FORMAT = struct.Struct("<B")
+SHORT_FORMAT = struct.Struct("<H")
+FLOAT_FORMAT = struct.Struct("<f")
+SCORE_FORMAT = struct.Struct("<I")
+
+
+class SharedSimulation(PlatformerSimulation):
+    """ One level played by several players at once. """
+    def __init__(self, level: int = 1) -> None:
+        """
+        Create the simulation, with no players yet
+
+        Args:
+           level (int): Which level to start on
+        """
+        super().__init__(level=level, physics=PHYSICS_GRID)
+
+        # Players, their physics, input, climbing input last applied
+        # and score, by client id
+        self.players = {}
+        self.engines = {}
+        self.inputs = {}
+        self.climbs = {}
+        self.scores = {}
+
+        # The level's tiles, shared by every player's physics
+        self.wall_boxes = None
+        self.ladder_boxes = None
+
+    def add_player(self, client_id: int) -> None:
+        """
+        Put a new player at the start
+
+        Args:
+           client_id (int): The client playing it
+        """
+        player = create_player_sprite()
+        self.players[client_id] = player
+        self.scores[client_id] = 0
+        self.reset_one(client_id)
+        if self.wall_boxes is not None:
+            self.engines[client_id] = self._create_engine(player)
+
+    def remove_player(self, client_id: int) -> None:
+        """
+        Take a player out of the game
+
+        Args:
+           client_id (int): The client that left
+        """
+        for table in (
+            self.players, self.engines, self.inputs, self.climbs, self.scores
+        ):
+            table.pop(client_id, None)
+
+    def set_player_input(
+        self, client_id: int, move_x: float, move_y: float, jump: bool
+    ) -> None:
+        """
+        Sets one player's input, kept until the next input arrives
+
+        A jump waits until a step uses it, like a single player's.
+
+        Args:
+           client_id (int): Whose input it is
+           move_x (float): Horizontal movement, -1.0 to 1.0
+           move_y (float): Climbing movement, -1.0 to 1.0
+           jump (bool): Whether the player wants to jump
+        """
+        if client_id in self.players:
+            pending = self.inputs[client_id][2]
+            self.inputs[client_id] = (move_x, move_y, jump or pending)
+
+    def reset_one(self, client_id: int) -> None:
+        """ Puts one player at the start, with no input pending """
+        player = self.players[client_id]
+        player.center_x = PLAYER_START_X
+        player.center_y = PLAYER_START_Y
+        player.change_x = 0
+        player.change_y = 0
+        self.inputs[client_id] = (0.0, 0.0, False)
+        self.climbs[client_id] = 0.0
+
+    def reset_player(self) -> None:
+        """ Puts every player at the start """
+        for client_id in self.players:
+            self.reset_one(client_id)
+        self.accumulator = 0.0
+
+    def create_physics_engine(self, level_data: LevelData) -> None:
+        """
+        Files the level's tiles and gives every player an engine
+
+        Args:
+           level_data (LevelData): The parsed map
+        """
+        self.wall_boxes = TileBoxes(
+            level_data.layers[WALL_LAYER], level_data.tile_size
+        )
+        self.ladder_boxes = TileBoxes(
+            level_data.layers[LADDERS_LAYER], level_data.tile_size
+        )
+        self.engines = {
+            client_id: self._create_engine(player)
+            for client_id, player in self.players.items()
+        }
+
+    def _create_engine(self, player) -> GridPhysicsEngine:
+        """ A physics engine for one player on the current level. """
+        return GridPhysicsEngine(
+            player_sprite=player,
+            walls=self.wall_boxes,
+            ladders=self.ladder_boxes,
+            platforms=self.platform_system,
+            gravity_constant=GRAVITY,
+        )
+
+    def step(self) -> list:
+        """
+        Advances every player and the level by one fixed time step
+
+        Returns:
+           list: (event, client id) for each event this step
+        """
+        events = []
+        self.tick += 1
+
+        # Apply each player's input
+        for client_id, player in self.players.items():
+            move_x, move_y, jump = self.inputs[client_id]
+            engine = self.engines[client_id]
+            player.change_x = move_x * PLAYER_MOVE_SPEED
+            if move_y != self.climbs[client_id]:
+                self.climbs[client_id] = move_y
+                if engine.is_on_ladder():
+                    player.change_y = move_y * PLAYER_MOVE_SPEED
+            if jump:
+                self.inputs[client_id] = (move_x, move_y, False)
+                if engine.can_jump():
+                    player.change_y = PLAYER_JUMP_SPEED
+                    events.append((EVENT_JUMP, client_id))
+
+        with self.profiler.section("enemies"):
+            self.enemy_system.update(self.platform_system.boxes)
+
+        with self.profiler.section("physics"):
+            for engine in self.engines.values():
+                engine.update()
+
+        with self.profiler.section("platforms"):
+            self.platform_system.update(*self.players.values())
+
+        goal_hit = False
+        with self.profiler.section("collisions"):
+            for client_id, player in self.players.items():
+                # Prevent players from walking off screen
+                if player.left < 0:
+                    player.left = 0
+
+                for coin in self.coin_grid.collisions(player):
+                    self.scores[client_id] += int(
+                        coin.properties["point_value"]
+                    )
+                    self.set_coin_alive(self.coin_index[id(coin)], False)
+                    events.append((EVENT_COIN, client_id))
+
+                # An enemy only sends back the player it hits
+                if self.enemy_system.collisions(player):
+                    self.reset_one(client_id)
+                    events.append((EVENT_DEATH, client_id))
+
+                if self.goal_grid.collisions(player):
+                    goal_hit = True
+                    events.append((EVENT_LEVEL_COMPLETE, client_id))
+
+        if goal_hit:
+            # Everyone moves on; after the last level, start over
+            self.level += 1
+            self.map_path = None
+            if not level_map_path(self.level).exists():
+                self.level = 1
+            self.setup()
+            self.transition_times.append(self.last_setup_time)
+
+        return events
+
+    def net_state(self) -> dict:
+        """
+        Captures what clients are sent, as the values they receive
+
+        Returns:
+           dict: Level, players, coin bits, enemy and platform positions
+        """
+        players = {}
+        for client_id, player in self.players.items():
+            players[client_id] = (
+                tuple(
+                    np.float32(value) for value in (
+                        player.center_x,
+                        player.center_y,
+                        player.change_x,
+                        player.change_y,
+                    )
+                ),
+                self.scores[client_id],
+            )
+        return {
+            "level": self.level,
+            "players": players,
+            "coins": self.coins_alive.copy(),
+            "enemies": self.enemy_system.x.astype(np.float32),
+            "platforms": np.stack(
+                (self.platform_system.x, self.platform_system.y), axis=1
+            ).astype(np.float32),
+        }
+
+
+def _same_shape(before: dict, after: dict) -> bool:
+    """ Whether a delta from one state to another can be sent. """
+    return (
+        before is not None
+        and before["level"] == after["level"]
+        and len(before["coins"]) == len(after["coins"])
+        and len(before["enemies"]) == len(after["enemies"])
+        and len(before["platforms"]) == len(after["platforms"])
+    )
+
+
+def encode_snapshot(tick: int, before: dict, after: dict) -> bytes:
+    """
+    Pack what changed between two states
+
+    Args:
+       tick (int): The server tick the state is from
+       before (dict): The state the client has, or None for a full
+          snapshot
+       after (dict): The current state, from net_state()
+
+    Returns:
+       bytes: The snapshot message
+    """
+    full = not _same_shape(before, after)
+    if full:
+        # Against an empty level: every coin there, nothing placed yet
+        before = {
+            "players": {},
+            "coins": np.ones(len(after["coins"]), dtype=bool),
+            "enemies": np.full(len(after["enemies"]), np.nan, np.float32),
+            "platforms": np.full(after["platforms"].shape, np.nan, np.float32),
+        }
+
+    parts = [
+        SNAPSHOT_FORMAT.pack(
+            MESSAGE_SNAPSHOT, tick, after["level"], FLAG_FULL if full else 0
+        )
+    ]
+    if full:
+        parts.append(
+            COUNTS_FORMAT.pack(
+                len(after["coins"]),
+                len(after["enemies"]),
+                len(after["platforms"]),
+            )
+        )
+
+    # Players: only the fields that changed
+    changed = []
+    for client_id, (values, score) in after["players"].items():
+        old = before["players"].get(client_id)
+        mask = FIELD_ALL
+        if old is not None:
+            mask = sum(
+                bit for bit, new, was in zip(
+                    (FIELD_X, FIELD_Y, FIELD_CHANGE_X, FIELD_CHANGE_Y),
+                    values,
+                    old[0],
+                )
+                if new != was
+            )
+            if score != old[1]:
+                mask |= FIELD_SCORE
+        if mask:
+            changed.append((client_id, mask, values, score))
+
+    parts.append(BYTE_FORMAT.pack(len(changed)))
+    for client_id, mask, values, score in changed:
+        parts.append(PLAYER_FORMAT.pack(client_id, mask))
+        for bit, value in zip(
+            (FIELD_X, FIELD_Y, FIELD_CHANGE_X, FIELD_CHANGE_Y), values
+        ):
+            if mask & bit:
+                parts.append(FLOAT_FORMAT.pack(value))
+        if mask & FIELD_SCORE:
+            parts.append(SCORE_FORMAT.pack(score))
+
+    left = [
+        client_id for client_id in before["players"]
+        if client_id not in after["players"]
+    ]
+    parts.append(BYTE_FORMAT.pack(len(left)))
+    parts.extend(SHORT_FORMAT.pack(client_id) for client_id in left)
+
+    # Coins that came or went
+    toggled = np.flatnonzero(before["coins"] != after["coins"])
+    parts.append(SHORT_FORMAT.pack(len(toggled)))
+    parts.append(toggled.astype("<u2").tobytes())
+
+    # Enemies and platforms that moved
+    moved = np.flatnonzero(before["enemies"] != after["enemies"])
+    parts.append(SHORT_FORMAT.pack(len(moved)))
+    parts.append(moved.astype("<u2").tobytes())
+    parts.append(after["enemies"][moved].astype("<f4").tobytes())
+
+    moved = np.flatnonzero(
+        (before["platforms"] != after["platforms"]).any(axis=1)
+    )
+    parts.append(SHORT_FORMAT.pack(len(moved)))
+    parts.append(moved.astype("<u2").tobytes())
+    parts.append(after["platforms"][moved].astype("<f4").tobytes())
+
+    return b"".join(parts)
+
+
+def apply_snapshot(state: dict, message: bytes) -> dict:
+    """
+    Bring a client's copy of the state up to date from a snapshot
+
+    Args:
+       state (dict): The client's state, or None before the first
+       message (bytes): A snapshot from encode_snapshot()
+
+    Returns:
+       dict: The updated state, laid out like net_state()
+    """
+    _, tick, level, flags = SNAPSHOT_FORMAT.unpack_from(message)
+    offset = SNAPSHOT_FORMAT.size
+
+    if flags & FLAG_FULL:
+        coins, enemies, platforms = COUNTS_FORMAT.unpack_from(message, offset)
+        offset += COUNTS_FORMAT.size
+        state = {
+            "players": {},
+            "coins": np.ones(coins, dtype=bool),
+            "enemies": np.full(enemies, np.nan, np.float32),
+            "platforms": np.full((platforms, 2), np.nan, np.float32),
+        }
+    state["level"] = level
+    state["tick"] = tick
+
+    (count,) = BYTE_FORMAT.unpack_from(message, offset)
+    offset += BYTE_FORMAT.size
+    for _ in range(count):
+        client_id, mask = PLAYER_FORMAT.unpack_from(message, offset)
+        offset += PLAYER_FORMAT.size
+        values, score = state["players"].get(
+            client_id, ((np.float32(0),) * 4, 0)
+        )
+        values = list(values)
+        for index, bit in enumerate(
+            (FIELD_X, FIELD_Y, FIELD_CHANGE_X, FIELD_CHANGE_Y)
+        ):
+            if mask & bit:
+                (value,) = FLOAT_FORMAT.unpack_from(message, offset)
+                offset += FLOAT_FORMAT.size
+                values[index] = np.float32(value)
+        if mask & FIELD_SCORE:
+            (score,) = SCORE_FORMAT.unpack_from(message, offset)
+            offset += SCORE_FORMAT.size
+        state["players"][client_id] = (tuple(values), score)
+
+    (count,) = BYTE_FORMAT.unpack_from(message, offset)
+    offset += BYTE_FORMAT.size
+    for _ in range(count):
+        (client_id,) = SHORT_FORMAT.unpack_from(message, offset)
+        offset += SHORT_FORMAT.size
+        state["players"].pop(client_id, None)
+
+    def read_indices() -> np.ndarray:
+        """ A count and that many indices. """
+        nonlocal offset
+        (count,) = SHORT_FORMAT.unpack_from(message, offset)
+        offset += SHORT_FORMAT.size
+        indices = np.frombuffer(message, "<u2", count, offset).astype(int)
+        offset += count * 2
+        return indices
+
+    def read_floats(count: int) -> np.ndarray:
+        """ That many float32 values. """
+        nonlocal offset
+        values = np.frombuffer(message, "<f4", count, offset)
+        offset += count * 4
+        return values
+
+    toggled = read_indices()
+    state["coins"][toggled] = ~state["coins"][toggled]
+
+    moved = read_indices()
+    state["enemies"][moved] = read_floats(len(moved))
+
+    moved = read_indices()
+    state["platforms"][moved] = read_floats(len(moved) * 2).reshape(-1, 2)
+
+    return state
+
+
+def same_state(first: dict, second: dict) -> bool:
+    """
+    Check two states match, such as a client's and what it was sent
+
+    Args:
+       first (dict): One state, laid out like net_state()
+       second (dict): The other
+
+    Returns:
+       bool: True if every sent value is equal
+    """
+    return (
+        first["level"] == second["level"]
+        and first["players"] == second["players"]
+        and np.array_equal(first["coins"], second["coins"])
+        and np.array_equal(first["enemies"], second["enemies"])
+        and np.array_equal(first["platforms"], second["platforms"])
+    )
+
+
+def frame(message: bytes) -> bytes:
+    """ Prefix a message with its length. """
+    return LENGTH_FORMAT.pack(len(message)) + message
+
+
+async def read_message(reader: asyncio.StreamReader) -> bytes:
+    """
+    Read one framed message
+
+    Args:
+       reader (asyncio.StreamReader): Where to read from
+
+    Returns:
+       bytes: The message, without its length
+    """
+    header = await reader.readexactly(LENGTH_FORMAT.size)
+    (length,) = LENGTH_FORMAT.unpack(header)
+    return await reader.readexactly(length)
+
+
+class ClientConnection:
+    """ The server's side of one client. """
+    def __init__(self, client_id: int, writer: asyncio.StreamWriter) -> None:
+        self.client_id = client_id
+        self.writer = writer
+
+        # The state this client was last sent, the base of its deltas
+        self.baseline = None
+
+        # Traffic both ways, framing included
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.snapshots = 0
+
+    def send(self, message: bytes) -> None:
+        """ Queue a message without waiting for it to go out. """
+        data = frame(message)
+        self.writer.write(data)
+        self.bytes_sent += len(data)
+
+
+class GameServer:
+    """ Runs the shared simulation and keeps every client up to date. """
+    def __init__(
+        self,
+        level: int = 1,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        snapshot_rate: int = SNAPSHOT_RATE,
+    ) -> None:
+        """
+        Create the server, not yet listening
+
+        Args:
+           level (int): Which level to play
+           host (str): Address to listen on
+           port (int): Port to listen on; 0 picks a free one
+           snapshot_rate (int): Snapshots sent per second
+        """
+        self.host = host
+        self.port = port
+        self.snapshot_rate = snapshot_rate
+        self.steps_per_snapshot = max(
+            1, round(1 / (UPDATE_RATE * snapshot_rate))
+        )
+
+        self.simulation = SharedSimulation(level)
+        self.simulation.setup()
+
+        self.clients = {}
+        self.next_id = 1
+        self.server = None
+
+        # Seconds each tick took: stepping plus sending snapshots
+        self.tick_times = []
+
+        # Every client that ever connected, for the report
+        self.finished = []
+
+    async def start(self) -> int:
+        """
+        Start listening
+
+        Returns:
+           int: The port clients should connect to
+        """
+        self.server = await asyncio.start_server(
+            self._serve_client, self.host, self.port
+        )
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self.port
+
+    async def _serve_client(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        """ Welcome a client, then take its input until it leaves. """
+        client = ClientConnection(self.next_id, writer)
+        self.next_id += 1
+        self.clients[client.client_id] = client
+        self.simulation.add_player(client.client_id)
+        client.send(
+            WELCOME_FORMAT.pack(
+                MESSAGE_WELCOME, client.client_id, self.snapshot_rate
+            )
+        )
+
+        try:
+            while True:
+                message = await read_message(reader)
+                client.bytes_received += LENGTH_FORMAT.size + len(message)
+                if message[0] == MESSAGE_INPUT:
+                    _, move_x, move_y, jump = INPUT_FORMAT.unpack(message)
+                    self.simulation.set_player_input(
+                        client.client_id,
+                        move_x / 127,
+                        move_y / 127,
+                        bool(jump),
+                    )
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self._drop(client)
+
+    def _drop(self, client: ClientConnection) -> None:
+        """ Forget a client that left or fell behind. """
+        if self.clients.pop(client.client_id, None) is None:
+            return
+        self.simulation.remove_player(client.client_id)
+        self.finished.append(client)
+        client.writer.close()
+
+    def broadcast(self) -> None:
+        """ Send every client what changed since its last snapshot. """
+        state = self.simulation.net_state()
+        for client in list(self.clients.values()):
+            transport = client.writer.transport
+            if transport.get_write_buffer_size() > MAX_BUFFERED:
+                # Too far behind to catch up; let it reconnect
+                self._drop(client)
+                continue
+            client.send(
+                encode_snapshot(self.simulation.tick, client.baseline, state)
+            )
+            client.baseline = state
+            client.snapshots += 1
+
+    async def run(self, seconds: float = None) -> None:
+        """
+        Step the simulation at a fixed rate, sending snapshots
+
+        Args:
+           seconds (float): How long to run; forever if None
+        """
+        loop = asyncio.get_running_loop()
+        next_tick = loop.time()
+        end = None if seconds is None else next_tick + seconds
+
+        while end is None or next_tick < end:
+            start = time.perf_counter()
+            if self.clients:
+                self.simulation.step()
+                if self.simulation.tick % self.steps_per_snapshot == 0:
+                    self.broadcast()
+            self.tick_times.append(time.perf_counter() - start)
+
+            next_tick += UPDATE_RATE
+            await asyncio.sleep(max(0.0, next_tick - loop.time()))
+
+    async def close(self) -> None:
+        """ Stop listening and let every client go. """
+        for client in list(self.clients.values()):
+            self._drop(client)
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+
+
+class SimulatedClient:
+    """ A headless client playing random input and mirroring the game. """
+    def __init__(self, seed: int = 0) -> None:
+        """
+        Create the client
+
+        Args:
+           seed (int): Seed for its input
+        """
+        self.rng = random.Random(seed)
+        self.client_id = None
+        self.state = None
+
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.snapshots = 0
+
+    async def run(self, host: str, port: int, seconds: float) -> None:
+        """
+        Connect and play until the time is up
+
+        Input is sent after each snapshot, as a game would each frame.
+
+        Args:
+           host (str): The server's address
+           port (int): The server's port
+           seconds (float): How long to play
+        """
+        reader, writer = await asyncio.open_connection(host, port)
+        loop = asyncio.get_running_loop()
+        end = loop.time() + seconds
+
+        try:
+            while loop.time() < end:
+                try:
+                    message = await asyncio.wait_for(
+                        read_message(reader), end - loop.time()
+                    )
+                except asyncio.TimeoutError:
+                    break
+                self.bytes_received += LENGTH_FORMAT.size + len(message)
+
+                if message[0] == MESSAGE_WELCOME:
+                    _, self.client_id, _ = WELCOME_FORMAT.unpack(message)
+                elif message[0] == MESSAGE_SNAPSHOT:
+                    self.state = apply_snapshot(self.state, message)
+                    self.snapshots += 1
+
+                    move_x, move_y, jump = policy_random(None, self.rng)
+                    data = frame(
+                        INPUT_FORMAT.pack(
+                            MESSAGE_INPUT,
+                            round(move_x * 127),
+                            round(move_y * 127),
+                            jump,
+                        )
+                    )
+                    writer.write(data)
+                    self.bytes_sent += len(data)
+                    await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+
+async def run_local(clients: int, seconds: float, level: int = 1) -> dict:
+    """
+    Play a server and simulated clients against each other over localhost
+
+    Args:
+       clients (int): How many clients to connect
+       seconds (float): How long to play
+       level (int): Which level to play
+
+    Returns:
+       dict: Server tick times, bandwidth per client, and whether every
+          client's copy of the game matched what it was sent
+    """
+    server = GameServer(level)
+    port = await server.start()
+    server_task = asyncio.ensure_future(server.run())
+
+    players = [SimulatedClient(seed) for seed in range(clients)]
+    await asyncio.gather(
+        *(player.run(server.host, port, seconds) for player in players)
+    )
+
+    # Let the server notice the clients leaving, then stop it
+    await asyncio.sleep(0.1)
+    server_task.cancel()
+    await server.close()
+
+    baselines = {
+        client.client_id: client.baseline for client in server.finished
+    }
+    in_sync = all(
+        player.state is not None
+        and same_state(player.state, baselines[player.client_id])
+        for player in players
+    )
+
+    ticks = sorted(server.tick_times)
+    return {
+        "clients": clients,
+        "ticks": len(ticks),
+        "tick_ms_mean": sum(ticks) / len(ticks) * 1000,
+        "tick_ms_p99": ticks[int(len(ticks) * 0.99)] * 1000,
+        "snapshots_per_client": sum(p.snapshots for p in players) / clients,
+        "down_bytes_per_second": (
+            sum(p.bytes_received for p in players) / clients / seconds
+        ),
+        "up_bytes_per_second": (
+            sum(p.bytes_sent for p in players) / clients / seconds
+        ),
+        "in_sync": in_sync,
+    }
+
+
+async def serve(level: int, host: str, port: int) -> None:
+    """ Run a server until interrupted. """
+    server = GameServer(level, host, port)
+    port = await server.start()
+    print(f"serving level {level} on {host}:{port}")
+    try:
+        await server.run()
+    finally:
+        await server.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--level", type=int, default=1)
+    parser.add_argument("--clients", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument(
+        "--serve", action="store_true", help="serve real clients"
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5000)
+    args = parser.parse_args()
+
+    if args.serve:
+        asyncio.run(serve(args.level, args.host, args.port))
+    else:
+        results = asyncio.run(
+            run_local(args.clients, args.seconds, args.level)
+        )
+        for name, value in results.items():
+            print(f"{name}: {value}")
@@ -0,0 +1,485 @@
+"""
+Arcade Platformer grid physics
+
+arcade's PhysicsEnginePlatformer tests the player against every nearby
+wall sprite polygon by polygon, through shapely. GridPhysicsEngine does
+the same job against the map's Ground and Ladders layers filed by grid
+cell: a collision check only looks at the handful of cells under the
+player, most tiles are plain boxes, and the few that aren't, such as
+slopes, are checked edge by edge against the player's hit box. Moving
+platforms are checked against the boxes the MovingPlatformSystem keeps.
+
+It keeps the same interface (update, can_jump, is_on_ladder) and moves
+the player exactly as arcade 2.5 does, step for step: find a clear spot
+if the player starts inside something, fall unless on a ladder, move
+vertically then horizontally, count only real overlap as colliding,
+drop out of ceilings a pixel at a time and rise out of floors a
+quarter pixel at a time, and halve the horizontal distance in whole
+pixels, stepping up low ledges on the way. Moving the platforms, and
+the player riding them, is left to the MovingPlatformSystem.
+"""
+# physics.py
+
+import functools
+import math
+
+import arcade
+import numpy as np
+
+from platforms import MovingPlatformSystem
+
+
+class TileBoxes:
+    """ The bounding boxes of a layer's tiles, filed by grid cell. """
+    def __init__(self, records: list, tile_size: float) -> None:
+        """
+        File each tile's hit box under its cell
+
+        Args:
+           records (list): SpriteRecords of the layer's tiles
+           tile_size (float): Size of one grid cell in pixels
+        """
+        self.tile_size = tile_size
+
+        # (column, row): (left, right, bottom, top), in map pixels; a
+        # tile that isn't a rectangle adds its points and _edge_axes()
+        self.cells = {}
+
+        self.add(records)
+
+    def add(
+        self, records: list, offset_x: float = 0.0, offset_y: float = 0.0
+    ) -> list:
+        """
+        File more tiles, such as a map region streamed in
+
+        Args:
+           records (list): SpriteRecords of the tiles
+           offset_x (float): Added to each tile's x position
+           offset_y (float): Added to each tile's y position
+
+        Returns:
+           list: The cells filed, to hand to remove() later
+        """
+        tile_size = self.tile_size
+        keys = []
+
+        for record in records:
+            center_x = record.center_x + offset_x
+            center_y = record.center_y + offset_y
+            if record.hit_box:
+                points = tuple(
+                    (center_x + x * record.scale, center_y + y * record.scale)
+                    for x, y in record.hit_box
+                )
+            else:
+                half = tile_size / 2
+                points = (
+                    (center_x - half, center_y - half),
+                    (center_x + half, center_y - half),
+                    (center_x + half, center_y + half),
+                    (center_x - half, center_y + half),
+                )
+            xs = [x for x, _ in points]
+            ys = [y for _, y in points]
+            box = (min(xs), max(xs), min(ys), max(ys))
+
+            # Slopes and other shapes keep their slanted edges
+            axes = _edge_axes(points)
+            if axes:
+                box += (points, axes)
+
+            key = (int(center_x // tile_size), int(center_y // tile_size))
+            keys.append(key)
+            # Tiles sharing a cell are merged into one box
+            old = self.cells.get(key)
+            if old is not None:
+                box = (
+                    min(old[0], box[0]),
+                    max(old[1], box[1]),
+                    min(old[2], box[2]),
+                    max(old[3], box[3]),
+                )
+            self.cells[key] = box
+
+        return keys
+
+    def remove(self, keys: list) -> None:
+        """
+        Forget the tiles filed under some cells
+
+        Args:
+           keys (list): Cells returned by add()
+        """
+        for key in keys:
+            self.cells.pop(key, None)
+
+    def hits(
+        self, left: float, right: float, bottom: float, top: float
+    ) -> list:
+        """
+        Find the tile boxes overlapping a box
+
+        Boxes that only share an edge don't overlap, as in arcade.
+
+        Args:
+           left (float): Left edge of the box
+           right (float): Right edge of the box
+           bottom (float): Bottom edge of the box
+           top (float): Top edge of the box
+
+        Returns:
+           list: The box of each tile hit, as filed in cells
+        """
+        size = self.tile_size
+        cells = self.cells
+
+        # One extra cell each way, for tiles wider than their cell
+        first_column = int(left // size) - 1
+        last_column = int(right // size) + 1
+        first_row = int(bottom // size) - 1
+        last_row = int(top // size) + 1
+
+        found = []
+        for column in range(first_column, last_column + 1):
+            for row in range(first_row, last_row + 1):
+                box = cells.get((column, row))
+                if (
+                    box is not None
+                    and box[0] < right
+                    and left < box[1]
+                    and box[2] < top
+                    and bottom < box[3]
+                ):
+                    found.append(box)
+        return found
+
+
+def _edge_axes(points: tuple) -> tuple:
+    """
+    Find the axes a polygon's slanted edges could separate it along
+
+    Args:
+       points (tuple): The polygon's points, in order
+
+    Returns:
+       tuple: (normal x, normal y, lowest, highest) for each edge that
+          runs along neither x nor y, with the polygon's extent along
+          that normal; empty for a rectangle
+    """
+    axes = []
+    for (x1, y1), (x2, y2) in zip(points, points[1:] + points[:1]):
+        normal_x = y1 - y2
+        normal_y = x2 - x1
+        # Sides along x or y are already covered by the bounding box
+        if not normal_x or not normal_y:
+            continue
+        spans = [x * normal_x + y * normal_y for x, y in points]
+        axes.append((normal_x, normal_y, min(spans), max(spans)))
+    return tuple(axes)
+
+
+@functools.lru_cache(maxsize=64)
+def _polygon_shape(points: tuple) -> tuple:
+    """
+    Measure a hit box polygon once for overlap tests
+
+    Args:
+       points (tuple): The polygon's points, around its center
+
+    Returns:
+       tuple: How far it reaches left, right, down and up, then its
+          points and _edge_axes()
+    """
+    xs = [x for x, _ in points]
+    ys = [y for _, y in points]
+    return (
+        -min(xs), max(xs), -min(ys), max(ys), points, _edge_axes(points)
+    )
+
+
+def _overlaps(shape: tuple, x: float, y: float, box: tuple) -> bool:
+    """
+    Check a polygon against a tile
+
+    Both are convex, so they overlap unless their bounding boxes or one
+    of their slanted edges separate them. Sharing only an edge or a
+    corner doesn't count, as in arcade.
+
+    Args:
+       shape (tuple): The polygon, from _polygon_shape()
+       x (float): Where the polygon's center is
+       y (float): Where the polygon's center is
+       box (tuple): The tile, as filed in TileBoxes
+
+    Returns:
+       bool: True if they overlap
+    """
+    if not (
+        box[0] < x + shape[1]
+        and x - shape[0] < box[1]
+        and box[2] < y + shape[3]
+        and y - shape[2] < box[3]
+    ):
+        return False
+
+    if len(box) > 4:
+        corners = box[4]
+    else:
+        corners = (
+            (box[0], box[2]), (box[1], box[2]),
+            (box[1], box[3]), (box[0], box[3]),
+        )
+
+    for normal_x, normal_y, lowest, highest in shape[5]:
+        offset = x * normal_x + y * normal_y
+        spans = [
+            corner_x * normal_x + corner_y * normal_y
+            for corner_x, corner_y in corners
+        ]
+        if max(spans) <= lowest + offset or highest + offset <= min(spans):
+            return False
+
+    if len(box) > 4:
+        for normal_x, normal_y, lowest, highest in box[5]:
+            spans = [
+                (point_x + x) * normal_x + (point_y + y) * normal_y
+                for point_x, point_y in shape[4]
+            ]
+            if max(spans) <= lowest or highest <= min(spans):
+                return False
+    return True
+
+
+class GridPhysicsEngine:
+    """ Player physics against tile grids, with sprite moving platforms. """
+    def __init__(
+        self,
+        player_sprite: arcade.Sprite,
+        walls: TileBoxes,
+        ladders: TileBoxes,
+        platforms: MovingPlatformSystem,
+        gravity_constant: float,
+    ) -> None:
+        """
+        Create the engine
+
+        Args:
+           player_sprite (arcade.Sprite): The sprite to move
+           walls (TileBoxes): The Ground layer
+           ladders (TileBoxes): The Ladders layer
+           platforms (MovingPlatformSystem): The moving platforms
+           gravity_constant (float): Downward acceleration per step
+        """
+        self.player_sprite = player_sprite
+        self.walls = walls
+        self.ladders = ladders
+        self.platforms = platforms
+        self.gravity_constant = gravity_constant
+
+    def _shape(self) -> tuple:
+        """
+        The player's hit box, measured from its center
+
+        Returns:
+           tuple: How far it reaches left, right, down and up, then the
+              edge axes of its polygon, for _hits()
+        """
+        player = self.player_sprite
+        points = tuple(
+            (x * player.scale, y * player.scale) for x, y in player.hit_box
+        )
+        return _polygon_shape(points)
+
+    def _hits(self, x: float, y: float, shape: tuple) -> list:
+        """
+        Find everything the player would overlap at a position
+
+        Returns:
+           list: (left, right, bottom, top) of each platform hit, then
+              of each tile hit
+        """
+        left = x - shape[0]
+        right = x + shape[1]
+        bottom = y - shape[2]
+        top = y + shape[3]
+
+        found = []
+        if len(self.platforms):
+            boxes = self.platforms.boxes
+            touching = np.flatnonzero(
+                (boxes[:, 0] < right)
+                & (left < boxes[:, 1])
+                & (boxes[:, 2] < top)
+                & (bottom < boxes[:, 3])
+            )
+            found.extend(tuple(boxes[index]) for index in touching)
+        found.extend(self.walls.hits(left, right, bottom, top))
+
+        # Boxes that only reach a cut corner of the hit box don't count
+        return [box for box in found if _overlaps(shape, x, y, box)]
+
+    def is_on_ladder(self) -> bool:
+        """
+        Check whether the player is touching a ladder
+
+        Returns:
+           bool: True if any ladder tile touches the player
+        """
+        # Like arcade, don't look at the hit box with no ladders about;
+        # a sprite keeps the hit box of its texture when first asked
+        if not self.ladders.cells:
+            return False
+
+        player = self.player_sprite
+        shape = self._shape()
+        x = player.center_x
+        y = player.center_y
+        return any(
+            _overlaps(shape, x, y, box)
+            for box in self.ladders.hits(
+                x - shape[0], x + shape[1], y - shape[2], y + shape[3]
+            )
+        )
+
+    def can_jump(self, y_distance: float = 5) -> bool:
+        """
+        Check whether there is ground just below the player
+
+        Args:
+           y_distance (float): How far below to look
+
+        Returns:
+           bool: True if the player is standing on something
+        """
+        player = self.player_sprite
+        return bool(
+            self._hits(
+                player.center_x,
+                player.center_y - y_distance,
+                self._shape(),
+            )
+        )
+
+    def update(self) -> None:
+        """ Moves the player one step """
+        player = self.player_sprite
+
+        # Add gravity if we aren't on a ladder
+        if not self.is_on_ladder():
+            player.change_y -= self.gravity_constant
+
+        shape = self._shape()
+        x = player.center_x
+        y = player.center_y
+
+        # Starting inside something, such as a platform that moved into
+        # the player, first find the nearest clear spot
+        if self._hits(x, y, shape):
+            x, y = self._circular_check(x, y, shape)
+        start_x = x
+        start_y = y
+
+        # Vertical movement first
+        y += player.change_y
+        hits = self._hits(x, y, shape)
+        if hits:
+            if player.change_y > 0:
+                # Drop a pixel at a time until clear of every ceiling,
+                # ignoring tiles wholly below where the move started
+                bottom = start_y - shape[2]
+                while any(hit[2] > bottom for hit in hits):
+                    y -= 1
+                    hits = self._hits(x, y, shape)
+            elif player.change_y < 0:
+                # Rise a quarter pixel at a time out of each floor in
+                # turn, ignoring tiles wholly above where it started
+                top = start_y + shape[3]
+                for hit in hits:
+                    if hit[3] < top:
+                        while _overlaps(shape, x, y, hit):
+                            y += 0.25
+            player.change_y = 0.0
+        y = round(y, 2)
+
+        # Then horizontal movement
+        if player.change_x:
+            x, y = self._move_x(start_x, start_y, y, player.change_x, shape)
+
+        player.center_x = x
+        player.center_y = y
+
+    def _circular_check(self, x: float, y: float, shape: tuple) -> tuple:
+        """
+        Find the nearest clear spot, trying further each round
+
+        Returns:
+           tuple: The x and y of the first spot that touches nothing
+        """
+        vary = 1
+        while True:
+            for step_x, step_y in (
+                (0, 1), (0, -1), (1, 0), (-1, 0),
+                (1, 1), (1, -1), (-1, 1), (-1, -1),
+            ):
+                spot_x = x + step_x * vary
+                spot_y = y + step_y * vary
+                if not self._hits(spot_x, spot_y, shape):
+                    return spot_x, spot_y
+            vary *= 2
+
+    def _move_x(
+        self,
+        start_x: float,
+        start_y: float,
+        y: float,
+        change_x: float,
+        shape: tuple,
+    ) -> tuple:
+        """
+        Move as far toward change_x as possible, stepping up low ledges
+
+        The distance is found by halving whole pixels, as arcade does.
+
+        Returns:
+           tuple: The player's new x and y
+        """
+        direction = math.copysign(1, change_x)
+        distance = abs(change_x)
+        upper = distance
+        lower = 0
+        lift = 0
+
+        # arcade leaves the player raised after a failed step up, and
+        # tests the distances after that from there
+        check_y = y
+
+        while True:
+            x = start_x + distance * direction
+            if not self._hits(x, check_y, shape):
+                # Clear here; try further if there is room left
+                lower = distance
+                if upper - lower <= 0:
+                    break
+                distance = (upper + lower) // 2 + (upper + lower) % 2
+                continue
+
+            # Could the player step up onto it?
+            check_y = start_y + distance
+            if not self._hits(x, check_y, shape):
+                # Come down a pixel at a time while still clear
+                lift = distance
+                clear = True
+                while clear and lift > 0:
+                    lift -= 1
+                    clear = not self._hits(x, y + lift, shape)
+                lift += 1
+                break
+
+            upper = distance - 1
+            if upper - lower <= 0:
+                distance = lower
+                break
+            distance = (upper + lower) // 2
+
+        return start_x + distance * direction, y + lift
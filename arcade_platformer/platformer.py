@@ -11,231 +11,205 @@ Level design by Mike Stewart
 """
 # platformer.py
 
-import arcade
-import pathlib
+import argparse
+import time
 
-# Game constants
-# Window dimensions
-SCREEN_WIDTH = 1000
-SCREEN_HEIGHT = 650
-SCREEN_TITLE = "Arcade Platformer"
+import arcade
 
-# Scaling constants
-MAP_SCALING = 1.0
+from audio import SOUNDS, AudioManager
+from baking import BakedLayer
+from chunks import ChunkedLayer
+from constants import (
+    ASSETS_PATH,
+    BOTTOM_VIEWPORT_MARGIN,
+    LEFT_VIEWPORT_MARGIN,
+    RIGHT_VIEWPORT_MARGIN,
+    SCREEN_HEIGHT,
+    SCREEN_TITLE,
+    SCREEN_WIDTH,
+    TOP_VIEWPORT_MARGIN,
+)
+from controls import Controls
+from hud import HudText, draw_in_screen_space
+from levels import LEVEL_CACHE
+from profiler import FrameProfiler
+from replay import InputRecorder
+from simulation import (
+    EVENT_COIN,
+    EVENT_DEATH,
+    EVENT_JUMP,
+    EVENT_LEVEL_COMPLETE,
+    PlatformerSimulation,
+    level_map_path,
+)
+from startup import Startup
+from textures import TEXTURES
+from world import World, WorldSimulation
+
+# The sound played for each simulation event, named after its file
+EVENT_SOUNDS = {
+    EVENT_JUMP: "jump",
+    EVENT_COIN: "coin",
+    EVENT_LEVEL_COMPLETE: "victory",
+}
+
+# Full screen images for the title and instructions screens
+TITLE_IMAGE_PATH = ASSETS_PATH / "images" / "title_image.png"
+INSTRUCTIONS_IMAGE_PATH = ASSETS_PATH / "images" / "instructions_image.png"
+
+
+def sound_path(name: str):
+    """ The file for one of the EVENT_SOUNDS. """
+    return ASSETS_PATH / "sounds" / f"{name}.wav"
+
+
+def warm_up_assets() -> None:
+    """
+    Load what the game needs after the title screen, ahead of time
 
-# Player constants
-GRAVITY = 1.0
-PLAYER_START_X = 65
-PLAYER_START_Y = 256
-PLAYER_MOVE_SPEED = 10
-PLAYER_JUMP_SPEED = 20
+    Run on a background thread while the title screen shows. Everything
+    goes into the shared registries and level cache, so the screens
+    and the game find it there instead of loading it themselves.
+    """
+    # The first level is read on the level cache's own worker
+    LEVEL_CACHE.prefetch(level_map_path(1))
 
-# Viewport margins
-# Defines how close the player has to be to scroll the viewport
-LEFT_VIEWPORT_MARGIN = 50
-RIGHT_VIEWPORT_MARGIN = 300
-TOP_VIEWPORT_MARGIN = 150
-BOTTOM_VIEWPORT_MARGIN = 150
+    TEXTURES.get(INSTRUCTIONS_IMAGE_PATH)
+    TEXTURES.preload(ASSETS_PATH / "images" / "player")
+    TEXTURES.preload(ASSETS_PATH / "images" / "enemies")
+    for name in EVENT_SOUNDS.values():
+        SOUNDS.get(sound_path(name))
 
-# Joystick control
-DEAD_ZONE = 0.1
+    # The first text rendered loads PIL's font support; do it now, not
+    # in the frame the title prompt first shows
+    arcade.get_text_image("", arcade.color.WHITE)
 
-# Assets path
-ASSETS_PATH = pathlib.Path(__file__).resolve().parent.parent / "assets"
 
 class PlatformerView(arcade.View):
-    def __init__(self):
-        super().__init__()
-
-        # Lists to hold different sets of sprites
-        self.coins = None
-        self.background = None
-        self.walls = None
-        self.ladders = None
-        self.goals = None
-        self.enemies = None
-
-        # One sprite for the player
-        self.player = None
-
-        # Platform game needs a physics engine
-        self.physics_engine = None
+    """
+    Draws the game and feeds it player input.
+    All of the game logic lives in the PlatformerSimulation.
+    """
+    def __init__(
+        self,
+        audio: AudioManager = None,
+        world: World = None,
+        bake_static: bool = False,
+    ):
+        """
+        Create the game view
 
-        # Store the player's score
-        self.score = 0
+        Args:
+           audio (AudioManager): Plays the game sounds; one playing
+              through arcade on a worker thread is made if None
+           world (World): Play this streamed world instead of the
+              levels, if set
+           bake_static (bool): Paint the background and ground into
+              big textures instead of drawing their tiles
+        """
+        super().__init__()
 
-        # Store the level the player is on
-        self.level = 1
+        # Times each stage of the frame, toggled with F3
+        self.profiler = FrameProfiler()
 
-        # Load game sounds
-        self.coin_sound = arcade.load_sound(
-            str(ASSETS_PATH / "sounds" / "coin.wav")
-        )
-        self.jump_sound = arcade.load_sound(
-            str(ASSETS_PATH / "sounds" / "jump.wav")
+        # The simulation owns the level, the sprites and the score
+        if world is not None:
+            self.simulation = WorldSimulation(world, profiler=self.profiler)
+        else:
+            self.simulation = PlatformerSimulation(profiler=self.profiler)
+
+        # The title and pause screens, made the first time needed
+        self.title_view = None
+        self.pause_view = None
+
+        # Static map layers, split up for drawing, and the wall list
+        # they were split from
+        self.chunked_layers = []
+        self.chunked_walls = None
+
+        # Paint the background and ground into a few big textures as
+        # they come on screen, instead of drawing their tiles every
+        # frame. Off unless asked for: with llvmpipe it measured slower
+        # than the chunked layers, 38.7 against 15.2 ms a frame on the
+        # 1000x200 stress map
+        self.bake_static = bake_static
+
+        # White score text over a black shadow
+        self.score_text = HudText(
+            "Score: 0",
+            x=10,
+            y=10,
+            color=arcade.csscolor.WHITE,
+            font_size=40,
+            shadow_color=arcade.csscolor.BLACK,
         )
-        self.victory_sound = arcade.load_sound(
-            str(ASSETS_PATH / "sounds" / "victory.wav")
+
+        # Frame time percentiles, shown while profiling
+        self.profile_text = HudText(
+            "",
+            x=10,
+            y=SCREEN_HEIGHT - 30,
+            color=arcade.csscolor.WHITE,
+            font_size=16,
+            shadow_color=arcade.csscolor.BLACK,
         )
 
-        # Check if a joystick is connected
-        joysticks = arcade.get_joysticks()
+        # Game sounds, loaded off the game loop when first played and
+        # started once a frame from on_update
+        self.audio = audio if audio is not None else AudioManager()
+        for name in EVENT_SOUNDS.values():
+            self.audio.add(name, sound_path(name))
 
-        # If so, get the first one
-        if joysticks:
-            self.joystick = joysticks[0]
-            self.joystick.open()
-        # If not, flag it so code won't try to use it
-        else:
-            self.joystick = None
+        # Turns keys and the joystick into simulation input; the
+        # joystick is looked for when the game first reads input
+        self.controls = Controls(find_joystick=True)
 
     def setup(self):
         """ Sets up game for current level """
-        # Get the current map based on the level
-        map_name = f"platform_level_{self.level:02}.tmx"
-        map_path = ASSETS_PATH / map_name
-
-        # Match layers to names in arcade
-        wall_layer = "Ground"
-        coin_layer = "Collectibles"
-        goal_layer = "Goal"
-        background_layer = "Background"
-        ladders_layer = "Ladders"
-
-        # Load the current map
-        game_map = arcade.tilemap.read_tmx(str(map_path))
-
-        # Load the layers
-        self.background = arcade.tilemap.process_layer(
-            game_map, layer_name=background_layer, scaling=MAP_SCALING
-        )
-        self.goals = arcade.tilemap.process_layer(
-            game_map, layer_name=goal_layer, scaling=MAP_SCALING
-        )
-        self.walls = arcade.tilemap.process_layer(
-            game_map, layer_name=wall_layer, scaling=MAP_SCALING
-        )
-        self.ladders = arcade.tilemap.process_layer(
-            game_map, layer_name=ladders_layer, scaling=MAP_SCALING
-        )
-        self.coins = arcade.tilemap.process_layer(
-            game_map, layer_name=coin_layer, scaling=MAP_SCALING
-        )
+        self.simulation.setup()
+        self.start_level()
 
-        # Set up the moving platforms
-        moving_platforms_layer_name = "Moving_Platforms"
-        moving_platforms = arcade.tilemap.process_layer(
-            game_map,
-            layer_name=moving_platforms_layer_name,
-            scaling=MAP_SCALING
-        )
-        for sprite in moving_platforms:
-            self.walls.append(sprite)
+    def new_game(self) -> None:
+        """ Starts over on the first level with no score """
+        self.simulation.score = 0
+        self.simulation.level = 1
+        self.setup()
 
+    def start_level(self) -> None:
+        """ Prepares the view for the level the simulation just loaded """
         # Set the background color
-        background_color = arcade.color.FRESH_AIR
-        if game_map.background_color:
-            background_color = game_map.background_color
-        arcade.set_background_color(background_color)
-
-        # Find the map size to control viewport scrolling
-        self.map_width = (game_map.map_size.width - 1) * game_map.tile_size.width
-
-        # Create the player sprite if they're not already set up
-        if not self.player:
-            self.player = self.create_player_sprite()
-
-        # Move the player sprite to the initial position
-        self.player.center_x = PLAYER_START_X
-        self.player.center_y = PLAYER_START_Y
-        self.player.change_x = 0
-        self.player.change_y = 0
-
-        # Set up the enemies
-        self.enemies = self.create_enemy_sprites()
+        arcade.set_background_color(self.simulation.background_color)
 
         # Set up the viewport
         self.view_left = 0
         self.view_bottom = 0
 
-        # Load the physics engine for this map
-        self.physics_engine = arcade.PhysicsEnginePlatformer(
-            player_sprite=self.player,
-            platforms=self.walls,
-            gravity_constant=GRAVITY,
-            ladders=self.ladders
-        )
-
-    def create_enemy_sprites(self) -> arcade.SpriteList:
-        """
-        Creates enemy sprites appropriate for current level
-
-        Returns:
-           arcade.SpriteList: A sprite list of enemies
-        """
-        enemies = arcade.SpriteList()
-
-        # Only enemies after level 1
-        if self.level > 1:
-            enemies.append(Enemy(1464, 320)) # Curently one enemy in fixed spot
-
-        return enemies
-    
-    def create_player_sprite(self) -> arcade.AnimatedWalkingSprite:
-        """
-        Creates the animated player sprite
-
-        Returns:
-           The properly set up player sprite
-        """
-        # Path to the textures for the image animation
-        texture_path = ASSETS_PATH / "images" / "player"
-
-        # Set up the appropriate textures
-        walking_paths = [
-            texture_path / f"alienGreen_walk{x}.png" for x in (1, 2)
-        ]
-        climbing_paths = [
-            texture_path / f"alienGreen_climb{x}.png" for x in (1, 2)
-        ]
-        standing_path = texture_path / f"alienGreen_stand.png"
-
-        # Load the textures
-        walking_right_textures = [
-            arcade.load_texture(texture) for texture in walking_paths
+        # The layers are only rebuilt on a new map; a restart re-arms
+        # the same sprites, so the chunks still hold
+        if self.chunked_walls is self.simulation.walls:
+            return
+        self.chunked_walls = self.simulation.walls
+
+        # Split the static layers into chunks so only the visible
+        # part of the map is drawn
+        tile_size = self.simulation.tile_size
+        moving = {id(sprite) for sprite in self.simulation.moving_platforms}
+        static_walls = [
+            sprite for sprite in self.simulation.walls
+            if id(sprite) not in moving
         ]
-        walking_left_textures = [
-            arcade.load_texture(texture, mirrored=True) for texture in walking_paths
-        ]
-        walking_up_textures = [
-            arcade.load_texture(texture) for texture in climbing_paths
-        ]
-        walking_down_textures = [
-            arcade.load_texture(texture, mirrored=True) for texture in climbing_paths
+        if self.bake_static:
+            scenery = [BakedLayer([self.simulation.background, static_walls])]
+        else:
+            scenery = [
+                ChunkedLayer(self.simulation.background, tile_size),
+                ChunkedLayer(static_walls, tile_size),
+            ]
+        self.chunked_layers = scenery + [
+            ChunkedLayer(self.simulation.coins, tile_size, is_static=False),
+            ChunkedLayer(self.simulation.goals, tile_size),
+            ChunkedLayer(self.simulation.ladders, tile_size),
         ]
-        standing_right_textures = [arcade.load_texture(standing_path)]
-        standing_left_textures = [arcade.load_texture(standing_path, mirrored=True)]
-
-        # Create the sprite
-        player = arcade.AnimatedWalkingSprite()
-
-        # Add the proper textures
-        player.stand_left_textures = standing_left_textures
-        player.stand_right_textures = standing_right_textures
-        player.walk_left_textures = walking_left_textures
-        player.walk_right_textures = walking_right_textures
-        player.walk_up_textures = walking_up_textures
-        player.walk_down_textures = walking_down_textures
-
-        # Set the player defaults
-        player.center_x = PLAYER_START_X
-        player.center_y = PLAYER_START_Y
-        player.state = arcade.FACE_RIGHT
-
-        # Set the initial texture
-        player.texture = player.stand_right_textures[0]
-
-        return player
 
     def on_key_press(self, key: int, modifiers: int):
         """
@@ -245,32 +219,32 @@ class PlatformerView(arcade.View):
            key (int): Which key was pressed
            modifiers (int): Which modifiers were down at the time
         """
-        # Check for player left or right movement
-        if key in [arcade.key.LEFT, arcade.key.J]:
-            self.player.change_x = -PLAYER_MOVE_SPEED
-        elif key in [arcade.key.RIGHT, arcade.key.L]:
-            self.player.change_x = PLAYER_MOVE_SPEED
-
-        # Check if player can climb up or down
-        elif key in [arcade.key.UP, arcade.key.I]:
-            if self.physics_engine.is_on_ladder():
-                self.player.change_y = PLAYER_MOVE_SPEED
-        elif key in [arcade.key.DOWN, arcade.key.K]:
-            if self.physics_engine.is_on_ladder():
-                self.player.change_y = -PLAYER_MOVE_SPEED
-        
-        # Check if the player is able to jump
-        elif key == arcade.key.SPACE:
-            if self.physics_engine.can_jump():
-                self.player.change_y = PLAYER_JUMP_SPEED
-                # Play the jump sound
-                arcade.play_sound(self.jump_sound)
+        # Movement, climbing and jumping
+        if self.controls.key_press(key):
+            return
+
+        # Toggle the profiler overlay
+        if key == arcade.key.F3:
+            self.profiler.toggle()
+
+        # Save the profiled frames for offline analysis
+        elif key == arcade.key.F4:
+            self.profiler.export(f"profile_{int(time.time())}.csv")
+
+        # Start or stop recording the player's input
+        elif key == arcade.key.F5:
+            if self.simulation.recorder is None:
+                self.start_recording()
+            else:
+                self.stop_recording()
 
         # Does the player wish to pause the game?
         elif key == arcade.key.ESCAPE:
             # Pass the current view to preserve the state
-            pause = PauseView(self)
-            self.window.show_view(pause)
+            self.controls.release_all()
+            if self.pause_view is None:
+                self.pause_view = PauseView(self)
+            self.window.show_view(self.pause_view)
 
     def on_key_release(self, key: int, modifiers: int):
         """
@@ -280,34 +254,32 @@ class PlatformerView(arcade.View):
            key (int): Which key was released
            modifiers (int): Which modifiers were down at the time
         """
-        # Check for player left and right movement
-        if key in [
-            arcade.key.LEFT,
-            arcade.key.J,
-            arcade.key.RIGHT,
-            arcade.key.L
-        ]:
-            self.player.change_x = 0
-
-        # Check if player can climb up or down
-        elif key in [
-            arcade.key.UP,
-            arcade.key.I,
-            arcade.key.DOWN,
-            arcade.key.K
-        ]:
-            if self.physics_engine.is_on_ladder():
-                self.player.change_y = 0
+        # Any other key still held keeps its direction
+        self.controls.key_release(key)
+
+    def start_recording(self) -> None:
+        """ Restarts the level and records the input from here on """
+        self.setup()
+        self.simulation.recorder = InputRecorder(self.simulation)
+
+    def stop_recording(self) -> None:
+        """ Saves the input recorded so far, for replaying later """
+        recording = self.simulation.recorder.finish(self.simulation)
+        self.simulation.recorder = None
+        recording.save(f"replay_{int(time.time())}.bin")
 
     def scroll_viewport(self) -> None:
         """ Scroll the viewport when player is too close to edges. """
+        player = self.simulation.player
+        map_width = self.simulation.map_width
+
         # Scroll left
         # Find the current left boundary
         left_boundary = self.view_left + LEFT_VIEWPORT_MARGIN
         
         # Left of this boundary? If so, scroll left
-        if self.player.left < left_boundary:
-            self.view_left -= left_boundary - self.player.left
+        if player.left < left_boundary:
+            self.view_left -= left_boundary - player.left
             # Don't scroll past left edge of map
             if self.view_left < 0:
                 self.view_left = 0
@@ -317,21 +289,21 @@ class PlatformerView(arcade.View):
         right_boundary = self.view_left + SCREEN_WIDTH - RIGHT_VIEWPORT_MARGIN
 
         # Right of this boundary? If so, scroll right
-        if self.player.right > right_boundary:
-            self.view_left += self.player.right - right_boundary
+        if player.right > right_boundary:
+            self.view_left += player.right - right_boundary
             # Do not scroll past right edge of the map
-            if self.view_left > self.map_width - SCREEN_WIDTH:
-                self.view_left = self.map_width - SCREEN_WIDTH
+            if self.view_left > map_width - SCREEN_WIDTH:
+                self.view_left = map_width - SCREEN_WIDTH
 
         # Scroll up
         top_boundary = self.view_bottom + SCREEN_HEIGHT - TOP_VIEWPORT_MARGIN
-        if self.player.top > top_boundary:
-            self.view_bottom += self.player.top - top_boundary
+        if player.top > top_boundary:
+            self.view_bottom += player.top - top_boundary
 
         # Scroll down 
         bottom_boundary = self.view_bottom + BOTTOM_VIEWPORT_MARGIN
-        if self.player.bottom < bottom_boundary:
-            self.view_bottom -= bottom_boundary - self.player.bottom
+        if player.bottom < bottom_boundary:
+            self.view_bottom -= bottom_boundary - player.bottom
 
         # Only scroll to integers so that we do not crop pixels unexpectedly
         self.view_bottom = int(self.view_bottom)
@@ -347,147 +319,157 @@ class PlatformerView(arcade.View):
 
     def on_update(self, delta_time: float):
         """
-        Updates the position of game objects
+        Feeds input to the simulation and reacts to what happened
 
         Args:
            delta_time (float): How much time since the last call
         """
-        # First check for joystick motion
-        if self.joystick:
-        # Check if we're in the dead zone
-            if abs(self.joystick.x) > DEAD_ZONE:
-                self.player.change_x = self.joystick.x * PLAYER_MOVE_SPEED
-            else:
-                self.player.change_x = 0
-
-            if abs(self.joystick.y) > DEAD_ZONE:
-                if self.physics_engine.is_on_ladder():
-                    self.player.change_y = self.joystick.y * PLAYER_MOVE_SPEED
-                else:
-                    self.player.change_y = 0
-
-            # Did the user press the jump button?
-            if self.joystick.buttons[0]:
-                if self.physics_engine.can_jump():
-                    self.player.change_y = PLAYER_JUMP_SPEED
-                    # Play the jump sound
-                    arcade.play_sound(self.jump_sound)
-
-        # Update the player animation
-        self.player.update_animation(delta_time)
-
-        # Are there enemies? Update them if so
-        self.enemies.update_animation(delta_time)
-        for enemy in self.enemies:
-            enemy.center_x += enemy.change_x
-            walls_hit = arcade.check_for_collision_with_list(
-                sprite=enemy, sprite_list=self.walls
-            )
-            # Reverse enemy motion if wall is hit
-            if walls_hit:
-                enemy.change_x *= -1
-
-        # Update the player movement based on physics engine
-        self.physics_engine.update()
-
-        # Prevent player from walking off screen
-        if self.player.left < 0:
-            self.player.left = 0
+        self.profiler.start_frame()
+
+        # Hand the keys and joystick to the simulation
+        with self.profiler.section("input"):
+            self.controls.apply(self.simulation)
+
+        # Run the game logic in fixed steps
+        with self.profiler.section("simulation"):
+            tick = self.simulation.tick
+            events = self.simulation.advance(delta_time)
+        if self.simulation.tick != tick:
+            self.controls.stepped()
+
+        # Bring the enemy and platform sprites up to date for drawing
+        with self.profiler.section("sync"):
+            self.simulation.enemy_system.sync_sprites(delta_time)
+            self.simulation.platform_system.sync_sprites()
+
+        # Ask for each event's sound; repeats in one frame play once
+        for event in events:
+            if event in EVENT_SOUNDS:
+                self.audio.request(EVENT_SOUNDS[event])
+        self.audio.flush()
+
+        if EVENT_DEATH in events or EVENT_LEVEL_COMPLETE in events:
+            # The simulation reset or loaded a level, so reset the view too
+            self.start_level()
+
+        if EVENT_DEATH in events:
+            # The run is over, so keep what was recorded
+            if self.simulation.recorder is not None:
+                self.stop_recording()
+
+            # Put a game-over screen here
+            self.controls.release_all()
+            if self.title_view is None:
+                self.title_view = TitleView(self)
+            self.window.show_view(self.title_view)
+            return
 
-        # Check if the player has picked up a coin
-        coins_hit = arcade.check_for_collision_with_list(
-            sprite=self.player, sprite_list=self.coins
-        )
-
-        for coin in coins_hit:
-            # Add the coin value to the score
-            self.score += int(coin.properties["point_value"])
-
-            # Play the coin sound
-            arcade.play_sound(self.coin_sound)
-
-            # Remove the coin
-            coin.remove_from_sprite_lists()
-
-        # Has Roz collided with an enemy?
-        enemies_hit = arcade.check_for_collision_with_list(
-            sprite=self.player, sprite_list=self.enemies
-        )
-
-        if enemies_hit:
-            self.setup()
-            title_view = TitleView() # Put a game-over screen here
-            window.show_view(title_view)
+        # Set the viewport scrolling if necessary
+        with self.profiler.section("scroll"):
+            self.scroll_viewport()
+
+        # Refresh the overlay a few times a second, not every frame
+        if self.profiler.enabled and self.profiler.frames % 20 == 0:
+            self.profile_text.set_text(
+                f"{self.profiler.summary()}  "
+                f"{self.controls.latency_summary()}"
+            )
 
-        # Check if the player has reached the goal
-        goal_hit = arcade.check_for_collision_with_list(
-            sprite=self.player, sprite_list=self.goals
-        )
+    def on_draw(self) -> None:
+        with self.profiler.section("draw"):
+            self.draw_game()
 
-        if goal_hit:
-            # Play the victory fanfare
-            self.victory_sound.play()
+        if self.profiler.enabled:
+            draw_in_screen_space(self.profile_text)
 
-            # Set up the next level
-            self.level += 1
-            self.setup()
+    def draw_game(self) -> None:
+        """ Draws the level, the sprites and the score """
+        arcade.start_render()
 
-        # Set the viewport scrolling if necessary
-        self.scroll_viewport()
+        # A world's layers come and go as its regions stream in and out
+        layers = self.chunked_layers
+        if self.simulation.streamer is not None:
+            layers = self.simulation.streamer.chunked_layers()
 
-    def on_draw(self) -> None:
-        arcade.start_render()
+        # Draw the parts of the map that are on screen
+        for layer in layers:
+            layer.draw(
+                self.view_left, self.view_bottom, SCREEN_WIDTH, SCREEN_HEIGHT
+            )
 
-        # Draw all the sprites
-        self.background.draw()
-        self.walls.draw()
-        self.coins.draw()
-        self.goals.draw()
-        self.ladders.draw()
-        self.enemies.draw()
-        self.player.draw()
-
-        # Draw the score on screen
-        score_text = f"Score: {self.score}"
-
-        # First, render a black-shaded background
-        arcade.draw_text(
-            score_text,
-            start_x=10 + self.view_left,
-            start_y=10 + self.view_bottom,
-            color=arcade.csscolor.BLACK,
-            font_size=40
-        )
+        # Draw the moving sprites
+        self.simulation.moving_platforms.draw()
+        self.simulation.enemies.draw()
+        self.simulation.player.draw()
 
-        # Then render the text in white slightly shifted
-        arcade.draw_text(
-            score_text,
-            start_x=15 + self.view_left,
-            start_y=15 + self.view_bottom,
-            color=arcade.csscolor.WHITE,
-            font_size=40
-        )
+        # Draw the score on screen, only rendered again when it changes
+        self.score_text.set_text(f"Score: {self.simulation.score}")
+        draw_in_screen_space(self.score_text)
 
 class TitleView(arcade.View):
     """
     Displays a title screen prompting the user to begin the game.
     Also allows the user to check instructions.
     """
-    def __init__(self) -> None:
-        super().__init__()
+    def __init__(
+        self,
+        game_view: "PlatformerView" = None,
+        startup: Startup = None,
+        world: World = None,
+        bake_static: bool = False,
+    ) -> None:
+        """
+        Create the title screen
 
-        # Find the title image path
-        title_image_path = ASSETS_PATH / "images" / "title_image.png"
+        Args:
+           game_view (PlatformerView): The game to start again, if one
+              has been played already
+           startup (Startup): Told when the first frame is drawn, if
+              this is the first screen shown
+           world (World): The streamed world to play, if not the levels
+           bake_static (bool): Bake the background and ground of the
+              game started from here
+        """
+        super().__init__()
 
-        # Load the title image
-        self.title_image = arcade.load_texture(title_image_path)
+        # The game and instruction screens, made the first time needed
+        self.game_view = game_view
+        self.instructions_view = None
+        self.startup = startup
+        self.world = world
+        self.bake_static = bake_static
+
+        # The title image, fetched from the texture registry when first
+        # drawn
+        self.title_image = None
+
+        # The prompt that flashes over the title image
+        self.instructions_text = HudText(
+            "ENTER to start | I for instructions",
+            x=100,
+            y=220,
+            color=arcade.color.INDIGO,
+            font_size=40,
+        )
 
+    def on_show(self) -> None:
+        """ Start the instructions timer over each time we are shown. """
         # Set the display timer
         self.display_timer = 3.0
 
         # Showing the instructions?
         self.show_instructions = False
 
+    def start_game(self) -> None:
+        """ Start a new game, reusing the game view if there is one. """
+        if self.game_view is None:
+            self.game_view = PlatformerView(
+                world=self.world, bake_static=self.bake_static
+            )
+            self.game_view.title_view = self
+        self.game_view.new_game()
+        self.window.show_view(self.game_view)
+
     def on_update(self, delta_time: float) -> None:
         """ Manage the timer to toggle instructions. """
         # Count down the time
@@ -504,6 +486,10 @@ class TitleView(arcade.View):
         # Start the rendering loop
         arcade.start_render()
 
+        # Get the title image, loaded only the first time
+        if self.title_image is None:
+            self.title_image = TEXTURES.get(TITLE_IMAGE_PATH)
+
         # Draw a rectangle filled with the title image
         arcade.draw_texture_rectangle(
             center_x=SCREEN_WIDTH / 2, 
@@ -515,13 +501,12 @@ class TitleView(arcade.View):
 
         # Display the instructions?
         if self.show_instructions:
-            arcade.draw_text(
-                "ENTER to start | I for instructions",
-                start_x=100,
-                start_y=220,
-                color=arcade.color.INDIGO,
-                font_size=40,
-            )
+            draw_in_screen_space(self.instructions_text)
+
+        # The game is on screen; report and warm up the rest
+        if self.startup is not None:
+            self.startup.first_frame()
+            self.startup = None
 
     def on_key_press(self, key: int, modifiers: int) -> None:
         """
@@ -532,31 +517,38 @@ class TitleView(arcade.View):
            modifiers (int): Which modifiers were present?
         """
         if key == arcade.key.RETURN:
-            game_view = PlatformerView()
-            game_view.setup()
-            self.window.show_view(game_view)
+            self.start_game()
         elif key == arcade.key.I:
-            instructions_view = InstructionsView()
-            self.window.show_view(instructions_view)
+            if self.instructions_view is None:
+                self.instructions_view = InstructionsView(self)
+            self.window.show_view(self.instructions_view)
 
 class InstructionsView(arcade.View):
     """ Show instructions to the player. """
-    def __init__(self) -> None:
-        """ Create the instructions screen. """
+    def __init__(self, title_view: TitleView) -> None:
+        """
+        Create the instructions screen
+
+        Args:
+           title_view (TitleView): The title screen to go back to
+        """
         super().__init__()
 
-        # Find the instructions image in the images folder
-        instructions_image_path = (
-            ASSETS_PATH / "images" / "instructions_image.png"
-        )
+        # Store a reference to the title screen
+        self.title_view = title_view
 
-        # Load the instructions image
-        self.instructions_image = arcade.load_texture(instructions_image_path)
+        # The instructions image, fetched from the texture registry when
+        # first drawn; usually warmed up by then
+        self.instructions_image = None
 
     def on_draw(self) -> None:
         # Start the rendering loop
         arcade.start_render()
 
+        # Get the instructions image, loaded only the first time
+        if self.instructions_image is None:
+            self.instructions_image = TEXTURES.get(INSTRUCTIONS_IMAGE_PATH)
+
         # Draw a rectangle filled with the instructions image
         arcade.draw_texture_rectangle(
             center_x=SCREEN_WIDTH / 2, 
@@ -575,12 +567,9 @@ class InstructionsView(arcade.View):
            modifiers (int): Which modifiers were present?
         """
         if key == arcade.key.RETURN:
-            game_view = PlatformerView()
-            game_view.setup()
-            self.window.show_view(game_view)
+            self.title_view.start_game()
         elif key == arcade.key.ESCAPE:
-            title_view = TitleView()
-            self.window.show_view(title_view)
+            self.window.show_view(self.title_view)
 
 class PauseView(arcade.View):
     """ Pause screen for when the game is paused. """
@@ -596,10 +585,24 @@ class PauseView(arcade.View):
             arcade.color.WHITE, transparency=150
         )
 
-    def on_draw(self) -> None:
-        """ Draw the underlying screen, blurred, with pause text. """
-        # Draw the underlying game view
-        self.game_view.on_draw()
+        # The game frame under the overlay, captured once per pause
+        self.paused_frame = None
+        self.captures = 0
+
+        # The pause message, placed relative to the viewport
+        self.pause_text = HudText(
+            "Paused - ESC to continue",
+            x=180,
+            y=300,
+            color=arcade.color.INDIGO,
+            font_size=40,
+        )
+
+    def on_show(self) -> None:
+        """ Capture the game, washed out, to show while paused. """
+        # Nothing moves while paused, so draw the game and the overlay
+        # once and read the result back as a texture
+        self.game_view.draw_game()
 
         # Create a filled rectangle that covers the viewport
         arcade.draw_lrtb_rectangle_filled(
@@ -610,15 +613,33 @@ class PauseView(arcade.View):
             color=self.fill_color
         )
 
-        # Next, display the pause text
-        arcade.draw_text(
-            "Paused - ESC to continue",
-            start_x=self.game_view.view_left + 180,
-            start_y=self.game_view.view_bottom + 300,
-            color=arcade.color.INDIGO,
-            font_size=40
+        width, height = self.window.get_framebuffer_size()
+        self.captures += 1
+        self.paused_frame = arcade.Texture(
+            name=f"paused:{id(self)}:{self.captures}",
+            image=arcade.get_image(0, 0, width, height),
         )
 
+    def on_hide_view(self) -> None:
+        """ Let go of the captured frame once the game resumes. """
+        self.paused_frame = None
+
+    def on_draw(self) -> None:
+        """ Draw the captured screen with pause text. """
+        arcade.start_render()
+
+        # One texture covering the viewport, instead of the whole game
+        arcade.draw_lrwh_rectangle_textured(
+            self.game_view.view_left,
+            self.game_view.view_bottom,
+            SCREEN_WIDTH,
+            SCREEN_HEIGHT,
+            self.paused_frame,
+        )
+
+        # Next, display the pause text
+        draw_in_screen_space(self.pause_text)
+
     def on_key_press(self, key: int, modifiers: int) -> None:
         """ 
         Resume the game when the user presses ESC. 
@@ -630,50 +651,41 @@ class PauseView(arcade.View):
         if key == arcade.key.ESCAPE:
             self.window.show_view(self.game_view)
 
-class Enemy(arcade.AnimatedWalkingSprite):
-    """ Enemy sprites with basic walking movement. """
-    def __init__(self, pos_x: int, pos_y: int) -> None:
-        super().__init__(center_x=pos_x, center_y=pos_y)
-
-        # Path to sprite images
-        texture_path = ASSETS_PATH / "images" / "enemies"
-
-        # Set up the appropriate textures
-        walking_texture_path = [
-            texture_path / "slimePurple.png",
-            texture_path / "slimePurple_move.png"
-        ]
-        standing_texture_path = texture_path / "slimePurple.png"
-
-        # Load the textures
-        self.walk_left_textures = [
-            arcade.load_texture(texture) for texture in walking_texture_path
-        ]
-
-        self.walk_right_textures = [
-            arcade.load_texture(texture, mirrored=True)
-            for texture in walking_texture_path
-        ]
-
-        self.stand_left_textures = [
-            arcade.load_texture(standing_texture_path, mirrored=True)
-        ]
-
-        self.stand_right_textures = [
-            arcade.load_texture(standing_texture_path)
-        ]
-
-        # Set the enemy defaults
-        self.state = arcade.FACE_LEFT
-        self.change_x = -PLAYER_MOVE_SPEED // 2
-
-        # Set the initial texture
-        self.texture = self.stand_left_textures[0]
-
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument(
+        "--startup-report",
+        action="store_true",
+        help="print how long each startup stage took",
+    )
+    parser.add_argument(
+        "--no-warm-up",
+        action="store_true",
+        help="load assets only when first used",
+    )
+    parser.add_argument(
+        "--world",
+        help="play a Tiled .world file of maps streamed in as you go",
+    )
+    parser.add_argument(
+        "--bake",
+        action="store_true",
+        help="paint the background and ground into big textures",
+    )
+    args = parser.parse_args()
+
+    startup = Startup(
+        warm_up=None if args.no_warm_up else warm_up_assets,
+        report=args.startup_report,
+    )
     window = arcade.Window(
         width=SCREEN_WIDTH, height=SCREEN_HEIGHT, title=SCREEN_TITLE
     )
-    title_view = TitleView()
+    startup.mark("window")
+    world = World.read(args.world) if args.world else None
+    title_view = TitleView(
+        startup=startup, world=world, bake_static=args.bake
+    )
     window.show_view(title_view)
+    startup.mark("title screen")
     arcade.run()
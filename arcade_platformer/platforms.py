@@ -0,0 +1,217 @@
+"""
+Arcade Platformer moving platforms
+
+Platforms in the Moving_Platforms layer carry their speed and the
+bounds they turn around at as boundary_* and change_* properties. The
+MovingPlatformSystem reads those once, keeps every platform's position,
+speed, size and bounds in NumPy arrays, and moves them all in one array
+step instead of one sprite at a time.
+
+Each player rides a platform it is standing on, following it both ways,
+and is pushed aside by one that runs into it. The platform sprites are
+only brought up to date when something needs them, such as drawing or
+arcade's sprite physics, and their own speeds stay at zero so no
+physics engine moves them a second time.
+"""
+# platforms.py
+
+import arcade
+import numpy as np
+
+# How far above a platform, in pixels, the player still counts as on it
+RIDE_TOLERANCE = 1.0
+
+
+def _record_value(record, name: str):
+    """ A setting from a record, or from its map properties if unset. """
+    value = getattr(record, name)
+    if value is None or (name.startswith("change") and not value):
+        value = record.properties.get(name, value)
+    return None if value is None else float(value)
+
+
+class MovingPlatformSystem:
+    """ Every moving platform on a level, moved together in arrays. """
+    def __init__(self, records: list, sprites: arcade.SpriteList) -> None:
+        """
+        Read the platforms' settings
+
+        Args:
+           records (list): SpriteRecords of the Moving_Platforms layer
+           sprites (arcade.SpriteList): The platform sprites, in the
+              same order, used for drawing
+        """
+        self.sprites = sprites
+
+        count = len(records)
+        self.start_x = np.array(
+            [record.center_x for record in records], dtype=float
+        )
+        self.start_y = np.array(
+            [record.center_y for record in records], dtype=float
+        )
+        self.x = self.start_x.copy()
+        self.y = self.start_y.copy()
+
+        # Where each platform turns around; unset bounds never stop it
+        def bounds(name: str, unset: float) -> np.ndarray:
+            values = [_record_value(record, name) for record in records]
+            return np.array(
+                [unset if value is None else value for value in values],
+                dtype=float,
+            )
+
+        self.boundary_left = bounds("boundary_left", -np.inf)
+        self.boundary_right = bounds("boundary_right", np.inf)
+        self.boundary_bottom = bounds("boundary_bottom", -np.inf)
+        self.boundary_top = bounds("boundary_top", np.inf)
+
+        self.start_change_x = bounds("change_x", 0.0)
+        self.start_change_y = bounds("change_y", 0.0)
+        self.change_x = self.start_change_x.copy()
+        self.change_y = self.start_change_y.copy()
+
+        # Hit box extents around the center, measured once per platform
+        self.left_extent = np.empty(count)
+        self.right_extent = np.empty(count)
+        self.bottom_extent = np.empty(count)
+        self.top_extent = np.empty(count)
+        for index, sprite in enumerate(sprites):
+            self.left_extent[index] = sprite.center_x - sprite.left
+            self.right_extent[index] = sprite.right - sprite.center_x
+            self.bottom_extent[index] = sprite.center_y - sprite.bottom
+            self.top_extent[index] = sprite.top - sprite.center_y
+
+            # Speeds live in the arrays, so no engine moves the sprite
+            sprite.change_x = 0
+            sprite.change_y = 0
+
+        # Left, right, bottom and top of each platform, for collisions
+        self.boxes = np.empty((count, 4))
+        self._update_boxes()
+
+    def __len__(self) -> int:
+        return len(self.x)
+
+    def _update_boxes(self) -> None:
+        """ Recompute each platform's box from its center. """
+        self.boxes[:, 0] = self.x - self.left_extent
+        self.boxes[:, 1] = self.x + self.right_extent
+        self.boxes[:, 2] = self.y - self.bottom_extent
+        self.boxes[:, 3] = self.y + self.top_extent
+
+    def rider(self, player: arcade.Sprite) -> int:
+        """
+        Find the platform the player is standing on
+
+        Args:
+           player (arcade.Sprite): The player
+
+        Returns:
+           int: The platform's index, or -1 if on none
+        """
+        if not len(self.x):
+            return -1
+        gap = player.bottom - self.boxes[:, 3]
+        standing = np.flatnonzero(
+            (self.boxes[:, 0] < player.right)
+            & (self.boxes[:, 1] > player.left)
+            & (gap >= 0)
+            & (gap <= RIDE_TOLERANCE)
+        )
+        return int(standing[0]) if len(standing) else -1
+
+    def update(self, *players: arcade.Sprite) -> None:
+        """
+        Move every platform one step, turning around at its bounds
+
+        Args:
+           players (arcade.Sprite): Each is carried along if standing on
+              a platform, and pushed aside if one runs into it
+        """
+        if not len(self.x):
+            return
+
+        riders = [(player, self.rider(player)) for player in players]
+        start_x = self.x.copy()
+        start_y = self.y.copy()
+
+        # Horizontal movement
+        self.x += self.change_x
+        left = self.x - self.left_extent
+        right = self.x + self.right_extent
+
+        hit = left <= self.boundary_left
+        self.x[hit] = self.boundary_left[hit] + self.left_extent[hit]
+        self.change_x[hit & (self.change_x < 0)] *= -1
+
+        hit = right >= self.boundary_right
+        self.x[hit] = self.boundary_right[hit] - self.right_extent[hit]
+        self.change_x[hit & (self.change_x > 0)] *= -1
+
+        # Vertical movement
+        self.y += self.change_y
+        bottom = self.y - self.bottom_extent
+        top = self.y + self.top_extent
+
+        hit = top >= self.boundary_top
+        self.y[hit] = self.boundary_top[hit] - self.top_extent[hit]
+        self.change_y[hit & (self.change_y > 0)] *= -1
+
+        hit = bottom <= self.boundary_bottom
+        self.y[hit] = self.boundary_bottom[hit] + self.bottom_extent[hit]
+        self.change_y[hit & (self.change_y < 0)] *= -1
+
+        self._update_boxes()
+
+        for player, riding in riders:
+            self._move_player(player, riding, start_x, start_y)
+
+    def _move_player(
+        self,
+        player: arcade.Sprite,
+        riding: int,
+        start_x: np.ndarray,
+        start_y: np.ndarray,
+    ) -> None:
+        """ Carry a player with its platform and out of others' way. """
+        # Carry the rider along with its platform
+        if riding >= 0:
+            player.center_x += self.x[riding] - start_x[riding]
+            player.center_y += self.y[riding] - start_y[riding]
+
+        # Push the player out of the way of any other platform
+        boxes = self.boxes
+        overlapping = np.flatnonzero(
+            (boxes[:, 0] < player.right)
+            & (boxes[:, 1] > player.left)
+            & (boxes[:, 2] < player.top)
+            & (boxes[:, 3] > player.bottom)
+        )
+        for index in overlapping:
+            if index == riding:
+                continue
+            moved = self.x[index] - start_x[index]
+            if moved < 0:
+                player.right = boxes[index, 0]
+            elif moved > 0:
+                player.left = boxes[index, 1]
+
+    def reset(self) -> None:
+        """ Put every platform back where it started. """
+        self.x[:] = self.start_x
+        self.y[:] = self.start_y
+        self.change_x[:] = self.start_change_x
+        self.change_y[:] = self.start_change_y
+        self.reposition()
+
+    def reposition(self) -> None:
+        """ Bring boxes and sprites up to date after x and y were set. """
+        self._update_boxes()
+        self.sync_sprites()
+
+    def sync_sprites(self) -> None:
+        """ Copy positions to the sprites, before drawing or collisions. """
+        for index, platform in enumerate(self.sprites):
+            platform.center_x = self.x[index]
+            platform.center_y = self.y[index]
@@ -0,0 +1,194 @@
+"""
+Arcade Platformer sprite pooling
+
+Dying used to throw away every sprite on the level and build them all
+again, and collecting a coin removed it from its lists. Both churn
+through thousands of short-lived objects, which shows up as allocation
+bursts and garbage collector pauses in the middle of play.
+
+Collected coins are now hidden instead, by making them fully
+transparent in place: arcade 2.5 sprites have no visibility flag, and
+taking them out of their lists would churn those too. A restart on the
+same map re-arms the sprites already in place. When the map does
+change, the old sprites go into a SpritePool, and the new level's
+layers and enemies are built from them before anything new is
+allocated.
+
+Compare a death-restart loop with and without pooling:
+
+    python pooling.py --restarts 500
+"""
+# pooling.py
+
+import argparse
+import gc
+import time
+import tracemalloc
+
+import arcade
+import numpy as np
+
+from enemies import Enemy
+
+
+class SpritePool:
+    """ Spare tile and enemy sprites, handed out again before new ones. """
+    def __init__(self, enabled: bool = True) -> None:
+        """
+        Create an empty pool
+
+        Args:
+           enabled (bool): Whether to reuse sprites at all; a disabled
+              pool builds everything new, for comparison
+        """
+        self.enabled = enabled
+
+        # Sprites released from layers no longer in use
+        self.tiles = []
+        self.enemies = []
+
+        # How many sprites were built new and how many were reused
+        self.created = 0
+        self.reused = 0
+
+    def take(self, record) -> arcade.Sprite:
+        """
+        Get a sprite in the state a map record describes
+
+        Args:
+           record (SpriteRecord): The sprite's state on the map
+
+        Returns:
+           arcade.Sprite: A spare sprite re-armed from the record, or a
+              new one if the pool is empty
+        """
+        if not self.tiles:
+            self.created += 1
+            return record.create_sprite()
+
+        self.reused += 1
+        sprite = self.tiles.pop()
+        sprite.scale = record.scale
+        sprite.texture = record.texture
+        record.reset_sprite(sprite)
+        return sprite
+
+    def take_enemy(self, pos_x: float, pos_y: float) -> Enemy:
+        """
+        Get an enemy standing at a spawn point
+
+        Args:
+           pos_x (float): Spawn x position
+           pos_y (float): Spawn y position
+
+        Returns:
+           Enemy: A spare enemy respawned there, or a new one
+        """
+        if not self.enemies:
+            self.created += 1
+            return Enemy(pos_x, pos_y)
+
+        self.reused += 1
+        enemy = self.enemies.pop()
+        enemy.respawn(pos_x, pos_y)
+        return enemy
+
+    def release(self, *sprite_lists) -> None:
+        """
+        Take back the sprites of lists that are about to be dropped
+
+        Each sprite forgets the lists it was in, since those are going
+        away with the level. A sprite in several of the lists, such as
+        a moving platform that is also a wall, is only pooled once.
+
+        Args:
+           sprite_lists: The sprite lists being thrown away
+        """
+        if not self.enabled:
+            return
+
+        for sprites in sprite_lists:
+            if sprites is None:
+                continue
+            for sprite in sprites:
+                # Already pooled from an earlier list
+                if not sprite.sprite_lists:
+                    continue
+                sprite.sprite_lists.clear()
+                if isinstance(sprite, Enemy):
+                    self.enemies.append(sprite)
+                else:
+                    self.tiles.append(sprite)
+
+    def clear(self) -> None:
+        """ Drop every spare sprite. """
+        self.tiles.clear()
+        self.enemies.clear()
+
+
+def restart_report(level: int, restarts: int, enabled: bool) -> dict:
+    """
+    Measure a loop of deaths and restarts on one level
+
+    Each pass collects every coin, as a player might before dying, then
+    runs the same reset a death does.
+
+    Args:
+       level (int): Which level to play
+       restarts (int): How many restarts to run
+       enabled (bool): Whether the simulation's pool reuses sprites
+
+    Returns:
+       dict: Garbage collections per generation, memory allocated and
+          time taken over the loop
+    """
+    # Imported here, since the simulation imports this module
+    from simulation import PlatformerSimulation
+
+    simulation = PlatformerSimulation(level, pool=SpritePool(enabled))
+    simulation.setup()
+
+    gc.collect()
+    collections_before = [stats["collections"] for stats in gc.get_stats()]
+    tracemalloc.start()
+    start = time.perf_counter()
+
+    for _ in range(restarts):
+        for index in np.flatnonzero(simulation.coins_alive):
+            simulation.collect_coin(simulation.coins[index])
+        simulation.restart()
+
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    collections_after = [stats["collections"] for stats in gc.get_stats()]
+
+    return {
+        "collections": [
+            after - before
+            for before, after in zip(collections_before, collections_after)
+        ],
+        "peak_kib": peak / 1024,
+        "ms_per_restart": elapsed / restarts * 1000,
+        "sprites_created": simulation.pool.created,
+        "sprites_reused": simulation.pool.reused,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--level", type=int, default=1)
+    parser.add_argument("--restarts", type=int, default=200)
+    args = parser.parse_args()
+
+    for enabled in (False, True):
+        report = restart_report(args.level, args.restarts, enabled)
+        gen0, gen1, gen2 = report["collections"]
+        print(
+            f"pooling {'on ' if enabled else 'off'}: "
+            f"{report['ms_per_restart']:.3f} ms/restart, "
+            f"GC collections {gen0}/{gen1}/{gen2}, "
+            f"peak traced {report['peak_kib']:.0f} KiB, "
+            f"{report['sprites_created']} sprites created, "
+            f"{report['sprites_reused']} reused"
+        )
@@ -0,0 +1,193 @@
+"""
+Arcade Platformer frame profiler
+
+Times each stage of a frame (input, enemies, physics, collisions,
+scrolling, drawing) and keeps a rolling window of frame times for the
+on-screen overlay. The most recent PROFILE_RECORDS frames can also be
+written out as CSV or JSON for offline analysis.
+
+When the profiler is disabled, section() hands back one shared do-
+nothing context manager, so instrumented code costs a method call and
+an attribute check per section.
+"""
+# profiler.py
+
+import collections
+import contextlib
+import csv
+import json
+import pathlib
+import time
+
+# How many recent frames the overlay percentiles cover
+PROFILE_HISTORY = 300
+
+# How many frames are kept for export: ten minutes at 60 frames a second
+PROFILE_RECORDS = 36000
+
+# Shared by every disabled section() call
+NULL_SECTION = contextlib.nullcontext()
+
+
+class _Section:
+    """ Context manager adding its elapsed time to the current frame. """
+    __slots__ = ("profiler", "name", "start")
+
+    def __init__(self, profiler: "FrameProfiler", name: str) -> None:
+        self.profiler = profiler
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self) -> "_Section":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        elapsed = time.perf_counter() - self.start
+        current = self.profiler.current
+        current[self.name] = current.get(self.name, 0.0) + elapsed
+
+
+class FrameProfiler:
+    """ Collects per-frame, per-section timings while enabled. """
+    def __init__(
+        self,
+        history: int = PROFILE_HISTORY,
+        max_records: int = PROFILE_RECORDS,
+    ) -> None:
+        """
+        Create a disabled profiler
+
+        Args:
+           history (int): How many frames the rolling window holds
+           max_records (int): How many frames are kept for export
+        """
+        self.enabled = False
+
+        # Section times for the frame in progress, in seconds
+        self.current = {}
+        self.frame_start = None
+
+        # Recent frame times for percentiles, in seconds
+        self.frame_times = collections.deque(maxlen=history)
+
+        # The latest finished frames since the profiler was enabled, and
+        # how many frames have finished in all
+        self.records = collections.deque(maxlen=max_records)
+        self.frames = 0
+
+    def enable(self) -> None:
+        """ Start profiling, forgetting the frames of any earlier run. """
+        self.enabled = True
+        self.current = {}
+        self.frame_start = None
+        self.frame_times.clear()
+        self.records.clear()
+        self.frames = 0
+
+    def toggle(self) -> bool:
+        """
+        Turn profiling on or off
+
+        Returns:
+           bool: Whether the profiler is now enabled
+        """
+        if self.enabled:
+            self.enabled = False
+            self.current = {}
+            self.frame_start = None
+        else:
+            self.enable()
+        return self.enabled
+
+    def section(self, name: str):
+        """
+        Time a block of code as part of the current frame
+
+            with profiler.section("physics"):
+                physics_engine.update()
+
+        Args:
+           name (str): Name of the stage being timed
+
+        Returns:
+           A context manager
+        """
+        if not self.enabled:
+            return NULL_SECTION
+        return _Section(self, name)
+
+    def start_frame(self) -> None:
+        """ Finish the previous frame and start timing a new one. """
+        if not self.enabled:
+            return
+
+        now = time.perf_counter()
+        if self.frame_start is not None:
+            frame_time = now - self.frame_start
+            self.frame_times.append(frame_time)
+            record = {"frame": self.frames, "frame_time": frame_time}
+            record.update(self.current)
+            self.records.append(record)
+            self.frames += 1
+
+        self.current = {}
+        self.frame_start = now
+
+    def percentile(self, fraction: float) -> float:
+        """
+        Get a percentile of the recent frame times
+
+        Args:
+           fraction (float): Which percentile, from 0.0 to 1.0
+
+        Returns:
+           float: The frame time in seconds, or 0.0 with no frames yet
+        """
+        if not self.frame_times:
+            return 0.0
+        ordered = sorted(self.frame_times)
+        index = min(int(fraction * len(ordered)), len(ordered) - 1)
+        return ordered[index]
+
+    def summary(self) -> str:
+        """
+        Describe recent frame times for the overlay
+
+        Returns:
+           str: p50 and p99 frame times in milliseconds
+        """
+        return (
+            f"p50 {self.percentile(0.50) * 1000:.1f} ms  "
+            f"p99 {self.percentile(0.99) * 1000:.1f} ms"
+        )
+
+    def export(self, path: pathlib.Path) -> pathlib.Path:
+        """
+        Write the kept frames to a file, CSV or JSON by extension
+
+        Args:
+           path (pathlib.Path): Where to write; ".json" writes JSON,
+              anything else writes CSV
+
+        Returns:
+           pathlib.Path: The file written
+        """
+        path = pathlib.Path(path)
+
+        if path.suffix == ".json":
+            path.write_text(json.dumps(list(self.records), indent=1))
+            return path
+
+        # Every section that showed up in any frame gets a column
+        columns = ["frame", "frame_time"]
+        for record in self.records:
+            for name in record:
+                if name not in columns:
+                    columns.append(name)
+
+        with path.open("w", newline="") as csv_file:
+            writer = csv.DictWriter(csv_file, fieldnames=columns, restval=0.0)
+            writer.writeheader()
+            writer.writerows(self.records)
+        return path
@@ -0,0 +1,263 @@
+"""
+Arcade Platformer input recording and replay
+
+A recording holds the player input for every simulation step, stored
+only when it changes, plus the score and player position at the end.
+Because the simulation runs in fixed steps, feeding the same input back
+into a fresh simulation reproduces the same game, which makes each
+recording a regression test:
+
+    python replay.py replay_*.bin
+
+File layout, all little-endian:
+    header:  magic b"APRP", version (H), level (H), start score (i),
+             tick count (I), change count (I)
+    changes: tick (I), move_x (d), move_y (d), flags (B) per change
+    footer:  final score (i), final x (d), final y (d), final level (H)
+
+Input is stored at full precision, since joystick values rounded to
+single precision would send a replay down a slightly different path.
+"""
+# replay.py
+
+import pathlib
+import struct
+import sys
+import time
+
+from simulation import PlatformerSimulation
+
+REPLAY_MAGIC = b"APRP"
+REPLAY_VERSION = 1
+
+HEADER_FORMAT = struct.Struct("<4sHHiII")
+CHANGE_FORMAT = struct.Struct("<IddB")
+FOOTER_FORMAT = struct.Struct("<iddH")
+
+# Bits of the flags byte
+FLAG_JUMP = 1
+
+# How far, in pixels, a replayed position may drift and still pass
+POSITION_TOLERANCE = 0.01
+
+
+class ReplayError(Exception):
+    """ A recording couldn't be read, or didn't replay as recorded. """
+
+
+class Recording:
+    """ The input for a run of the simulation and how it ended. """
+    def __init__(self, level: int, start_score: int) -> None:
+        """
+        Create an empty recording
+
+        Args:
+           level (int): The level the run starts on
+           start_score (int): The score at the start of the run
+        """
+        self.level = level
+        self.start_score = start_score
+
+        # (tick, move_x, move_y, jump) each time the input changed
+        self.changes = []
+        self.ticks = 0
+
+        # (score, x, y, level) when the run ended
+        self.final = None
+
+    def save(self, path: pathlib.Path) -> pathlib.Path:
+        """
+        Write the recording to a file
+
+        Args:
+           path (pathlib.Path): Where to write it
+
+        Returns:
+           pathlib.Path: The file written
+        """
+        path = pathlib.Path(path)
+        score, x, y, level = self.final or (0, 0.0, 0.0, self.level)
+
+        parts = [
+            HEADER_FORMAT.pack(
+                REPLAY_MAGIC,
+                REPLAY_VERSION,
+                self.level,
+                self.start_score,
+                self.ticks,
+                len(self.changes),
+            )
+        ]
+        for tick, move_x, move_y, jump in self.changes:
+            flags = FLAG_JUMP if jump else 0
+            parts.append(CHANGE_FORMAT.pack(tick, move_x, move_y, flags))
+        parts.append(FOOTER_FORMAT.pack(score, x, y, level))
+
+        path.write_bytes(b"".join(parts))
+        return path
+
+    @classmethod
+    def load(cls, path: pathlib.Path) -> "Recording":
+        """
+        Read a recording from a file
+
+        Args:
+           path (pathlib.Path): The file to read
+
+        Returns:
+           Recording: What the file holds
+        """
+        data = pathlib.Path(path).read_bytes()
+
+        magic, version, level, start_score, ticks, count = (
+            HEADER_FORMAT.unpack_from(data, 0)
+        )
+        if magic != REPLAY_MAGIC or version != REPLAY_VERSION:
+            raise ReplayError(f"{path} is not a version {REPLAY_VERSION} replay")
+
+        recording = cls(level, start_score)
+        recording.ticks = ticks
+
+        offset = HEADER_FORMAT.size
+        for _ in range(count):
+            tick, move_x, move_y, flags = CHANGE_FORMAT.unpack_from(
+                data, offset
+            )
+            recording.changes.append(
+                (tick, move_x, move_y, bool(flags & FLAG_JUMP))
+            )
+            offset += CHANGE_FORMAT.size
+
+        recording.final = FOOTER_FORMAT.unpack_from(data, offset)
+        return recording
+
+
+class InputRecorder:
+    """ Captures the input a simulation uses, step by step. """
+    def __init__(self, simulation: PlatformerSimulation) -> None:
+        """
+        Start recording from the simulation's current state
+
+        Call this right after setup(), so a replay can start the same
+        way.
+
+        Args:
+           simulation (PlatformerSimulation): The simulation to record
+        """
+        self.recording = Recording(simulation.level, simulation.score)
+        self.last_input = None
+
+    def capture(self, simulation: PlatformerSimulation) -> None:
+        """
+        Note the input for the step about to run; called by step()
+
+        Args:
+           simulation (PlatformerSimulation): The simulation stepping
+        """
+        current = (
+            simulation.move_x, simulation.move_y, simulation.jump_requested
+        )
+        if current != self.last_input:
+            self.recording.changes.append((self.recording.ticks,) + current)
+            self.last_input = current
+        self.recording.ticks += 1
+
+    def finish(self, simulation: PlatformerSimulation) -> Recording:
+        """
+        Stop recording and note how the run ended
+
+        Args:
+           simulation (PlatformerSimulation): The simulation recorded
+
+        Returns:
+           Recording: The finished recording
+        """
+        self.recording.final = (
+            simulation.score,
+            simulation.player.center_x,
+            simulation.player.center_y,
+            simulation.level,
+        )
+        return self.recording
+
+
+def replay(recording: Recording) -> PlatformerSimulation:
+    """
+    Run a recording through a fresh, headless simulation
+
+    Args:
+       recording (Recording): The input to feed in
+
+    Returns:
+       PlatformerSimulation: The simulation after the last step
+    """
+    simulation = PlatformerSimulation(recording.level)
+    simulation.setup()
+    simulation.score = recording.start_score
+
+    changes = iter(recording.changes)
+    next_change = next(changes, None)
+    move_x, move_y, jump = 0.0, 0.0, False
+
+    for tick in range(recording.ticks):
+        if next_change is not None and next_change[0] == tick:
+            _, move_x, move_y, jump = next_change
+            next_change = next(changes, None)
+        simulation.set_input(move_x, move_y, jump)
+        simulation.step()
+
+    return simulation
+
+
+def verify(recording: Recording) -> PlatformerSimulation:
+    """
+    Replay a recording and check it ends the way it did when recorded
+
+    Args:
+       recording (Recording): The recording to check
+
+    Returns:
+       PlatformerSimulation: The simulation after the last step
+
+    Raises:
+       ReplayError: If the score, level or position doesn't match
+    """
+    simulation = replay(recording)
+    score, x, y, level = recording.final
+
+    if simulation.score != score or simulation.level != level:
+        raise ReplayError(
+            f"expected score {score} on level {level}, got "
+            f"{simulation.score} on level {simulation.level}"
+        )
+
+    player = simulation.player
+    if (
+        abs(player.center_x - x) > POSITION_TOLERANCE
+        or abs(player.center_y - y) > POSITION_TOLERANCE
+    ):
+        raise ReplayError(
+            f"expected player at ({x:.2f}, {y:.2f}), got "
+            f"({player.center_x:.2f}, {player.center_y:.2f})"
+        )
+
+    return simulation
+
+
+if __name__ == "__main__":
+    # Replay every file given and report which ones still match
+    failures = 0
+    for name in sys.argv[1:]:
+        recording = Recording.load(name)
+        start = time.perf_counter()
+        try:
+            verify(recording)
+            result = "ok"
+        except ReplayError as error:
+            failures += 1
+            result = f"FAILED: {error}"
+        elapsed = time.perf_counter() - start
+        rate = recording.ticks / elapsed if elapsed else 0
+        print(f"{name}: {recording.ticks} ticks, {rate:.0f} ticks/s, {result}")
+
+    sys.exit(1 if failures else 0)
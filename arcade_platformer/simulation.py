@@ -0,0 +1,709 @@
+"""
+Arcade Platformer simulation
+
+The game logic for the platformer, with no window, views or sound.
+PlatformerView drives one of these from its on_update and draws the
+sprites it owns, but it can also be stepped on its own as fast as the
+CPU allows:
+
+    simulation = PlatformerSimulation()
+    simulation.setup()
+    for _ in range(10_000):
+        simulation.set_input(move_x=1)
+        simulation.step()
+"""
+# simulation.py
+
+import pathlib
+import time
+
+import arcade
+import numpy as np
+
+from collision import SpatialGrid
+from constants import (
+    ASSETS_PATH,
+    GRAVITY,
+    MAX_STEPS_PER_UPDATE,
+    PLAYER_JUMP_SPEED,
+    PLAYER_MOVE_SPEED,
+    PLAYER_START_X,
+    PLAYER_START_Y,
+    UPDATE_RATE,
+)
+from enemies import EnemySystem
+from level_format import compiled_path
+from levels import (
+    BACKGROUND_LAYER,
+    COIN_LAYER,
+    GOAL_LAYER,
+    LADDERS_LAYER,
+    LEVEL_CACHE,
+    MOVING_PLATFORMS_LAYER,
+    WALL_LAYER,
+    LevelData,
+)
+from physics import GridPhysicsEngine, TileBoxes
+from platforms import MovingPlatformSystem
+from pooling import SpritePool
+from profiler import FrameProfiler
+from state import GameState
+from textures import TEXTURES
+
+# Events reported by step() so the caller can react (play sounds,
+# switch views) without the simulation knowing about either
+EVENT_JUMP = "jump"
+EVENT_COIN = "coin"
+EVENT_DEATH = "death"
+EVENT_LEVEL_COMPLETE = "level_complete"
+
+# Physics modes: arcade's sprite-based engine, or tile grid lookups
+PHYSICS_SPRITES = "sprites"
+PHYSICS_GRID = "grid"
+
+
+class PlatformerSimulation:
+    """ Owns the level state and advances it in fixed time steps. """
+    def __init__(
+        self,
+        level: int = 1,
+        profiler: FrameProfiler = None,
+        map_path: pathlib.Path = None,
+        pool: SpritePool = None,
+        physics: str = PHYSICS_SPRITES,
+    ) -> None:
+        """
+        Create the simulation
+
+        Args:
+           level (int): Which level to start on
+           profiler (FrameProfiler): Times the stages of each step;
+              a disabled one is made if none is given
+           map_path (pathlib.Path): Play this map instead of the
+              level's own, such as a generated stress map
+           pool (SpritePool): Recycles sprites between levels; one is
+              made if none is given
+           physics (str): PHYSICS_SPRITES for arcade's engine, or
+              PHYSICS_GRID to collide with tile grids
+        """
+        # Lists to hold different sets of sprites
+        self.coins = None
+        self.background = None
+        self.walls = None
+        self.ladders = None
+        self.goals = None
+        self.enemies = None
+
+        # Enemy positions and speeds, kept in arrays
+        self.enemy_system = None
+
+        # One sprite for the player
+        self.player = None
+
+        # Moving platforms, kept apart from the static collision grids,
+        # and the arrays that move them
+        self.moving_platforms = None
+        self.platform_system = None
+
+        # Which coins are uncollected, by their place in the coins list
+        self.coins_alive = None
+        self.coin_index = {}
+
+        # Collision grids for the layers that never move
+        self.wall_grid = None
+        self.coin_grid = None
+        self.goal_grid = None
+
+        # Platform game needs a physics engine
+        self.physics = physics
+        self.physics_engine = None
+
+        # Store the player's score
+        self.score = 0
+
+        # Store the level the player is on
+        self.level = level
+
+        # A map to play in place of the current level's, if any
+        self.map_path = map_path
+
+        # The map the sprites were built from, and spares from old maps
+        self.level_data = None
+        self.pool = pool if pool is not None else SpritePool()
+
+        # Streams map regions around the player in world mode, if set
+        self.streamer = None
+
+        # Map details needed by whoever draws the level
+        self.map_width = 0
+        self.tile_size = 0
+        self.background_color = arcade.color.FRESH_AIR
+
+        # Current player input, set by the caller before each step
+        self.move_x = 0.0
+        self.move_y = 0.0
+        self.jump_requested = False
+
+        # The climbing input last applied. Like pressing or letting go
+        # of a key, only a change sets the speed on a ladder, so a jump
+        # carries on up one until the input changes
+        self.climb_y = 0.0
+
+        # Time banked by advance() but not yet simulated
+        self.accumulator = 0.0
+
+        # How many steps have been run in total
+        self.tick = 0
+
+        # Captures the input of every step while recording, if set
+        self.recorder = None
+
+        # Times the stages of each step while enabled
+        self.profiler = profiler if profiler is not None else FrameProfiler()
+
+        # Where the player was last killed, if they have been
+        self.death_position = None
+
+        # How long, in seconds, the last setup() took
+        self.last_setup_time = 0.0
+
+        # How long each switch to a new level took, in seconds
+        self.transition_times = []
+
+    def setup(self) -> None:
+        """ Sets up the simulation for the current level """
+        setup_start = time.perf_counter()
+
+        # Load the current map, parsing it only the first time
+        level_data = LEVEL_CACHE.load(
+            self.map_path or level_map_path(self.level)
+        )
+
+        # Restarting the same map re-arms the sprites already in place
+        if self.pool.enabled and level_data is self.level_data:
+            self.restart()
+        else:
+            self.load_level(level_data)
+            self.reset_player()
+
+            # Load the physics engine for this map
+            self.physics_engine = self.create_physics_engine(level_data)
+
+            # Get the next level ready while this one is played
+            LEVEL_CACHE.prefetch(level_map_path(self.level + 1))
+
+        self.last_setup_time = time.perf_counter() - setup_start
+
+    def restart(self) -> None:
+        """
+        Starts the current level over, undoing only what play changed
+
+        Nothing is loaded or rebuilt, so this takes about as long on a
+        huge map as on a small one.
+        """
+        if self.level_data is None or not self.pool.enabled:
+            self.setup()
+            return
+
+        self.reset_level()
+        self.reset_player()
+
+    def reset_player(self) -> None:
+        """ Puts the player at the start, with no input pending """
+        # Create the player sprite if they're not already set up
+        if not self.player:
+            self.player = create_player_sprite()
+
+        # Move the player sprite to the initial position
+        self.player.center_x = PLAYER_START_X
+        self.player.center_y = PLAYER_START_Y
+        self.player.change_x = 0
+        self.player.change_y = 0
+
+        # Stand facing right again, as a new sprite would, so the
+        # animation picks the same textures as in a fresh game
+        self.player.state = arcade.FACE_RIGHT
+        self.player.texture = self.player.stand_right_textures[0]
+        self.player.cur_texture_index = 0
+        self.player.last_texture_change_center_x = 0
+        self.player.last_texture_change_center_y = 0
+
+        # Forget any input and time left over from the last attempt
+        self.set_input()
+        self.climb_y = 0.0
+        self.accumulator = 0.0
+
+    def load_level(self, level_data: LevelData) -> None:
+        """
+        Builds the sprites for a newly loaded map
+
+        Sprites from the previous map go back into the pool first, so
+        the new layers are made from them where possible.
+
+        Args:
+           level_data (LevelData): The parsed map
+        """
+        self.pool.release(
+            self.background,
+            self.walls,
+            self.ladders,
+            self.goals,
+            self.coins,
+            self.moving_platforms,
+            self.enemies,
+        )
+        self.level_data = level_data
+
+        # Build the layers
+        # The physics engine checks walls and ladders itself, so let
+        # arcade hash those lists
+        self.background = level_data.create_layer(
+            BACKGROUND_LAYER, pool=self.pool
+        )
+        self.goals = level_data.create_layer(GOAL_LAYER, pool=self.pool)
+        self.walls = level_data.create_layer(
+            WALL_LAYER, use_spatial_hash=True, pool=self.pool
+        )
+        self.ladders = level_data.create_layer(
+            LADDERS_LAYER, use_spatial_hash=True, pool=self.pool
+        )
+        self.coins = level_data.create_layer(COIN_LAYER, pool=self.pool)
+        self.coins_alive = np.ones(len(self.coins), dtype=bool)
+        self.coin_index = {
+            id(coin): index for index, coin in enumerate(self.coins)
+        }
+
+        # Index the static layers before the moving platforms join walls
+        self.wall_grid = SpatialGrid.from_sprites(
+            self.walls, level_data.tile_size
+        )
+        self.coin_grid = SpatialGrid.from_sprites(
+            self.coins, level_data.tile_size
+        )
+        self.goal_grid = SpatialGrid.from_sprites(
+            self.goals, level_data.tile_size
+        )
+
+        # Set up the moving platforms, moved together in arrays
+        self.moving_platforms = level_data.create_layer(
+            MOVING_PLATFORMS_LAYER, pool=self.pool
+        )
+        self.platform_system = MovingPlatformSystem(
+            level_data.layers[MOVING_PLATFORMS_LAYER], self.moving_platforms
+        )
+
+        # arcade's engine only takes one list of things to stand on, so
+        # it has to find the platforms among the walls
+        if self.physics == PHYSICS_SPRITES:
+            for sprite in self.moving_platforms:
+                self.walls.append(sprite)
+
+        # Remember the background color for the view to apply
+        self.background_color = level_data.background_color
+
+        # Find the map size to control viewport scrolling
+        self.map_width = level_data.map_width
+        self.tile_size = level_data.tile_size
+
+        # Set up the enemies
+        self.enemy_system = self.create_enemy_system(level_data)
+        self.enemies = self.enemy_system.sprites
+
+    def reset_level(self) -> None:
+        """ Puts the current map's sprites back the way they started """
+        # Bring back only the coins collected since the last reset
+        for index in np.flatnonzero(~self.coins_alive):
+            self.set_coin_alive(index, True)
+
+        # Platforms and enemies are always moving, so reset them all
+        self.platform_system.reset()
+        self.enemy_system.reset()
+
+    def create_physics_engine(self, level_data: LevelData):
+        """
+        Creates the physics engine for the player
+
+        Args:
+           level_data (LevelData): The parsed map
+
+        Returns:
+           The engine for the simulation's physics mode
+        """
+        if self.physics == PHYSICS_GRID:
+            return GridPhysicsEngine(
+                player_sprite=self.player,
+                walls=TileBoxes(
+                    level_data.layers[WALL_LAYER], level_data.tile_size
+                ),
+                ladders=TileBoxes(
+                    level_data.layers[LADDERS_LAYER], level_data.tile_size
+                ),
+                platforms=self.platform_system,
+                gravity_constant=GRAVITY,
+            )
+
+        return arcade.PhysicsEnginePlatformer(
+            player_sprite=self.player,
+            platforms=self.walls,
+            gravity_constant=GRAVITY,
+            ladders=self.ladders
+        )
+
+    def create_enemy_system(self, level_data: LevelData) -> EnemySystem:
+        """
+        Creates the enemies placed in the level's Enemies layer
+
+        Args:
+           level_data (LevelData): The parsed map
+
+        Returns:
+           EnemySystem: Every enemy on the level
+        """
+        return EnemySystem(
+            level_data.enemy_spawns,
+            level_data.tile_grid(WALL_LAYER),
+            level_data.tile_size,
+            pool=self.pool,
+        )
+
+    def collect_coin(self, coin: arcade.Sprite) -> None:
+        """
+        Scores a coin and hides it until the level is reset
+
+        Args:
+           coin (arcade.Sprite): The coin the player touched
+        """
+        # Add the coin value to the score
+        self.score += int(coin.properties["point_value"])
+
+        # Hide the coin rather than remove it, so a restart can re-arm it
+        self.set_coin_alive(self.coin_index[id(coin)], False)
+
+    def set_coin_alive(self, index: int, alive: bool) -> None:
+        """
+        Shows or hides a coin, adding or removing it from collisions
+
+        Whether a coin is there is only kept in coins_alive; a collected
+        coin stays in its sprite lists, drawn fully transparent.
+
+        Args:
+           index (int): The coin's place in the coins list
+           alive (bool): Whether it is there to be collected
+        """
+        coin = self.coins[index]
+        coin.alpha = 255 if alive else 0
+        if alive:
+            self.coin_grid.add(coin)
+        else:
+            self.coin_grid.remove(coin)
+        self.coins_alive[index] = alive
+
+    def snapshot(self) -> GameState:
+        """
+        Captures everything play can change, without copying sprites
+
+        Returns:
+           GameState: The current state, to hand back to restore()
+        """
+        player = self.player
+        return GameState(
+            level=self.level,
+            map_path=self.map_path,
+            score=self.score,
+            tick=self.tick,
+            player=(
+                player.center_x,
+                player.center_y,
+                player.change_x,
+                player.change_y,
+            ),
+            coins_alive=np.packbits(self.coins_alive),
+            coin_count=len(self.coins_alive),
+            enemies=np.stack(
+                (self.enemy_system.x, self.enemy_system.change_x)
+            ),
+            platforms=np.stack(
+                (
+                    self.platform_system.x,
+                    self.platform_system.y,
+                    self.platform_system.change_x,
+                    self.platform_system.change_y,
+                ),
+                axis=1,
+            ),
+            climb_y=self.climb_y,
+        )
+
+    def restore(self, state: GameState) -> None:
+        """
+        Puts the simulation back into a captured state
+
+        Only the level is loaded, and only if the state is from another
+        map; after that, just the coins that differ are touched and the
+        rest is copied from the state's arrays.
+
+        Args:
+           state (GameState): A state from snapshot()
+        """
+        if (
+            self.level_data is None
+            or state.level != self.level
+            or state.map_path != self.map_path
+        ):
+            self.level = state.level
+            self.map_path = state.map_path
+            self.setup()
+
+        alive = state.unpack_coins()
+        for index in np.flatnonzero(alive != self.coins_alive):
+            self.set_coin_alive(index, bool(alive[index]))
+
+        self.enemy_system.x[:] = state.enemies[0]
+        self.enemy_system.change_x[:] = state.enemies[1]
+
+        platforms = self.platform_system
+        platforms.x[:] = state.platforms[:, 0]
+        platforms.y[:] = state.platforms[:, 1]
+        platforms.change_x[:] = state.platforms[:, 2]
+        platforms.change_y[:] = state.platforms[:, 3]
+        platforms.reposition()
+
+        (
+            self.player.center_x,
+            self.player.center_y,
+            self.player.change_x,
+            self.player.change_y,
+        ) = state.player
+
+        self.score = state.score
+        self.tick = state.tick
+        self.climb_y = state.climb_y
+
+    def set_input(
+        self, move_x: float = 0.0, move_y: float = 0.0, jump: bool = False
+    ) -> None:
+        """
+        Sets the player input used by the next step
+
+        Args:
+           move_x (float): Horizontal movement, -1.0 (left) to 1.0 (right)
+           move_y (float): Climbing movement, -1.0 (down) to 1.0 (up)
+           jump (bool): Whether the player wants to jump
+        """
+        self.move_x = move_x
+        self.move_y = move_y
+        self.jump_requested = jump
+
+    def advance(self, delta_time: float) -> list:
+        """
+        Runs as many fixed steps as fit in the elapsed time
+
+        Args:
+           delta_time (float): How much time since the last call
+
+        Returns:
+           list: The events reported by every step that was run
+        """
+        # Bank the time, but never more than we are willing to catch up on
+        self.accumulator = min(
+            self.accumulator + delta_time, MAX_STEPS_PER_UPDATE * UPDATE_RATE
+        )
+
+        events = []
+        while self.accumulator >= UPDATE_RATE:
+            self.accumulator -= UPDATE_RATE
+            events.extend(self.step())
+        return events
+
+    def step(self) -> list:
+        """
+        Advances the simulation by exactly one fixed time step
+
+        Returns:
+           list: The events that happened during this step
+        """
+        events = []
+        self.tick += 1
+
+        # Note the input before the step uses it up
+        if self.recorder is not None:
+            self.recorder.capture(self)
+
+        # Apply the player's horizontal movement
+        self.player.change_x = self.move_x * PLAYER_MOVE_SPEED
+
+        # Climbing only works on ladders, and only starts or stops when
+        # the input changes
+        if self.move_y != self.climb_y:
+            self.climb_y = self.move_y
+            if self.physics_engine.is_on_ladder():
+                self.player.change_y = self.move_y * PLAYER_MOVE_SPEED
+
+        # Jumps are requested once and used up here
+        if self.jump_requested:
+            self.jump_requested = False
+            if self.physics_engine.can_jump():
+                self.player.change_y = PLAYER_JUMP_SPEED
+                events.append(EVENT_JUMP)
+
+        # Update the player animation
+        self.player.update_animation(UPDATE_RATE)
+
+        # Move every enemy at once
+        with self.profiler.section("enemies"):
+            self.enemy_system.update(self.platform_system.boxes)
+
+        # Update the player movement based on physics engine
+        with self.profiler.section("physics"):
+            self.physics_engine.update()
+
+        # Move every platform at once, carrying the player along
+        with self.profiler.section("platforms"):
+            self.platform_system.update(self.player)
+
+            # arcade's engine collides with the sprites themselves
+            if self.physics == PHYSICS_SPRITES:
+                self.platform_system.sync_sprites()
+
+        # Prevent player from walking off screen
+        if self.player.left < 0:
+            self.player.left = 0
+
+        with self.profiler.section("collisions"):
+            # Check if the player has picked up a coin
+            coins_hit = self.coin_grid.collisions(self.player)
+
+            # Has Roz collided with an enemy?
+            enemies_hit = self.enemy_system.collisions(self.player)
+
+            # Check if the player has reached the goal
+            goal_hit = self.goal_grid.collisions(self.player)
+
+        for coin in coins_hit:
+            self.collect_coin(coin)
+            events.append(EVENT_COIN)
+
+        if enemies_hit:
+            # Remember where it happened, then start the level over
+            self.death_position = (self.player.center_x, self.player.center_y)
+            self.restart()
+            events.append(EVENT_DEATH)
+            return events
+
+        if goal_hit:
+            # Set up the next level
+            self.level += 1
+            self.map_path = None
+            self.setup()
+            self.transition_times.append(self.last_setup_time)
+            events.append(EVENT_LEVEL_COMPLETE)
+
+        return events
+
+
+def level_map_path(level: int) -> pathlib.Path:
+    """
+    Finds the map file for a level
+
+    A compiled level is used if there is one at least as new as the TMX
+    file it was compiled from.
+
+    Args:
+       level (int): Which level
+
+    Returns:
+       pathlib.Path: Path to the level's compiled or TMX file
+    """
+    tmx_path = ASSETS_PATH / f"platform_level_{level:02}.tmx"
+    lvl_path = compiled_path(tmx_path)
+    if lvl_path.exists() and (
+        not tmx_path.exists()
+        or lvl_path.stat().st_mtime_ns >= tmx_path.stat().st_mtime_ns
+    ):
+        return lvl_path
+    return tmx_path
+
+
+def create_player_sprite() -> arcade.AnimatedWalkingSprite:
+    """
+    Creates the animated player sprite
+
+    Returns:
+       The properly set up player sprite
+    """
+    # Path to the textures for the image animation
+    texture_path = ASSETS_PATH / "images" / "player"
+
+    # Set up the appropriate textures
+    walking_paths = [
+        texture_path / f"alienGreen_walk{x}.png" for x in (1, 2)
+    ]
+    climbing_paths = [
+        texture_path / f"alienGreen_climb{x}.png" for x in (1, 2)
+    ]
+    standing_path = texture_path / f"alienGreen_stand.png"
+
+    # Get the textures, loading each image only once
+    walking_right_textures = TEXTURES.get_all(walking_paths)
+    walking_left_textures = TEXTURES.get_all(walking_paths, mirrored=True)
+    walking_up_textures = TEXTURES.get_all(climbing_paths)
+    walking_down_textures = TEXTURES.get_all(climbing_paths, mirrored=True)
+    standing_right_textures = [TEXTURES.get(standing_path)]
+    standing_left_textures = [TEXTURES.get(standing_path, mirrored=True)]
+
+    # Create the sprite
+    player = arcade.AnimatedWalkingSprite()
+
+    # Add the proper textures
+    player.stand_left_textures = standing_left_textures
+    player.stand_right_textures = standing_right_textures
+    player.walk_left_textures = walking_left_textures
+    player.walk_right_textures = walking_right_textures
+    player.walk_up_textures = walking_up_textures
+    player.walk_down_textures = walking_down_textures
+
+    # Set the player defaults
+    player.center_x = PLAYER_START_X
+    player.center_y = PLAYER_START_Y
+    player.state = arcade.FACE_RIGHT
+
+    # Set the initial texture
+    player.texture = player.stand_right_textures[0]
+
+    # arcade keeps the hit box of whichever texture is showing when it
+    # is first needed, so take it from the standing texture now rather
+    # than from wherever the first step's animation happens to be
+    player.hit_box = player.texture.hit_box_points
+
+    return player
+
+
+def run_headless(ticks: int, level: int = 1) -> PlatformerSimulation:
+    """
+    Runs the simulation without a window, holding right the whole time
+
+    Args:
+       ticks (int): How many fixed steps to run
+       level (int): Which level to run
+
+    Returns:
+       PlatformerSimulation: The simulation after the last step
+    """
+    simulation = PlatformerSimulation(level)
+    simulation.setup()
+    for _ in range(ticks):
+        simulation.set_input(move_x=1.0)
+        simulation.step()
+    return simulation
+
+
+if __name__ == "__main__":
+    # Quick check of how fast the simulation runs without a window
+    ticks = 10_000
+    start = time.perf_counter()
+    simulation = run_headless(ticks)
+    elapsed = time.perf_counter() - start
+    print(
+        f"{ticks} ticks in {elapsed:.2f}s "
+        f"({ticks / elapsed:.0f} ticks/s), score {simulation.score}"
+    )
@@ -0,0 +1,99 @@
+"""
+Arcade Platformer startup timing
+
+The first screen should appear as soon as the window does. Startup keeps
+the time of each stage from creating the window to drawing the first
+frame, checks the total against STARTUP_BUDGET, and once that frame is
+up, runs a warm-up function on a background thread to load what the
+game will need next while the player is looking at the title screen.
+"""
+# startup.py
+
+import threading
+import time
+
+from constants import STARTUP_BUDGET
+
+
+class Startup:
+    """ Times startup stages and warms assets once the game is showing. """
+    def __init__(
+        self,
+        warm_up=None,
+        budget: float = STARTUP_BUDGET,
+        report: bool = False,
+    ) -> None:
+        """
+        Start the clock
+
+        Args:
+           warm_up: Called with no arguments on a background thread
+              after the first frame, if set
+           budget (float): Most seconds allowed until the first frame
+           report (bool): Print the timings when startup is done
+        """
+        self.warm_up = warm_up
+        self.budget = budget
+        self.report = report
+
+        # (stage, seconds since the previous stage), in order
+        self.start = time.perf_counter()
+        self.last = self.start
+        self.stages = []
+
+        # How long the warm-up took, once it has finished
+        self.warm_up_time = None
+        self.warm_up_thread = None
+
+    def mark(self, stage: str) -> None:
+        """
+        Note that a stage of startup has finished
+
+        Args:
+           stage (str): What just finished
+        """
+        now = time.perf_counter()
+        self.stages.append((stage, now - self.last))
+        self.last = now
+
+    @property
+    def total(self) -> float:
+        """ Seconds from the start to the last stage marked. """
+        return self.last - self.start
+
+    def first_frame(self) -> None:
+        """ Note the first frame, then report and start the warm-up. """
+        self.mark("first frame")
+        if self.report:
+            print(self.summary())
+
+        if self.warm_up is not None:
+            self.warm_up_thread = threading.Thread(
+                target=self._warm, name="warm-up", daemon=True
+            )
+            self.warm_up_thread.start()
+
+    def _warm(self) -> None:
+        """ Warm-up thread body: run the warm-up and time it. """
+        start = time.perf_counter()
+        self.warm_up()
+        self.warm_up_time = time.perf_counter() - start
+        if self.report:
+            print(f"warm-up: {self.warm_up_time * 1000:.1f} ms in background")
+
+    def summary(self) -> str:
+        """
+        Describe how long each stage took, against the budget
+
+        Returns:
+           str: Each stage and the total in milliseconds
+        """
+        stages = ", ".join(
+            f"{stage} {seconds * 1000:.1f} ms"
+            for stage, seconds in self.stages
+        )
+        verdict = "within" if self.total <= self.budget else "OVER"
+        return (
+            f"startup: {stages}; total {self.total * 1000:.1f} ms, "
+            f"{verdict} budget of {self.budget * 1000:.0f} ms"
+        )
@@ -0,0 +1,105 @@
+"""
+Arcade Platformer game state snapshots
+
+Everything that changes while a level is played fits in a handful of
+numbers and small arrays: the player's position and speed, which coins
+are still there, where each enemy and moving platform is, the score and
+the level. A GameState holds just that, so saving and restoring a game
+costs time in proportion to those arrays instead of deep-copying
+sprites. That makes rewinding, predicting ahead for netplay and search-
+based AI cheap enough to do every step:
+
+    state = simulation.snapshot()
+    ...
+    simulation.restore(state)
+"""
+# state.py
+
+import numpy as np
+
+
+class GameState:
+    """ The changing part of a simulation, in plain numbers and arrays. """
+    __slots__ = (
+        "level",
+        "map_path",
+        "score",
+        "tick",
+        "player",
+        "coins_alive",
+        "coin_count",
+        "enemies",
+        "platforms",
+        "collected",
+        "climb_y",
+    )
+
+    def __init__(
+        self,
+        level: int,
+        map_path,
+        score: int,
+        tick: int,
+        player: tuple,
+        coins_alive: np.ndarray,
+        coin_count: int,
+        enemies: np.ndarray,
+        platforms: np.ndarray,
+        collected: np.ndarray = None,
+        climb_y: float = 0.0,
+    ) -> None:
+        """
+        Hold one moment of a game
+
+        Args:
+           level (int): The level being played
+           map_path (pathlib.Path): The map played in its place, if any
+           score (int): The player's score
+           tick (int): How many steps had been run
+           player (tuple): Player center x, center y, change x, change y
+           coins_alive (np.ndarray): One bit per coin, packed with
+              np.packbits, set while the coin is uncollected
+           coin_count (int): How many coins the bits stand for
+           enemies (np.ndarray): Enemy x positions and speeds, shape
+              (2, enemies)
+           platforms (np.ndarray): Moving platform center x, center y,
+              change x and change y, shape (platforms, 4)
+           collected (np.ndarray): For a streamed world, the region and
+              coin index of each coin collected, shape (coins, 2);
+              None for a single map
+           climb_y (float): The climbing input last applied, which a
+              ladder only reacts to when it changes
+        """
+        self.level = level
+        self.map_path = map_path
+        self.score = score
+        self.tick = tick
+        self.player = player
+        self.coins_alive = coins_alive
+        self.coin_count = coin_count
+        self.enemies = enemies
+        self.platforms = platforms
+        self.collected = collected
+        self.climb_y = climb_y
+
+    def unpack_coins(self) -> np.ndarray:
+        """
+        Expand the coin bits
+
+        Returns:
+           np.ndarray: A bool per coin, True if it is uncollected
+        """
+        return np.unpackbits(
+            self.coins_alive, count=self.coin_count
+        ).astype(bool)
+
+    @property
+    def nbytes(self) -> int:
+        """ Bytes held by the state's arrays. """
+        collected = 0 if self.collected is None else self.collected.nbytes
+        return (
+            self.coins_alive.nbytes
+            + self.enemies.nbytes
+            + self.platforms.nbytes
+            + collected
+        )
@@ -0,0 +1,261 @@
+"""
+Arcade Platformer stress maps
+
+Writes large random TMX maps for testing how the game copes with levels
+far bigger than the shipped ones, and measures how long drawing them
+takes with and without chunked rendering.
+
+Make a 1000x200 tile map and time it:
+
+    python stress_map.py --width 1000 --height 200 --bench
+"""
+# stress_map.py
+
+import argparse
+import pathlib
+import random
+import time
+
+import arcade
+
+from baking import BakedLayer
+from chunks import ChunkedLayer
+from constants import ASSETS_PATH, SCREEN_HEIGHT, SCREEN_WIDTH
+from levels import (
+    BACKGROUND_LAYER,
+    COIN_LAYER,
+    ENEMY_LAYER,
+    GOAL_LAYER,
+    LADDERS_LAYER,
+    LEVEL_CACHE,
+    WALL_LAYER,
+)
+
+# Tile ids in arcade_platformer.tsx, plus one for the tileset's firstgid
+GRASS_MID = 17
+GRASS_CENTER = 3
+COIN_GOLD = 24
+SIGN_EXIT = 34
+LADDER_MID = 32
+TORCH = 37
+
+# Tileset image size
+TILE_PIXELS = 128
+
+
+def generate_stress_map(
+    width: int,
+    height: int,
+    seed: int = 0,
+    path: pathlib.Path = None,
+    enemies: int = 0,
+) -> pathlib.Path:
+    """
+    Writes a random map of the given size
+
+    The map has a solid floor, floating platforms with ladders and coins
+    scattered over them, some background torches, and an exit at the far
+    right. It uses the game's tileset, so it is written next to it in
+    the assets folder unless told otherwise.
+
+    Args:
+       width (int): Map width in tiles
+       height (int): Map height in tiles
+       seed (int): Seed for the random layout
+       path (pathlib.Path): Where to write the map
+       enemies (int): How many enemies to spread along the floor
+
+    Returns:
+       pathlib.Path: The file written
+    """
+    rng = random.Random(seed)
+    if path is None:
+        path = ASSETS_PATH / f"stress_level_{width}x{height}_{enemies}.tmx"
+
+    # Rows are listed top to bottom, as Tiled stores them
+    ground = [[0] * width for _ in range(height)]
+    ladders = [[0] * width for _ in range(height)]
+    background = [[0] * width for _ in range(height)]
+    goal = [[0] * width for _ in range(height)]
+    coins = []
+
+    # A floor two tiles deep
+    for column in range(width):
+        ground[height - 1][column] = GRASS_CENTER
+        ground[height - 2][column] = GRASS_MID
+
+    # Floating platforms every few tiles, with a ladder up to each
+    for column in range(4, width - 8, 6):
+        row = rng.randrange(2, height - 4)
+        length = rng.randrange(2, 5)
+        for offset in range(length):
+            ground[row][column + offset] = GRASS_MID
+        for ladder_row in range(row, height - 2):
+            ladders[ladder_row][column - 1] = LADDER_MID
+
+        # Coins sit on top of the platform
+        if rng.random() < 0.5 and row > 0:
+            coins.append((column + length // 2, row - 1))
+
+    # Torches along the floor
+    for column in range(1, width - 1, 9):
+        background[height - 3][column] = TORCH
+
+    # The exit at the far right
+    goal[height - 3][width - 2] = SIGN_EXIT
+
+    # Enemies stand on the floor, spread evenly from left to right
+    floor_top = 2 * TILE_PIXELS
+    enemy_xml = "".join(
+        f'  <object id="{len(coins) + index + 1}" name="slime" '
+        f'x="{TILE_PIXELS * (2 + index * (width - 4) / enemies):.1f}" '
+        f'y="{height * TILE_PIXELS - floor_top - TILE_PIXELS / 2}">\n'
+        f'   <point/>\n'
+        f'  </object>\n'
+        for index in range(enemies)
+    )
+
+    def layer_xml(layer_id: int, name: str, tiles: list) -> str:
+        rows = ",\n".join(",".join(str(gid) for gid in row) for row in tiles)
+        return (
+            f' <layer id="{layer_id}" name="{name}" '
+            f'width="{width}" height="{height}">\n'
+            f'  <data encoding="csv">\n{rows}\n</data>\n'
+            f' </layer>\n'
+        )
+
+    coin_xml = "".join(
+        f'  <object id="{index + 1}" gid="{COIN_GOLD}" '
+        f'x="{column * TILE_PIXELS}" y="{(row + 1) * TILE_PIXELS}" '
+        f'width="{TILE_PIXELS}" height="{TILE_PIXELS}">\n'
+        f'   <properties>\n'
+        f'    <property name="point_value" type="int" value="10"/>\n'
+        f'   </properties>\n'
+        f'  </object>\n'
+        for index, (column, row) in enumerate(coins)
+    )
+
+    path.write_text(
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        f'<map version="1.5" tiledversion="1.7.2" orientation="orthogonal" '
+        f'renderorder="right-down" width="{width}" height="{height}" '
+        f'tilewidth="{TILE_PIXELS}" tileheight="{TILE_PIXELS}" infinite="0" '
+        f'nextlayerid="7" nextobjectid="{len(coins) + enemies + 1}">\n'
+        ' <tileset firstgid="1" source="arcade_platformer.tsx"/>\n'
+        + layer_xml(1, LADDERS_LAYER, ladders)
+        + layer_xml(2, WALL_LAYER, ground)
+        + layer_xml(3, BACKGROUND_LAYER, background)
+        + layer_xml(4, GOAL_LAYER, goal)
+        + f' <objectgroup id="5" name="{COIN_LAYER}">\n'
+        + coin_xml
+        + ' </objectgroup>\n'
+        + f' <objectgroup id="6" name="{ENEMY_LAYER}">\n'
+        + enemy_xml
+        + ' </objectgroup>\n'
+        '</map>\n'
+    )
+    return path
+
+
+def benchmark_draw(map_path: pathlib.Path, frames: int = 200) -> dict:
+    """
+    Times drawing a map with whole layers, with visible chunks only,
+    and with the background and ground baked
+
+    Opens a hidden window, then scrolls across the map drawing each
+    frame every way. Baked pieces are painted as they come on screen,
+    so that time counts too. Frames that only clear the screen are timed too,
+    as the floor under both: what is left above it is the cost of the
+    sprites.
+
+    Args:
+       map_path (pathlib.Path): The map to draw
+       frames (int): How many frames to draw each way
+
+    Returns:
+       dict: Load time and milliseconds per frame for each method,
+          and for clearing alone
+    """
+    from pyglet import gl
+
+    window = arcade.Window(SCREEN_WIDTH, SCREEN_HEIGHT, visible=False)
+
+    load_start = time.perf_counter()
+    level_data = LEVEL_CACHE.load(map_path)
+    layer_names = (BACKGROUND_LAYER, WALL_LAYER, COIN_LAYER, GOAL_LAYER,
+                   LADDERS_LAYER)
+    layers = [level_data.create_layer(name) for name in layer_names]
+    load_time = time.perf_counter() - load_start
+
+    chunk_start = time.perf_counter()
+    chunked = [ChunkedLayer(layer, level_data.tile_size) for layer in layers]
+    chunk_time = time.perf_counter() - chunk_start
+
+    # As the game draws with --bake: the background and ground baked,
+    # the rest chunked
+    baked = [BakedLayer(layers[:2])] + chunked[2:]
+
+    # Walk the viewport along the floor of the map
+    max_left = max(level_data.map_width - SCREEN_WIDTH, 0)
+    lefts = [max_left * frame / max(frames - 1, 1) for frame in range(frames)]
+
+    def time_frames(draw_frame) -> float:
+        start = time.perf_counter()
+        for left in lefts:
+            arcade.set_viewport(left, left + SCREEN_WIDTH, 0, SCREEN_HEIGHT)
+            arcade.start_render()
+            draw_frame(left)
+            gl.glFinish()
+        return (time.perf_counter() - start) / frames * 1000
+
+    def draw_nothing(left: float) -> None:
+        pass
+
+    def draw_everything(left: float) -> None:
+        for layer in layers:
+            layer.draw()
+
+    def draw_visible(left: float) -> None:
+        for layer in chunked:
+            layer.draw(left, 0, SCREEN_WIDTH, SCREEN_HEIGHT)
+
+    def draw_baked(left: float) -> None:
+        for layer in baked:
+            layer.draw(left, 0, SCREEN_WIDTH, SCREEN_HEIGHT)
+
+    # Draw once each way first so GPU uploads aren't counted
+    draw_everything(0)
+    draw_visible(0)
+
+    results = {
+        "sprites": sum(len(layer) for layer in layers),
+        "load_seconds": load_time,
+        "chunk_seconds": chunk_time,
+        "clear_ms_per_frame": time_frames(draw_nothing),
+        "full_ms_per_frame": time_frames(draw_everything),
+        "chunked_ms_per_frame": time_frames(draw_visible),
+        "baked_ms_per_frame": time_frames(draw_baked),
+    }
+    window.close()
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--width", type=int, default=1000)
+    parser.add_argument("--height", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--enemies", type=int, default=0)
+    parser.add_argument("--bench", action="store_true")
+    parser.add_argument("--frames", type=int, default=200)
+    args = parser.parse_args()
+
+    map_path = generate_stress_map(
+        args.width, args.height, args.seed, enemies=args.enemies
+    )
+    print(f"Wrote {map_path}")
+
+    if args.bench:
+        for name, value in benchmark_draw(map_path, args.frames).items():
+            print(f"{name}: {value:.3f}" if isinstance(value, float)
+                  else f"{name}: {value}")
@@ -0,0 +1,94 @@
+"""
+Arcade Platformer texture registry
+
+Loads each image once per process and hands the same Texture object to
+everyone who asks for it. Mirrored versions are made by flipping the
+image already in memory rather than decoding the file again.
+
+Sharing Texture objects also keeps sprite lists small on the GPU: arcade
+packs the textures of a SpriteList into one atlas, and identical
+textures only take up one slot.
+"""
+# textures.py
+
+import pathlib
+import threading
+
+import arcade
+from PIL import ImageOps
+
+from constants import ASSETS_PATH
+
+
+class TextureRegistry:
+    """ One shared Texture per image file and orientation. """
+    def __init__(self) -> None:
+        self.textures = {}
+
+        # Levels are prefetched on a worker thread, so guard the dict
+        self.lock = threading.RLock()
+
+    def get(self, path: pathlib.Path, mirrored: bool = False) -> arcade.Texture:
+        """
+        Get the texture for an image, loading it on first use
+
+        Args:
+           path (pathlib.Path): The image file
+           mirrored (bool): Whether to flip the image left to right
+
+        Returns:
+           arcade.Texture: The shared texture
+        """
+        key = (pathlib.Path(path).resolve(), mirrored)
+
+        with self.lock:
+            texture = self.textures.get(key)
+            if texture is None:
+                if mirrored:
+                    # Flip the already decoded image instead of the file
+                    original = self.get(path)
+                    texture = arcade.Texture(
+                        name=f"{key[0]}:mirrored",
+                        image=ImageOps.mirror(original.image),
+                    )
+                else:
+                    texture = arcade.load_texture(key[0])
+                self.textures[key] = texture
+
+        return texture
+
+    def get_all(self, paths: list, mirrored: bool = False) -> list:
+        """
+        Get the textures for several images
+
+        Args:
+           paths (list): The image files
+           mirrored (bool): Whether to flip the images left to right
+
+        Returns:
+           list: The shared textures, in the same order
+        """
+        return [self.get(path, mirrored) for path in paths]
+
+    def preload(self, directory: pathlib.Path = ASSETS_PATH / "images") -> int:
+        """
+        Load every PNG under a directory ahead of time
+
+        Args:
+           directory (pathlib.Path): Where to look for images
+
+        Returns:
+           int: How many images are now loaded
+        """
+        for path in sorted(pathlib.Path(directory).rglob("*.png")):
+            self.get(path)
+        return len(self.textures)
+
+    def clear(self) -> None:
+        """ Forget every loaded texture. """
+        with self.lock:
+            self.textures.clear()
+
+
+# One registry shared by the whole game
+TEXTURES = TextureRegistry()
@@ -0,0 +1,890 @@
+"""
+Arcade Platformer streamed worlds
+
+A world is several TMX maps placed side by side or on top of each other,
+as laid out in a Tiled .world file or stitched in a row or grid. Only the
+maps near the player are ever in memory: the RegionStreamer reads each
+map on a worker thread once the player comes within LOAD_DISTANCE of it,
+builds its sprites on the main thread, and drops the regions farthest
+away once the estimated memory in use goes over the budget. Load time
+per step and memory use then depend on how much of the world is near
+the player, not on how long the world is.
+
+World mode collides with tile grids, which can take a region's tiles in
+and out cell by cell, and streams the Background, Ground, Ladders,
+Collectibles and Goal layers. Enemies and moving platforms work off
+one map's own grid, so they are left out of streamed regions. Coins
+stay collected when their region is dropped and streamed in again.
+
+Walk a long stitched world and watch memory and load times stay flat:
+
+    python world.py ../assets/platform_level_01.tmx --repeat 50
+"""
+# world.py
+
+import argparse
+import concurrent.futures
+import json
+import math
+import pathlib
+import time
+import tracemalloc
+import xml.etree.ElementTree as ElementTree
+
+import arcade
+import numpy as np
+
+from chunks import ChunkedLayer
+from collision import SpatialGrid
+from constants import (
+    GRAVITY,
+    MAP_SCALING,
+    PLAYER_MOVE_SPEED,
+    PLAYER_START_X,
+    PLAYER_START_Y,
+    SCREEN_WIDTH,
+)
+from enemies import EnemySystem
+from level_format import COMPILED_SUFFIX, HEADER_FORMAT
+from levels import (
+    BACKGROUND_LAYER,
+    COIN_LAYER,
+    GOAL_LAYER,
+    LADDERS_LAYER,
+    WALL_LAYER,
+    LevelData,
+)
+from physics import GridPhysicsEngine, TileBoxes
+from platforms import MovingPlatformSystem
+from profiler import FrameProfiler
+from simulation import PHYSICS_GRID, PlatformerSimulation
+from state import GameState
+
+# Load a region once the player is this many pixels from it
+LOAD_DISTANCE = SCREEN_WIDTH
+
+# Regions closer than this are never dropped, whatever the budget
+KEEP_DISTANCE = 2 * SCREEN_WIDTH
+
+# Rough bytes held per region sprite, and per map record read
+SPRITE_BYTES = 2048
+RECORD_BYTES = 512
+
+# Estimated bytes the streamed regions may hold before far ones go;
+# room for a couple of dozen regions the size of level 1
+WORLD_MEMORY_BUDGET = 8 * 1024 * 1024
+
+# Layers streamed in with each region, in drawing order
+STREAMED_LAYERS = (
+    BACKGROUND_LAYER,
+    WALL_LAYER,
+    COIN_LAYER,
+    GOAL_LAYER,
+    LADDERS_LAYER,
+)
+
+
+def map_size(map_path: pathlib.Path) -> tuple:
+    """
+    Read a map's size without loading it
+
+    Args:
+       map_path (pathlib.Path): A TMX file or a compiled level
+
+    Returns:
+       tuple: Width and height in pixels, and the tile size
+    """
+    map_path = pathlib.Path(map_path)
+
+    if map_path.suffix == COMPILED_SUFFIX:
+        with open(map_path, "rb") as level_file:
+            header = HEADER_FORMAT.unpack(
+                level_file.read(HEADER_FORMAT.size)
+            )
+        columns, rows, tile_size = header[2], header[3], header[4]
+    else:
+        # The map element comes first, so stop parsing right there
+        _, root = next(ElementTree.iterparse(str(map_path), ("start",)))
+        columns = int(root.get("width"))
+        rows = int(root.get("height"))
+        tile_size = int(root.get("tilewidth")) * MAP_SCALING
+
+    return columns * tile_size, rows * tile_size, tile_size
+
+
+def _map_sizes(map_paths: list) -> list:
+    """ map_size() of each map, reading each file only once. """
+    sizes = {}
+    for map_path in map_paths:
+        if map_path not in sizes:
+            sizes[map_path] = map_size(map_path)
+    return [sizes[map_path] for map_path in map_paths]
+
+
+class Region:
+    """ One map placed in a world, and what is loaded of it. """
+    def __init__(
+        self,
+        index: int,
+        map_path: pathlib.Path,
+        left: float,
+        bottom: float,
+        size: tuple,
+    ) -> None:
+        """
+        Place a map
+
+        Args:
+           index (int): The region's place in the world
+           map_path (pathlib.Path): The map to play there
+           left (float): World x of the map's left edge
+           bottom (float): World y of the map's bottom edge
+           size (tuple): The map's width, height and tile size, as
+              from map_size()
+        """
+        self.index = index
+        self.map_path = pathlib.Path(map_path)
+        self.left = left
+        self.bottom = bottom
+        self.width, self.height, self.tile_size = size
+
+        # The read being done on the worker thread, then the map it read
+        self.future = None
+        self.level_data = None
+
+        # While installed: sprites by layer, chunks for drawing, and the
+        # tile grid cells filed for collisions
+        self.installed = False
+        self.layers = {}
+        self.chunked_layers = []
+        self.wall_cells = []
+        self.ladder_cells = []
+
+    def distance(self, x: float, y: float) -> float:
+        """
+        How far a point is from the region
+
+        Args:
+           x (float): World x
+           y (float): World y
+
+        Returns:
+           float: Distance in pixels, 0 if the point is inside
+        """
+        dx = max(self.left - x, 0.0, x - (self.left + self.width))
+        dy = max(self.bottom - y, 0.0, y - (self.bottom + self.height))
+        return math.hypot(dx, dy)
+
+    def sprite_count(self) -> int:
+        """ How many sprites the region has built. """
+        return sum(len(sprites) for sprites in self.layers.values())
+
+
+class World:
+    """ Maps placed side by side, in world pixel coordinates. """
+    def __init__(self, regions: list) -> None:
+        """
+        Lay out a world
+
+        Args:
+           regions (list): The Regions, the first holding the start
+        """
+        self.regions = regions
+        self.width = max(region.left + region.width for region in regions)
+        self.height = max(
+            region.bottom + region.height for region in regions
+        )
+        first = regions[0]
+        self.start = (
+            first.left + PLAYER_START_X,
+            first.bottom + PLAYER_START_Y,
+        )
+
+        # Regions filed by the cells they cover, so finding the ones
+        # near a point doesn't look at the whole world
+        self.cell_size = max(
+            max(region.width, region.height) for region in regions
+        )
+        self.cells = {}
+        for region in regions:
+            for key in self._cell_keys(
+                region.left,
+                region.left + region.width,
+                region.bottom,
+                region.bottom + region.height,
+            ):
+                self.cells.setdefault(key, []).append(region)
+
+    def _cell_keys(
+        self, left: float, right: float, bottom: float, top: float
+    ) -> list:
+        """ Every cell key a box touches. """
+        size = self.cell_size
+        return [
+            (column, row)
+            for column in range(int(left // size), int(right // size) + 1)
+            for row in range(int(bottom // size), int(top // size) + 1)
+        ]
+
+    @classmethod
+    def read(cls, world_path: pathlib.Path) -> "World":
+        """
+        Read a Tiled .world file
+
+        Tiled measures y down from the top, so the layout is flipped to
+        match arcade's coordinates.
+
+        Args:
+           world_path (pathlib.Path): The world file
+
+        Returns:
+           World: The maps it lists, the first one holding the start
+        """
+        world_path = pathlib.Path(world_path)
+        with open(world_path) as world_file:
+            maps = json.load(world_file)["maps"]
+
+        paths = [world_path.parent / entry["fileName"] for entry in maps]
+        sizes = _map_sizes(paths)
+        top = max(
+            entry["y"] * MAP_SCALING + size[1]
+            for entry, size in zip(maps, sizes)
+        )
+        return cls([
+            Region(
+                index,
+                path,
+                entry["x"] * MAP_SCALING,
+                top - entry["y"] * MAP_SCALING - size[1],
+                size,
+            )
+            for index, (entry, path, size) in enumerate(
+                zip(maps, paths, sizes)
+            )
+        ])
+
+    @classmethod
+    def stitch(cls, map_paths: list, columns: int = None) -> "World":
+        """
+        Lay maps out in rows, left to right and bottom to top
+
+        Args:
+           map_paths (list): The maps, in order
+           columns (int): Maps per row; all of them in one row if None
+
+        Returns:
+           World: The stitched world
+        """
+        columns = columns or len(map_paths)
+        sizes = _map_sizes(map_paths)
+        regions = []
+        left = bottom = row_height = 0.0
+        for index, (map_path, size) in enumerate(zip(map_paths, sizes)):
+            if index and index % columns == 0:
+                left = 0.0
+                bottom += row_height
+                row_height = 0.0
+            region = Region(index, map_path, left, bottom, size)
+            regions.append(region)
+            left += region.width
+            row_height = max(row_height, region.height)
+        return cls(regions)
+
+    def regions_near(self, x: float, y: float, distance: float) -> list:
+        """
+        Find the regions within a distance of a point
+
+        Args:
+           x (float): World x
+           y (float): World y
+           distance (float): How far to look, in pixels
+
+        Returns:
+           list: (distance, region) for each, nearest first
+        """
+        near = {}
+        for key in self._cell_keys(
+            x - distance, x + distance, y - distance, y + distance
+        ):
+            for region in self.cells.get(key, ()):
+                if region.index not in near:
+                    away = region.distance(x, y)
+                    if away <= distance:
+                        near[region.index] = (away, region)
+        return sorted(near.values(), key=lambda item: item[0])
+
+    def region_at(self, x: float, y: float) -> Region:
+        """
+        Find the region holding a point
+
+        Args:
+           x (float): World x
+           y (float): World y
+
+        Returns:
+           Region: The region, or None if the point is in none
+        """
+        near = self.regions_near(x, y, 0.0)
+        return near[0][1] if near else None
+
+
+class RegionStreamer:
+    """ Keeps the regions near the player loaded, and drops far ones. """
+    def __init__(
+        self,
+        world: World,
+        pool=None,
+        memory_budget: int = WORLD_MEMORY_BUDGET,
+        load_distance: float = LOAD_DISTANCE,
+        keep_distance: float = KEEP_DISTANCE,
+    ) -> None:
+        """
+        Create the streamer, with nothing loaded yet
+
+        Args:
+           world (World): The world to stream
+           pool (SpritePool): Where sprites come from and go back to
+           memory_budget (int): Estimated bytes to hold before dropping
+              far regions
+           load_distance (float): Load regions this close to the player
+           keep_distance (float): Never drop regions this close
+        """
+        self.world = world
+        self.pool = pool
+        self.memory_budget = memory_budget
+        self.load_distance = load_distance
+        self.keep_distance = keep_distance
+
+        # Every streamed region's tiles share these, as world mode needs
+        # grids it can add and remove regions from
+        tile_size = world.regions[0].tile_size
+        self.walls = TileBoxes([], tile_size)
+        self.ladders = TileBoxes([], tile_size)
+        self.coin_grid = SpatialGrid(tile_size)
+        self.goal_grid = SpatialGrid(tile_size)
+
+        # Coins collected, as (region index, coin index), and the place
+        # of every coin sprite on screen
+        self.collected = set()
+        self.coin_keys = {}
+
+        # Regions being read, and regions holding a map or sprites; the
+        # rest of the world is never looked at
+        self.pending = set()
+        self.loaded = set()
+
+        # Maps are read one at a time, away from the game loop
+        self.executor = None
+
+        # How long each region took to build, in seconds
+        self.install_times = []
+        self.evictions = 0
+
+    def update(self, x: float, y: float) -> None:
+        """
+        Stream regions in and out around a point
+
+        At most one region read in the background is built per call, so
+        a frame never pays for more than one. The region holding the
+        point is always built, waiting for its read if need be.
+
+        Args:
+           x (float): The player's world x
+           y (float): The player's world y
+        """
+        near = self.world.regions_near(x, y, self.load_distance)
+
+        ready = None
+        for _, region in near:
+            if region.installed:
+                continue
+            self._request(region)
+            if ready is None and (
+                region.level_data is not None or region.future.done()
+            ):
+                ready = region
+
+        # Reads the player has moved away from are dropped, finished
+        # or not
+        wanted = {region.index for _, region in near}
+        for region in list(self.pending):
+            if region.index not in wanted and (
+                region.future.done() or region.future.cancel()
+            ):
+                region.future = None
+                self.pending.discard(region)
+
+        if near and near[0][0] == 0.0 and not near[0][1].installed:
+            self.install(near[0][1])
+        elif ready is not None:
+            self.install(ready)
+
+        self.evict_far(x, y)
+
+    def _request(self, region: Region) -> None:
+        """ Start reading a region's map, unless it is on its way. """
+        if region.future is not None or region.level_data is not None:
+            return
+
+        # A map used by another region is shared, not read again
+        for other in self.loaded:
+            if (
+                other.map_path == region.map_path
+                and other.level_data is not None
+            ):
+                region.level_data = other.level_data
+                self.loaded.add(region)
+                return
+
+        if self.executor is None:
+            self.executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="world-stream"
+            )
+        region.future = self.executor.submit(LevelData, region.map_path)
+        self.pending.add(region)
+
+    def install(self, region: Region) -> None:
+        """
+        Build a region's sprites and add its tiles to the grids
+
+        Args:
+           region (Region): A region near the player
+        """
+        start = time.perf_counter()
+
+        self._request(region)
+        if region.future is not None:
+            # Usually finished already; the player's own region waits
+            region.level_data = region.future.result()
+            region.future = None
+            self.pending.discard(region)
+        self.loaded.add(region)
+        level_data = region.level_data
+
+        for layer_name in STREAMED_LAYERS:
+            sprites = arcade.SpriteList()
+            for record in level_data.layers[layer_name]:
+                if self.pool is None:
+                    sprite = record.create_sprite()
+                else:
+                    sprite = self.pool.take(record)
+                sprite.center_x += region.left
+                sprite.center_y += region.bottom
+                sprites.append(sprite)
+            region.layers[layer_name] = sprites
+            region.chunked_layers.append(
+                ChunkedLayer(
+                    sprites,
+                    level_data.tile_size,
+                    is_static=layer_name != COIN_LAYER,
+                )
+            )
+
+        region.wall_cells = self.walls.add(
+            level_data.layers[WALL_LAYER], region.left, region.bottom
+        )
+        region.ladder_cells = self.ladders.add(
+            level_data.layers[LADDERS_LAYER], region.left, region.bottom
+        )
+
+        for index, coin in enumerate(region.layers[COIN_LAYER]):
+            key = (region.index, index)
+            self.coin_keys[id(coin)] = key
+            self._show_coin(coin, key not in self.collected)
+        for goal in region.layers[GOAL_LAYER]:
+            self.goal_grid.add(goal)
+
+        region.installed = True
+        self.install_times.append(time.perf_counter() - start)
+
+    def evict(self, region: Region) -> None:
+        """
+        Drop a region's sprites and tiles, giving the sprites back
+
+        Args:
+           region (Region): An installed region
+        """
+        self.walls.remove(region.wall_cells)
+        self.ladders.remove(region.ladder_cells)
+        for coin in region.layers[COIN_LAYER]:
+            key = self.coin_keys.pop(id(coin), None)
+            if key not in self.collected:
+                self.coin_grid.remove(coin)
+        for goal in region.layers[GOAL_LAYER]:
+            self.goal_grid.remove(goal)
+
+        if self.pool is not None:
+            self.pool.release(*region.layers.values())
+        else:
+            # Sprites and their lists point at each other; unlinking
+            # them frees both at once instead of at the next full
+            # garbage collection, so memory stays flat as regions go
+            for sprites in region.layers.values():
+                for sprite in sprites:
+                    sprite.sprite_lists.clear()
+
+        region.layers = {}
+        region.chunked_layers = []
+        region.wall_cells = []
+        region.ladder_cells = []
+        region.installed = False
+        region.level_data = None
+        self.loaded.discard(region)
+        self.evictions += 1
+
+    def evict_far(self, x: float, y: float) -> None:
+        """
+        Drop the farthest regions while over the memory budget
+
+        Args:
+           x (float): The player's world x
+           y (float): The player's world y
+        """
+        if self.memory_estimate() <= self.memory_budget:
+            return
+
+        far = sorted(
+            (
+                region for region in self.loaded
+                if region.distance(x, y) > self.keep_distance
+            ),
+            key=lambda region: region.distance(x, y),
+            reverse=True,
+        )
+        for region in far:
+            if region.installed:
+                self.evict(region)
+            else:
+                region.level_data = None
+                self.loaded.discard(region)
+            if self.memory_estimate() <= self.memory_budget:
+                return
+
+    def memory_estimate(self) -> int:
+        """
+        Estimate the bytes held by loaded regions
+
+        Returns:
+           int: Sprites built plus map records read, each map once
+        """
+        sprites = 0
+        maps = {}
+        for region in self.loaded:
+            sprites += region.sprite_count()
+            if region.level_data is not None:
+                maps[id(region.level_data)] = region.level_data
+
+        records = sum(
+            len(records)
+            for level_data in maps.values()
+            for records in level_data.layers.values()
+        )
+        return sprites * SPRITE_BYTES + records * RECORD_BYTES
+
+    def collect(self, coin: arcade.Sprite) -> None:
+        """
+        Hide a coin, and keep it hidden if its region streams in again
+
+        Args:
+           coin (arcade.Sprite): A coin the player touched
+        """
+        self.collected.add(self.coin_keys[id(coin)])
+        self._show_coin(coin, False)
+
+    def rearm_coins(self) -> None:
+        """ Bring back every collected coin. """
+        self.set_collected(set())
+
+    def set_collected(self, collected: set) -> None:
+        """
+        Make a set of coins the collected ones, such as from a snapshot
+
+        Only the installed coins that change are touched.
+
+        Args:
+           collected (set): (region index, coin index) of each coin
+        """
+        for region in self.loaded:
+            for index, coin in enumerate(region.layers.get(COIN_LAYER, ())):
+                key = (region.index, index)
+                was = key not in self.collected
+                alive = key not in collected
+                if alive != was:
+                    self._show_coin(coin, alive)
+        self.collected = set(collected)
+
+    def _show_coin(self, coin: arcade.Sprite, alive: bool) -> None:
+        """ Show a coin and add it to collisions, or hide and remove it. """
+        # Hidden coins stay in their lists, drawn fully transparent
+        coin.alpha = 255 if alive else 0
+        if alive:
+            self.coin_grid.add(coin)
+        else:
+            self.coin_grid.remove(coin)
+
+    def chunked_layers(self) -> list:
+        """
+        Gather what to draw
+
+        Returns:
+           list: The ChunkedLayers of every installed region
+        """
+        return [
+            layer
+            for region in sorted(self.loaded, key=lambda r: r.index)
+            for layer in region.chunked_layers
+        ]
+
+    def resident(self) -> int:
+        """ How many regions are installed. """
+        return sum(region.installed for region in self.loaded)
+
+    def close(self) -> None:
+        """ Stop the worker thread once the read in progress is done. """
+        for region in self.pending:
+            region.future.cancel()
+        self.pending.clear()
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+            self.executor = None
+
+
+class WorldSimulation(PlatformerSimulation):
+    """ A PlatformerSimulation playing a streamed world of maps. """
+    def __init__(
+        self,
+        world: World,
+        profiler: FrameProfiler = None,
+        pool=None,
+        memory_budget: int = WORLD_MEMORY_BUDGET,
+    ) -> None:
+        """
+        Create the simulation
+
+        Args:
+           world (World): The world to play
+           profiler (FrameProfiler): Times the stages of each step
+           pool (SpritePool): Recycles the sprites of dropped regions
+           memory_budget (int): Estimated bytes of regions to hold
+        """
+        super().__init__(profiler=profiler, pool=pool, physics=PHYSICS_GRID)
+        self.world = world
+        self.streamer = RegionStreamer(
+            world, pool=self.pool, memory_budget=memory_budget
+        )
+
+        # Scroll over the whole world
+        self.map_width = world.width
+        self.tile_size = world.regions[0].tile_size
+
+    def setup(self) -> None:
+        """ Starts the world over, loading the region at the start """
+        setup_start = time.perf_counter()
+
+        if self.physics_engine is None:
+            self.create_world()
+
+        self.reset_level()
+        self.reset_player()
+        self.streamer.update(self.player.center_x, self.player.center_y)
+
+        self.last_setup_time = time.perf_counter() - setup_start
+
+    def create_world(self) -> None:
+        """ Builds what the view and step() use, empty but for the player """
+        # The view draws the streamer's regions instead of these
+        self.background = arcade.SpriteList()
+        self.walls = arcade.SpriteList()
+        self.ladders = arcade.SpriteList()
+        self.goals = arcade.SpriteList()
+        self.coins = arcade.SpriteList()
+        self.coins_alive = np.ones(0, dtype=bool)
+
+        self.coin_grid = self.streamer.coin_grid
+        self.goal_grid = self.streamer.goal_grid
+
+        # Streamed regions have no moving platforms or enemies
+        self.moving_platforms = arcade.SpriteList()
+        self.platform_system = MovingPlatformSystem([], self.moving_platforms)
+        self.enemy_system = EnemySystem(
+            [], np.zeros((1, 1), dtype=bool), self.tile_size
+        )
+        self.enemies = self.enemy_system.sprites
+
+        self.reset_player()
+        self.physics_engine = GridPhysicsEngine(
+            player_sprite=self.player,
+            walls=self.streamer.walls,
+            ladders=self.streamer.ladders,
+            platforms=self.platform_system,
+            gravity_constant=GRAVITY,
+        )
+
+    def restart(self) -> None:
+        """ Starts the world over without dropping what is streamed in """
+        self.reset_level()
+        self.reset_player()
+
+    def reset_player(self) -> None:
+        """ Puts the player at the world's start """
+        super().reset_player()
+        self.player.center_x, self.player.center_y = self.world.start
+
+    def reset_level(self) -> None:
+        """ Brings back every collected coin """
+        self.streamer.rearm_coins()
+
+    def collect_coin(self, coin: arcade.Sprite) -> None:
+        """
+        Scores a coin and hides it until the world is started over
+
+        Args:
+           coin (arcade.Sprite): The coin the player touched
+        """
+        self.score += int(coin.properties["point_value"])
+        self.streamer.collect(coin)
+
+    def snapshot(self) -> GameState:
+        """
+        Captures the player, the score and the coins collected
+
+        Streamed regions have no enemies or moving platforms, so those
+        arrays are empty, and the coins are kept as the (region, coin)
+        pairs collected rather than a bit per coin in the world.
+
+        Returns:
+           GameState: The current state, to hand back to restore()
+        """
+        player = self.player
+        return GameState(
+            level=self.level,
+            map_path=None,
+            score=self.score,
+            tick=self.tick,
+            player=(
+                player.center_x,
+                player.center_y,
+                player.change_x,
+                player.change_y,
+            ),
+            coins_alive=np.zeros(0, dtype=np.uint8),
+            coin_count=0,
+            enemies=np.zeros((2, 0)),
+            platforms=np.zeros((0, 4)),
+            collected=np.array(
+                sorted(self.streamer.collected), dtype=np.int32
+            ).reshape(-1, 2),
+            climb_y=self.climb_y,
+        )
+
+    def restore(self, state: GameState) -> None:
+        """
+        Puts the simulation back into a captured state
+
+        The regions around the restored player are streamed in on the
+        next step, with the state's coins still collected.
+
+        Args:
+           state (GameState): A state from snapshot()
+        """
+        if self.physics_engine is None:
+            self.create_world()
+
+        self.streamer.set_collected(set(map(tuple, state.collected.tolist())))
+        (
+            self.player.center_x,
+            self.player.center_y,
+            self.player.change_x,
+            self.player.change_y,
+        ) = state.player
+        self.score = state.score
+        self.tick = state.tick
+        self.climb_y = state.climb_y
+
+    def step(self) -> list:
+        """
+        Streams regions around the player, then advances one step
+
+        Reaching a goal in any region finishes the world and starts it
+        over.
+
+        Returns:
+           list: The events that happened during this step
+        """
+        with self.profiler.section("streaming"):
+            self.streamer.update(self.player.center_x, self.player.center_y)
+        return super().step()
+
+
+def walk(world: World, memory_budget: int) -> dict:
+    """
+    Stream a world in while moving across it at the player's speed
+
+    Args:
+       world (World): The world to walk
+       memory_budget (int): Estimated bytes of regions to hold
+
+    Returns:
+       dict: The first load, which waits for its map to be read, then
+          the worst streaming step and build time per region after it,
+          and the most memory and regions held at once
+    """
+    streamer = RegionStreamer(world, memory_budget=memory_budget)
+    tracemalloc.start()
+
+    x, y = world.start
+    first_load = None
+    slowest = 0.0
+    most_resident = 0
+    steps = 0
+    while x < world.width:
+        region = world.region_at(x, y)
+        if region is not None:
+            y = region.bottom + PLAYER_START_Y
+        start = time.perf_counter()
+        streamer.update(x, y)
+        elapsed = time.perf_counter() - start
+        if first_load is None:
+            first_load = elapsed
+        else:
+            slowest = max(slowest, elapsed)
+        most_resident = max(most_resident, streamer.resident())
+        x += PLAYER_MOVE_SPEED
+        steps += 1
+
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    streamer.close()
+
+    installs = streamer.install_times[1:] or streamer.install_times
+    return {
+        "regions": len(world.regions),
+        "steps": steps,
+        "first_load_ms": first_load * 1000,
+        "worst_step_ms": slowest * 1000,
+        "install_ms_mean": sum(installs) / len(installs) * 1000,
+        "install_ms_max": max(installs) * 1000,
+        "evictions": streamer.evictions,
+        "most_resident": most_resident,
+        "peak_memory_mb": peak / 1024 / 1024,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("maps", nargs="+", type=pathlib.Path)
+    parser.add_argument(
+        "--repeat", type=int, default=10, help="stitch the maps this often"
+    )
+    parser.add_argument(
+        "--columns", type=int, default=None, help="maps per row"
+    )
+    parser.add_argument(
+        "--budget-mb", type=float, default=WORLD_MEMORY_BUDGET / 2**20
+    )
+    args = parser.parse_args()
+
+    world = World.stitch(args.maps * args.repeat, args.columns)
+    results = walk(world, int(args.budget_mb * 2**20))
+    for name, value in results.items():
+        print(f"{name}: {value}")
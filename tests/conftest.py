@@ -0,0 +1,14 @@
+"""
+Arcade Platformer tests
+
+The game's modules import each other by name, as when run from their
+own directory, so that directory is put on the path first. Everything
+runs headless: no window is opened, and the simulations never draw.
+"""
+# conftest.py
+
+import pathlib
+import sys
+
+GAME_PATH = pathlib.Path(__file__).resolve().parents[1] / "arcade_platformer"
+sys.path.insert(0, str(GAME_PATH))
@@ -0,0 +1,35 @@
+"""
+Arcade Platformer batch runner tests
+
+A batch has to finish and report every game even when a map it needs
+won't load.
+"""
+# test_batch.py
+
+import pytest
+
+pytest.importorskip("arcade")
+
+from batch import RESULT_COLUMNS, run_batch, summarize  # noqa: E402
+
+
+def test_level_1_batch_runs_on_two_processes():
+    results = run_batch([1], 4, "right", processes=2, max_ticks=600)
+
+    assert [row["seed"] for row in results] == [0, 1, 2, 3]
+    for row in results:
+        assert set(row) == set(RESULT_COLUMNS)
+        assert row["level"] == 1
+        assert row["outcome"] != "error"
+    assert "level 01: 4 runs" in summarize(results)
+
+
+def test_map_that_fails_to_load_gives_error_rows():
+    # There is no level 99, so every game on it fails to set up
+    results = run_batch([1, 99], 2, "right", processes=2, max_ticks=60)
+
+    errors = [row for row in results if row["level"] == 99]
+    assert [row["outcome"] for row in errors] == ["error", "error"]
+    assert all(row["error"] for row in errors)
+    assert all(row["outcome"] != "error" for row in results[:2])
+    assert "level 99: 2 runs, all failed" in summarize(results)
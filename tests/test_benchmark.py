@@ -0,0 +1,70 @@
+"""
+Arcade Platformer benchmark smoke tests
+
+Each group of benchmarks runs one small case, so the suite is known to
+finish on the repo as shipped.
+"""
+# test_benchmark.py
+
+import pytest
+
+arcade = pytest.importorskip("arcade")
+
+import benchmark  # noqa: E402
+from stress_map import generate_stress_map  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def small_map():
+    """The smallest synthetic map, removed again afterwards"""
+    name, width, height, enemies = benchmark.SYNTHETIC_SIZES[0]
+    map_path = generate_stress_map(width, height, enemies=enemies)
+    yield {name: map_path}
+    map_path.unlink()
+
+
+def assert_ran_or_failed(results: dict) -> None:
+    """Every case has either times or the error that stopped it"""
+    assert results
+    for name, result in results.items():
+        assert "median_ms" in result or "error" in result, name
+
+
+def test_level_setup():
+    results = {}
+    benchmark.bench_level_setup(results, repeat=1)
+    assert_ran_or_failed(results)
+    assert "median_ms" in results["setup_level_01_cold"]
+    assert "median_ms" in results["setup_level_01_cached"]
+
+
+def test_sprites():
+    results = {}
+    benchmark.bench_sprites(results, repeat=1)
+    assert_ran_or_failed(results)
+    assert "median_ms" in results["create_player_sprite"]
+
+
+def test_steps(small_map):
+    results = {}
+    benchmark.bench_steps(results, small_map, repeat=1)
+    assert_ran_or_failed(results)
+    assert "median_ms" in results["step_small_grid"]
+
+
+def test_draw(small_map):
+    try:
+        arcade.Window(1, 1, visible=False).close()
+    except Exception as error:
+        pytest.skip(f"no window to draw into: {error}")
+
+    results = {}
+    benchmark.bench_draw(results, small_map, repeat=1)
+    assert_ran_or_failed(results)
+    assert "median_ms" in results["draw_small"]
+
+
+def test_failed_cases_are_not_compared():
+    baseline = {"a": {"median_ms": 1.0}, "b": {"error": "broken"}}
+    results = {"a": {"error": "broken"}, "b": {"median_ms": 9.0}}
+    assert benchmark.compare(results, baseline, threshold=0.2) == []
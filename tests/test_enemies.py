@@ -0,0 +1,98 @@
+"""
+Arcade Platformer enemy tests
+
+Enemies walk until they run into a wall, the side of the map or a
+moving platform, then turn around, and the player touching one is
+reported.
+"""
+# test_enemies.py
+
+import numpy as np
+import pytest
+
+arcade = pytest.importorskip("arcade")
+
+from enemies import EnemySystem  # noqa: E402
+
+TILE_SIZE = 64
+
+# A floor along the bottom row and a wall tile on it, at column 10
+COLUMNS = 20
+WALL_COLUMN = 10
+
+# Standing on the floor, the slime's hit box fills the row above it
+FLOOR_Y = 2 * TILE_SIZE
+
+
+def floor_with_wall() -> np.ndarray:
+    """The solid tiles: a floor with one wall tile on it"""
+    solid = np.zeros((4, COLUMNS), dtype=bool)
+    solid[0, :] = True
+    solid[1, WALL_COLUMN] = True
+    return solid
+
+
+def walk(enemies: EnemySystem, steps: int, platform_boxes=None) -> list:
+    """
+    Move the enemies, noting the first one's positions
+
+    Args:
+       enemies (EnemySystem): The enemies to move
+       steps (int): How many steps to move them
+       platform_boxes (np.ndarray): Moving platforms in their way
+
+    Returns:
+       list: The first enemy's x after each step
+    """
+    positions = []
+    for _ in range(steps):
+        enemies.update(platform_boxes)
+        positions.append(enemies.x[0])
+    return positions
+
+
+def test_enemy_turns_at_wall():
+    enemies = EnemySystem(
+        [(500, FLOOR_Y, {"change_x": 5})], floor_with_wall(), TILE_SIZE
+    )
+    positions = walk(enemies, 40)
+
+    # Its right edge gets no more than a step into the wall
+    wall_left = WALL_COLUMN * TILE_SIZE
+    assert max(positions) + enemies.right_extent[0] <= wall_left + 5
+    assert enemies.change_x[0] == -5
+    assert positions[-1] < positions[0]
+
+
+def test_enemy_turns_at_map_side():
+    enemies = EnemySystem([(100, FLOOR_Y, {})], floor_with_wall(), TILE_SIZE)
+    speed = enemies.change_x[0]
+    assert speed < 0
+
+    positions = walk(enemies, 40)
+    assert min(positions) - enemies.left_extent[0] >= speed
+    assert enemies.change_x[0] == -speed
+
+
+def test_enemy_turns_at_platform():
+    enemies = EnemySystem(
+        [(300, FLOOR_Y, {"change_x": 5})], floor_with_wall(), TILE_SIZE
+    )
+    # Left, right, bottom and top of a platform low enough to bump into
+    platform = np.array([[400.0, 528.0, 80.0, 112.0]])
+    positions = walk(enemies, 40, platform)
+
+    assert max(positions) + enemies.right_extent[0] <= 400 + 5
+    assert enemies.change_x[0] == -5
+
+
+def test_collisions_report_touching_player():
+    enemies = EnemySystem([(500, FLOOR_Y, {})], floor_with_wall(), TILE_SIZE)
+    player = arcade.SpriteSolidColor(32, 64, arcade.color.RED)
+    player.center_x = enemies.x[0]
+    player.bottom = TILE_SIZE
+
+    assert enemies.collisions(player) == [enemies.sprites[0]]
+
+    player.center_x = enemies.x[0] + 200
+    assert enemies.collisions(player) == []
@@ -0,0 +1,88 @@
+"""
+Arcade Platformer compiled level tests
+
+A level compiled to the binary format has to load as exactly the level
+its TMX file describes, so either plays the same way.
+"""
+# test_level_format.py
+
+import random
+
+import pytest
+
+pytest.importorskip("arcade")
+
+from batch import policy_random  # noqa: E402
+from level_format import compile_level  # noqa: E402
+from levels import LevelData, SpriteRecord  # noqa: E402
+from simulation import PlatformerSimulation  # noqa: E402
+
+from conftest import GAME_PATH  # noqa: E402
+
+LEVEL_1 = GAME_PATH.parent / "assets" / "platform_level_01.tmx"
+
+
+@pytest.fixture(scope="module")
+def both_levels(tmp_path_factory):
+    """Level 1 read from its TMX file and from a compiled copy"""
+    tmx = LevelData(LEVEL_1)
+    compiled_path = tmp_path_factory.mktemp("compiled") / "level_01.lvl"
+    compile_level(tmx, compiled_path)
+    return tmx, LevelData(compiled_path)
+
+
+def record_values(record: SpriteRecord) -> tuple:
+    """Everything about a record, with its texture as raw pixels"""
+    texture = record.texture
+    pixels = texture.image.convert("RGBA")
+    return tuple(
+        getattr(record, name)
+        for name in SpriteRecord.__slots__
+        if name not in ("texture", "hit_box")
+    ) + (
+        pixels.size,
+        pixels.tobytes(),
+        tuple(tuple(point) for point in record.hit_box),
+    )
+
+
+def by_position(values: tuple) -> tuple:
+    """Sort key for record_values(): center x, then center y"""
+    names = [name for name in SpriteRecord.__slots__ if name != "texture"]
+    return values[names.index("center_x")], values[names.index("center_y")]
+
+
+def test_compiled_level_matches_tmx(both_levels):
+    tmx, compiled = both_levels
+
+    assert tuple(compiled.background_color) == tuple(tmx.background_color)
+    assert compiled.tile_size == tmx.tile_size
+    assert compiled.map_columns == tmx.map_columns
+    assert compiled.map_rows == tmx.map_rows
+    assert compiled.map_width == tmx.map_width
+    assert list(compiled.enemy_spawns) == list(tmx.enemy_spawns)
+
+    # Tile layers are stored as grids, so they come back row by row
+    assert compiled.layers.keys() == tmx.layers.keys()
+    for name, records in tmx.layers.items():
+        assert sorted(
+            map(record_values, compiled.layers[name]), key=by_position
+        ) == sorted(map(record_values, records), key=by_position), name
+
+
+def test_compiled_level_plays_like_tmx(both_levels):
+    positions = []
+    for level_data in both_levels:
+        simulation = PlatformerSimulation(map_path=level_data.map_path)
+        simulation.setup()
+        rng = random.Random(0)
+        path = []
+        for _ in range(300):
+            simulation.set_input(*policy_random(simulation, rng))
+            simulation.step()
+            path.append(
+                (simulation.player.center_x, simulation.player.center_y)
+            )
+        positions.append(path)
+
+    assert positions[0] == positions[1]
@@ -0,0 +1,34 @@
+"""
+Arcade Platformer level cache tests
+
+A map whose prefetch failed is read again by load() itself, instead of
+load() raising the worker's error.
+"""
+# test_levels.py
+
+import pytest
+
+pytest.importorskip("arcade")
+
+from levels import LevelCache  # noqa: E402
+from simulation import level_map_path  # noqa: E402
+
+
+def test_load_reads_map_again_after_failed_prefetch():
+    cache = LevelCache()
+
+    # Fail the way a worker read does, but with load() already holding
+    # the future, before the worker could drop it from pending
+    def fail(key):
+        raise OSError("read failed on the worker")
+
+    cache._read = fail
+    map_path = level_map_path(1)
+    cache.prefetch(map_path)
+    cache.executor.shutdown(wait=True)
+    assert cache.pending
+
+    level_data = cache.load(map_path)
+    assert level_data.tile_size > 0
+    assert cache.is_ready(map_path)
+    assert not cache.pending
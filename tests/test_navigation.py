@@ -0,0 +1,86 @@
+"""
+Arcade Platformer navigation tests
+
+Level 1, the one shipped level that loads as is, can be finished, and
+path queries find their way over a small hand-built map.
+"""
+
+# test_navigation.py
+
+import numpy as np
+import pytest
+
+pytest.importorskip("arcade")
+
+import navigation  # noqa: E402
+
+from conftest import GAME_PATH  # noqa: E402
+
+LEVEL_1 = GAME_PATH.parent / "assets" / "platform_level_01.tmx"
+
+
+@pytest.fixture
+def level_1(tmp_path):
+    """Level 1 copied aside, so its .nav cache is not left in assets"""
+    map_path = tmp_path / LEVEL_1.name
+    map_path.write_bytes(LEVEL_1.read_bytes())
+    for tileset in LEVEL_1.parent.glob("*.tsx"):
+        (tmp_path / tileset.name).write_bytes(tileset.read_bytes())
+    (tmp_path / "images").symlink_to(LEVEL_1.parent / "images")
+    return map_path
+
+
+def test_level_1_validates_clean(level_1):
+    report = navigation.validate(level_1)
+    assert report["start_on_graph"]
+    assert report["unreachable_coins"] == []
+    assert report["unreachable_goals"] == []
+
+
+def wall_map(ladder: bool) -> navigation.NavGraph:
+    """
+    A floor split by a wall too high to jump, with a ladder up it or not
+
+    Args:
+       ladder (bool): Whether a ladder stands against the wall
+
+    Returns:
+       NavGraph: The map's graph, with 64 pixel tiles and a one tile
+          player
+    """
+    solid = np.zeros((10, 8), dtype=bool)
+    solid[0, :] = True
+    solid[1:7, 4] = True
+    ladders = np.zeros_like(solid)
+    if ladder:
+        ladders[1:8, 3] = True
+    return navigation._GraphBuilder(solid, ladders, 64.0, 48.0, 48.0).build()
+
+
+def test_path_climbs_over_wall():
+    graph = wall_map(ladder=True)
+    start = graph.node_at(1.5 * 64, 64)
+    goal = graph.node_at(6.5 * 64, 64)
+
+    path = graph.path(start, goal)
+    cells = [tuple(graph.node_cells[node]) for node in path]
+    assert cells[0] == (1, 1)
+    assert cells[-1] == (6, 1)
+    assert (3, 7) in cells and (4, 7) in cells
+
+    # Every step of the path is a move on the graph
+    for node, target in zip(path, path[1:]):
+        moves = graph.targets[graph.offsets[node]:graph.offsets[node + 1]]
+        assert target in moves
+
+    assert graph.next_nodes(np.array([start, -1]), goal).tolist() == [
+        path[1], -1
+    ]
+
+
+def test_no_path_without_ladder():
+    graph = wall_map(ladder=False)
+    start = graph.node_at(1.5 * 64, 64)
+    goal = graph.node_at(6.5 * 64, 64)
+    assert graph.path(start, goal) == []
+    assert graph.next_nodes(np.array([start]), goal).tolist() == [-1]
@@ -0,0 +1,27 @@
+"""
+Arcade Platformer netplay tests
+
+A server and simulated clients play over localhost, and every client's
+copy of the game, rebuilt from delta snapshots, has to match the state
+the server sent it.
+"""
+# test_netplay.py
+
+import asyncio
+
+import pytest
+
+pytest.importorskip("arcade")
+
+from netplay import SNAPSHOT_RATE, run_local  # noqa: E402
+
+
+def test_clients_stay_in_sync_over_localhost():
+    seconds = 2.0
+    report = asyncio.run(run_local(3, seconds))
+
+    assert report["in_sync"]
+    assert report["ticks"] > 0
+
+    # Snapshots keep flowing for the whole run, not just the first one
+    assert report["snapshots_per_client"] >= SNAPSHOT_RATE * seconds / 2
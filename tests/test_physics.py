@@ -0,0 +1,75 @@
+"""
+Arcade Platformer grid physics tests
+
+The grid engine has to move the player exactly as arcade's
+PhysicsEnginePlatformer does, so both are played with the same input
+and must end every step in the same place.
+"""
+# test_physics.py
+
+import random
+
+import pytest
+
+pytest.importorskip("arcade")
+
+from batch import policy_random  # noqa: E402
+from simulation import (  # noqa: E402
+    PHYSICS_GRID,
+    PHYSICS_SPRITES,
+    PlatformerSimulation,
+)
+
+
+def play_both(inputs: list, level: int = 1) -> list:
+    """
+    Play the same input through both physics modes
+
+    Args:
+       inputs (list): (move_x, move_y, jump) for each step
+       level (int): Which level to play
+
+    Returns:
+       list: For each step, the player's position with each engine
+    """
+    simulations = []
+    for physics in (PHYSICS_SPRITES, PHYSICS_GRID):
+        simulation = PlatformerSimulation(level, physics=physics)
+        simulation.setup()
+        simulations.append(simulation)
+
+    positions = []
+    for choice in inputs:
+        step = []
+        for simulation in simulations:
+            simulation.set_input(*choice)
+            simulation.step()
+            step.append(
+                (
+                    simulation.level,
+                    simulation.player.center_x,
+                    simulation.player.center_y,
+                )
+            )
+        positions.append(tuple(step))
+    return positions
+
+
+def test_settles_on_the_ground():
+    sprites, grid = play_both([(0.0, 0.0, False)] * 60)[-1]
+    assert sprites == grid
+    assert grid[2] == 384.0
+
+
+def test_jump_while_overlapping_the_ground_at_spawn():
+    positions = play_both([(0.0, 0.0, True)] + [(0.0, 0.0, False)] * 90)
+    for tick, (sprites, grid) in enumerate(positions):
+        assert sprites == grid, f"step {tick}"
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_random_input_matches_arcade(seed):
+    rng = random.Random(seed)
+    inputs = [policy_random(None, rng) for _ in range(400)]
+    for tick, (sprites, grid) in enumerate(play_both(inputs)):
+        assert sprites == grid, f"step {tick}"
@@ -0,0 +1,106 @@
+"""
+Arcade Platformer moving platform tests
+
+A player standing on a platform rides along with it either way, and
+platforms turn around at their boundary_* bounds.
+"""
+# test_platforms.py
+
+import pytest
+
+arcade = pytest.importorskip("arcade")
+
+from levels import SpriteRecord  # noqa: E402
+from platforms import MovingPlatformSystem  # noqa: E402
+
+# A 128x32 platform starting here
+START_X = 500
+START_Y = 100
+
+
+def platform_system(**settings) -> MovingPlatformSystem:
+    """
+    One platform, with its speed and bounds set as a map would
+
+    Args:
+       settings: change_* and boundary_* values for the platform
+
+    Returns:
+       MovingPlatformSystem: The system moving it
+    """
+    record = SpriteRecord(None, START_X, START_Y, **settings)
+    sprites = arcade.SpriteList()
+    sprite = arcade.SpriteSolidColor(128, 32, arcade.color.WHITE)
+    sprite.center_x = START_X
+    sprite.center_y = START_Y
+    sprites.append(sprite)
+    return MovingPlatformSystem([record], sprites)
+
+
+def standing_on(platforms: MovingPlatformSystem) -> arcade.Sprite:
+    """A player standing in the middle of the platform"""
+    player = arcade.SpriteSolidColor(32, 64, arcade.color.RED)
+    player.center_x = START_X
+    player.bottom = platforms.boxes[0, 3]
+    return player
+
+
+@pytest.mark.parametrize(
+    "settings, moved",
+    [
+        ({"change_x": 2}, (20, 0)),
+        ({"change_y": 2}, (0, 20)),
+        ({"change_y": -2}, (0, -20)),
+    ],
+)
+def test_rider_moves_with_platform(settings, moved):
+    platforms = platform_system(**settings)
+    player = standing_on(platforms)
+
+    for _ in range(10):
+        platforms.update(player)
+        assert platforms.rider(player) == 0
+        assert player.bottom == pytest.approx(platforms.boxes[0, 3])
+
+    assert player.center_x == pytest.approx(START_X + moved[0])
+    assert platforms.x[0] == pytest.approx(START_X + moved[0])
+    assert platforms.y[0] == pytest.approx(START_Y + moved[1])
+
+
+def test_player_beside_platform_is_not_carried():
+    platforms = platform_system(change_y=2)
+    player = standing_on(platforms)
+    player.left = platforms.boxes[0, 1] + 10
+
+    assert platforms.rider(player) == -1
+    before = player.position
+    platforms.update(player)
+    assert player.position == before
+
+
+@pytest.mark.parametrize(
+    "settings, edge, bound",
+    [
+        ({"change_x": 3, "boundary_right": 570}, 1, 570),
+        ({"change_x": -3, "boundary_left": 430}, 0, 430),
+        ({"change_y": 3, "boundary_top": 122}, 3, 122),
+        ({"change_y": -3, "boundary_bottom": 78}, 2, 78),
+    ],
+)
+def test_platform_turns_at_bound(settings, edge, bound):
+    platforms = platform_system(**settings)
+    speed = settings.get("change_x", settings.get("change_y"))
+
+    # Each bound is 6 pixels past the platform's edge, so two steps of
+    # 3 reach it
+    platforms.update()
+    platforms.update()
+    assert platforms.boxes[0, edge] == pytest.approx(bound)
+    changes = (platforms.change_x[0], platforms.change_y[0])
+    assert -speed in changes
+
+    # Then it heads back the way it came
+    before = platforms.boxes[0, edge]
+    platforms.update()
+    assert abs(platforms.boxes[0, edge] - bound) == pytest.approx(3)
+    assert platforms.boxes[0, edge] != before
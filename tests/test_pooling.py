@@ -0,0 +1,36 @@
+"""
+Arcade Platformer sprite pooling tests
+
+Collected coins are hidden in place and brought back on a restart, and
+restarting the same map builds no new sprites.
+"""
+# test_pooling.py
+
+import pytest
+
+pytest.importorskip("arcade")
+
+from pooling import restart_report  # noqa: E402
+from simulation import PlatformerSimulation  # noqa: E402
+
+
+def test_collected_coin_is_hidden_until_restart():
+    simulation = PlatformerSimulation(1)
+    simulation.setup()
+    coin = simulation.coins[0]
+
+    simulation.collect_coin(coin)
+    assert coin.alpha == 0
+    assert not simulation.coins_alive[0]
+    assert coin in simulation.coins
+    assert not simulation.coin_grid.collisions(coin)
+
+    simulation.restart()
+    assert coin.alpha == 255
+    assert simulation.coins_alive.all()
+
+
+def test_restart_loop_builds_nothing_new():
+    once = restart_report(1, restarts=1, enabled=True)
+    many = restart_report(1, restarts=50, enabled=True)
+    assert many["sprites_created"] == once["sprites_created"]
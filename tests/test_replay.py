@@ -0,0 +1,70 @@
+"""
+Arcade Platformer replay tests
+
+A recording has to play back the same way whether it was made on a
+fresh simulation or after the level was restarted.
+"""
+# test_replay.py
+
+import random
+
+import pytest
+
+pytest.importorskip("arcade")
+
+from batch import policy_random  # noqa: E402
+from replay import InputRecorder, verify  # noqa: E402
+from simulation import PlatformerSimulation  # noqa: E402
+
+
+def play(simulation: PlatformerSimulation, ticks: int, seed: int) -> None:
+    """
+    Play random input for a number of steps, staying on level 1
+
+    Args:
+       simulation (PlatformerSimulation): The simulation to play
+       ticks (int): How many steps to run
+       seed (int): Seed for the random input
+    """
+    rng = random.Random(seed)
+    for _ in range(ticks):
+        simulation.set_input(*policy_random(simulation, rng))
+        simulation.step()
+        if simulation.level != 1:
+            break
+
+
+def record(simulation: PlatformerSimulation, ticks: int, seed: int):
+    """
+    Record random input from the simulation's current state
+
+    Args:
+       simulation (PlatformerSimulation): The simulation to record
+       ticks (int): How many steps to record
+       seed (int): Seed for the random input
+
+    Returns:
+       Recording: The finished recording
+    """
+    simulation.recorder = InputRecorder(simulation)
+    play(simulation, ticks, seed)
+    recording = simulation.recorder.finish(simulation)
+    simulation.recorder = None
+    return recording
+
+
+def test_fresh_recording_verifies():
+    simulation = PlatformerSimulation(1)
+    simulation.setup()
+    verify(record(simulation, 200, seed=0))
+
+
+@pytest.mark.parametrize("seed", [2, 5, 6])
+def test_recording_after_restart_verifies(seed):
+    # Play a while first, so the player ends up walking or climbing
+    simulation = PlatformerSimulation(1)
+    simulation.setup()
+    play(simulation, 20 + seed * 7, seed)
+
+    simulation.restart()
+    verify(record(simulation, 200, seed + 100))
@@ -0,0 +1,91 @@
+"""
+Arcade Platformer simulation tests
+
+Ladders react to the climbing input the way they did to key presses:
+only a change of input sets the player's vertical speed, so speed
+carried onto a ladder, such as from a jump, is kept until then.
+"""
+# test_simulation.py
+
+import pytest
+
+pytest.importorskip("arcade")
+
+from constants import PLAYER_MOVE_SPEED  # noqa: E402
+from simulation import (  # noqa: E402
+    PHYSICS_GRID,
+    PHYSICS_SPRITES,
+    PlatformerSimulation,
+)
+from stress_map import generate_stress_map  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def ladder_map():
+    """A small synthetic map, which has ladders; removed afterwards"""
+    map_path = generate_stress_map(40, 20)
+    yield map_path
+    map_path.unlink()
+
+
+def on_ladder(map_path, physics: str) -> PlatformerSimulation:
+    """
+    Set up a simulation with the player halfway up a ladder
+
+    Args:
+       map_path (pathlib.Path): The map to play
+       physics (str): Which physics engine to use
+
+    Returns:
+       PlatformerSimulation: The simulation, ready to step
+    """
+    simulation = PlatformerSimulation(map_path=map_path, physics=physics)
+    simulation.setup()
+    ladder = sorted(
+        simulation.ladders, key=lambda sprite: (sprite.left, sprite.bottom)
+    )[1]
+    simulation.player.center_x = ladder.center_x
+    simulation.player.center_y = ladder.center_y
+    return simulation
+
+
+def vertical_speeds(simulation: PlatformerSimulation, inputs: list) -> list:
+    """
+    Step once for each climbing input
+
+    Args:
+       simulation (PlatformerSimulation): The simulation to play
+       inputs (list): move_y for each step
+
+    Returns:
+       list: The player's vertical speed after each step
+    """
+    speeds = []
+    for move_y in inputs:
+        simulation.set_input(move_y=move_y)
+        simulation.step()
+        speeds.append(simulation.player.change_y)
+    return speeds
+
+
+@pytest.mark.parametrize("physics", [PHYSICS_SPRITES, PHYSICS_GRID])
+def test_ladder_keeps_speed_until_input_changes(ladder_map, physics):
+    simulation = on_ladder(ladder_map, physics)
+    simulation.player.change_y = 6
+    speeds = vertical_speeds(simulation, [0, 0, 1, 1, 0, 0])
+    assert simulation.physics_engine.is_on_ladder()
+    assert speeds == [
+        6, 6, PLAYER_MOVE_SPEED, PLAYER_MOVE_SPEED, 0, 0
+    ]
+
+
+def test_restore_keeps_climbing_input(ladder_map):
+    simulation = on_ladder(ladder_map, PHYSICS_GRID)
+    vertical_speeds(simulation, [1])
+    state = simulation.snapshot()
+
+    # Let go, then go back to holding up as of the snapshot
+    vertical_speeds(simulation, [0])
+    simulation.restore(state)
+    simulation.player.change_y = 6
+    assert vertical_speeds(simulation, [1]) == [6]
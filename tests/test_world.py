@@ -0,0 +1,67 @@
+"""
+Arcade Platformer streamed world tests
+
+Coins collected in a streamed world stay collected when their region is
+dropped and streamed in again, and a world can be captured and restored
+like a single map.
+"""
+# test_world.py
+
+import pytest
+
+pytest.importorskip("arcade")
+
+from levels import COIN_LAYER  # noqa: E402
+from simulation import level_map_path  # noqa: E402
+from world import World, WorldSimulation  # noqa: E402
+
+
+@pytest.fixture
+def simulation():
+    world = World.stitch([level_map_path(1)] * 3)
+    simulation = WorldSimulation(world)
+    simulation.setup()
+    yield simulation
+    simulation.streamer.close()
+
+
+def first_region(simulation):
+    return next(
+        region for region in simulation.streamer.loaded
+        if region.index == 0
+    )
+
+
+def test_collected_coin_stays_hidden_after_eviction(simulation):
+    streamer = simulation.streamer
+    region = first_region(simulation)
+    coin = region.layers[COIN_LAYER][0]
+
+    simulation.collect_coin(coin)
+    assert coin.alpha == 0
+
+    streamer.evict(region)
+    streamer.install(region)
+    coin = region.layers[COIN_LAYER][0]
+    assert coin.alpha == 0
+    assert not streamer.coin_grid.collisions(coin)
+    assert region.layers[COIN_LAYER][1].alpha == 255
+
+
+def test_snapshot_and_restore(simulation):
+    region = first_region(simulation)
+    coins = region.layers[COIN_LAYER]
+    for _ in range(30):
+        simulation.step()
+    state = simulation.snapshot()
+
+    simulation.collect_coin(coins[0])
+    for _ in range(30):
+        simulation.step()
+
+    simulation.restore(state)
+    assert simulation.snapshot().player == state.player
+    assert simulation.score == state.score
+    assert simulation.tick == state.tick
+    assert coins[0].alpha == 255
+    assert not simulation.streamer.collected